@@ -0,0 +1,198 @@
+"""
+Benchmark de configuraciones completas con latencias simuladas
+Ejecuta aplicar_configuracion_completa, el modo multiusuario y
+GestorUsuarios.configurar_centro_computo contra los backends de
+simulacion.py y compara con una línea base guardada.
+
+    python benchmarks/benchmark_configuracion.py
+    python benchmarks/benchmark_configuracion.py -n 10 --latencia-powershell 1.5
+    python benchmarks/benchmark_configuracion.py --pool 0          # un powershell.exe por comando
+    python benchmarks/benchmark_configuracion.py --guardar-linea-base
+
+Sale con código 1 si algún escenario es más lento que la línea base
+(p50 por encima de la tolerancia) o hace más llamadas que ella.
+"""
+
+import argparse
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from simulacion import EntornoSimulado, Latencias
+
+from core import ConfiguradorMultiusuario, GestorUsuarios
+
+LINEA_BASE = Path(__file__).parent / "linea_base.json"
+
+# Dependen de qué tareas coinciden en el tiempo: se informan pero no cuentan como regresión
+CONTADORES_VARIABLES = {"powershell_inicios"}
+
+OPCIONES = {
+    'tema_oscuro': True,
+    'fondo_pantalla': True,
+    'fondo_bloqueo': True,
+    'bloquear_personalizacion': True,
+}
+
+
+def crear_configurador(entorno, usuario=None):
+    return entorno.configurador(usuario_objetivo=usuario)
+
+
+class MultiusuarioSimulado(ConfiguradorMultiusuario):
+    def __init__(self, entorno):
+        super().__init__(entorno.numero_pc, usuarios=entorno.usuarios, ejecutor=entorno.ejecutor,
+                         inventario=entorno.inventario, backend_registro=entorno.registro,
+                         hives=entorno.hives)
+        self.entorno = entorno
+
+    def crear_configurador(self, usuario_objetivo=None, callback=None):
+        return crear_configurador(self.entorno, usuario_objetivo)
+
+
+def usuario_actual(entorno):
+    crear_configurador(entorno).aplicar_configuracion_completa(OPCIONES)
+
+
+def usuario_actual_repetida(entorno):
+    """Segunda ejecución sobre el mismo equipo: todo cumple ya"""
+    crear_configurador(entorno).aplicar_configuracion_completa(OPCIONES)
+
+
+def otro_usuario(entorno):
+    crear_configurador(entorno, entorno.usuarios[0]).aplicar_configuracion_completa(OPCIONES)
+
+
+def multiusuario(entorno):
+    MultiusuarioSimulado(entorno).aplicar(OPCIONES)
+
+
+def gestor_usuarios(entorno):
+    gestor = GestorUsuarios(ejecutor=entorno.ejecutor, inventario=entorno.inventario)
+    gestor.es_admin = True
+    gestor.configurar_centro_computo("Administrador CC", "clave", entorno.usuarios[0])
+
+
+# nombre -> (función medida, preparación no medida sobre el mismo entorno)
+ESCENARIOS = {
+    "usuario_actual": (usuario_actual, None),
+    "usuario_actual_repetida": (usuario_actual_repetida, usuario_actual),
+    "otro_usuario": (otro_usuario, None),
+    "multiusuario": (multiusuario, None),
+    "gestor_usuarios": (gestor_usuarios, None),
+}
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano"""
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p * len(ordenados)) - 1)]
+
+
+def medir(nombre, latencias, repeticiones, pool=2):
+    """Ejecuta un escenario `repeticiones` veces, cada una en un equipo simulado nuevo"""
+    funcion, preparacion = ESCENARIOS[nombre]
+    tiempos = []
+    contadores = {}
+    for _ in range(repeticiones):
+        entorno = EntornoSimulado(tempfile.mkdtemp(prefix="cla-bench-"), latencias, pool=pool)
+        try:
+            if preparacion:
+                preparacion(entorno)
+            antes = entorno.contadores()
+            inicio = time.perf_counter()
+            funcion(entorno)
+            tiempos.append(time.perf_counter() - inicio)
+            contadores = {k: v - antes[k] for k, v in entorno.contadores().items()}
+        finally:
+            entorno.limpiar()
+    return {
+        "p50": round(percentil(tiempos, 0.50), 4),
+        "p95": round(percentil(tiempos, 0.95), 4),
+        "min": round(min(tiempos), 4),
+        "contadores": contadores,
+    }
+
+
+def comparar(resultados, base, tolerancia):
+    """Lista de regresiones (texto) respecto a la línea base"""
+    regresiones = []
+    mismas_latencias = base.get("latencias") == resultados["latencias"]
+    for nombre, actual in resultados["escenarios"].items():
+        anterior = base.get("escenarios", {}).get(nombre)
+        if not anterior:
+            continue
+        if mismas_latencias and actual["p50"] > anterior["p50"] * (1 + tolerancia) + 0.005:
+            regresiones.append(f"{nombre}: p50 {actual['p50']:.3f} s (base {anterior['p50']:.3f} s)")
+        for contador, valor in actual["contadores"].items():
+            if contador in CONTADORES_VARIABLES:
+                continue
+            if valor > anterior["contadores"].get(contador, valor):
+                regresiones.append(f"{nombre}: {contador} {valor} (base {anterior['contadores'][contador]})")
+    return regresiones
+
+
+def ejecutar(latencias, repeticiones, escenarios=None, pool=2):
+    return {
+        "latencias": latencias.como_dict(),
+        "pool": pool,
+        "repeticiones": repeticiones,
+        "escenarios": {n: medir(n, latencias, repeticiones, pool) for n in (escenarios or ESCENARIOS)},
+    }
+
+
+def imprimir(resultados):
+    print(f"{'Escenario':<26} {'p50':>8} {'p95':>8}   Llamadas")
+    for nombre, r in resultados["escenarios"].items():
+        llamadas = ", ".join(f"{k}={v}" for k, v in r["contadores"].items() if v)
+        print(f"{nombre:<26} {r['p50']:>7.3f}s {r['p95']:>7.3f}s   {llamadas}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de configuraciones completas")
+    parser.add_argument("-n", "--repeticiones", type=int, default=5)
+    parser.add_argument("-e", "--escenario", action="append", choices=list(ESCENARIOS))
+    parser.add_argument("--pool", type=int, default=2, help="sesiones PowerShell (0 = un proceso por comando)")
+    parser.add_argument("--latencia-powershell", type=float, default=0.5, help="arranque de powershell.exe (s)")
+    parser.add_argument("--latencia-comando", type=float, default=0.02, help="cada comando PowerShell (s)")
+    parser.add_argument("--latencia-reg-load", type=float, default=0.2, help="reg load (s)")
+    parser.add_argument("--latencia-usb", type=float, default=0.01, help="lectura de un archivo de la USB (s)")
+    parser.add_argument("--linea-base", type=Path, default=LINEA_BASE)
+    parser.add_argument("--guardar-linea-base", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="margen sobre el p50 base (0.2 = 20%%)")
+    parser.add_argument("--json", type=Path, help="guardar los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    latencias = Latencias(powershell_inicio=args.latencia_powershell, powershell_comando=args.latencia_comando,
+                          reg_load=args.latencia_reg_load, usb_archivo=args.latencia_usb)
+    resultados = ejecutar(latencias, args.repeticiones, args.escenario, args.pool)
+    imprimir(resultados)
+
+    if args.json:
+        args.json.write_text(json.dumps(resultados, indent=2), encoding="utf-8")
+    if args.guardar_linea_base:
+        args.linea_base.write_text(json.dumps(resultados, indent=2) + "\n", encoding="utf-8")
+        print(f"✓ Línea base guardada en {args.linea_base}")
+        return 0
+
+    if not args.linea_base.exists():
+        return 0
+    base = json.loads(args.linea_base.read_text(encoding="utf-8"))
+    if base.get("pool") != args.pool:
+        print(f"ℹ️  La línea base se midió con --pool {base.get('pool')}: no se compara")
+        return 0
+    if base.get("latencias") != resultados["latencias"]:
+        print("ℹ️  Latencias distintas a las de la línea base: solo se comparan las llamadas")
+    regresiones = comparar(resultados, base, args.tolerancia)
+    for regresion in regresiones:
+        print(f"✗ Regresión: {regresion}")
+    if not regresiones:
+        print("✓ Sin regresiones respecto a la línea base")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
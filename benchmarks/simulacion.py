@@ -0,0 +1,178 @@
+"""
+Entorno simulado para los benchmarks
+Sustitutos de PowerShell, registro, reg.exe y la USB con latencias
+configurables, para medir una configuración completa en cualquier Linux.
+"""
+
+import getpass
+import json
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core.hives import BackendRegFalso, GestorHives
+from core.inventario import InventarioUsuarios
+from core.powershell import EjecutorPowerShell
+from core.registro import BackendMemoria
+from core.staging import SincronizadorAssets
+from core.transcodificacion import PreprocesadorFondos
+
+
+class Latencias:
+    """Segundos inyectados en cada operación simulada"""
+
+    def __init__(self, powershell_inicio=0.5, powershell_comando=0.02, reg_load=0.2,
+                 registro=0.0005, usb_archivo=0.01, usb_mb=0.05):
+        self.powershell_inicio = powershell_inicio
+        self.powershell_comando = powershell_comando
+        self.reg_load = reg_load
+        self.registro = registro
+        self.usb_archivo = usb_archivo
+        self.usb_mb = usb_mb
+
+    def como_dict(self):
+        return dict(vars(self))
+
+
+class EjecutorSimulado(EjecutorPowerShell):
+    """
+    PowerShell simulado. Con `tamano` sesiones se comporta como
+    PoolPowerShell (el arranque se paga una vez por sesión); con
+    tamano=0 como EjecutorProcesoUnico (un arranque por comando).
+    """
+
+    def __init__(self, latencias, usuarios=(), tamano=2):
+        self.latencias = latencias
+        self.usuarios = list(usuarios)
+        self.tamano = tamano
+        self.inicios = 0
+        self.comandos = 0
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        self._lock = threading.Lock()
+
+    def _responder(self, script):
+        if "Get-LocalUser | ForEach-Object" in script:
+            return json.dumps(self.usuarios)
+        return ""
+
+    def _iniciar(self):
+        with self._lock:
+            self.inicios += 1
+        time.sleep(self.latencias.powershell_inicio)
+
+    def ejecutar(self, script, timeout=None, idempotente=False):
+        with self._lock:
+            self.comandos += 1
+            crear = self.tamano == 0 or (self._libres.empty() and self._creadas < self.tamano)
+            if crear and self.tamano:
+                self._creadas += 1
+        if crear:
+            self._iniciar()
+            sesion = object()
+        else:
+            sesion = self._libres.get()
+        try:
+            time.sleep(self.latencias.powershell_comando)
+            return subprocess.CompletedProcess(script, 0, self._responder(script), "")
+        finally:
+            if self.tamano:
+                self._libres.put(sesion)
+
+
+class SincronizadorUSB(SincronizadorAssets):
+    """Staging desde una USB lenta: cada archivo leído cuesta latencia fija + por MB"""
+
+    def __init__(self, destino, latencias):
+        super().__init__(destino, solo_externos=False)
+        self.latencias = latencias
+        self.lecturas = 0
+
+    def _sincronizar_archivo(self, origen, local, entrada):
+        entrada, copiado = super()._sincronizar_archivo(origen, local, entrada)
+        if copiado:
+            self.lecturas += 1
+            time.sleep(self.latencias.usb_archivo + self.latencias.usb_mb * copiado / 2**20)
+        return entrada, copiado
+
+
+class EntornoSimulado:
+    """
+    Un equipo simulado en `carpeta`: perfiles con NTUSER.DAT, assets del
+    centro en una "USB" y backends con latencia. Cada propiedad cuenta sus
+    llamadas para el informe.
+    """
+
+    SID_BASE = "S-1-5-21-1000-2000-3000"
+
+    def __init__(self, carpeta, latencias, usuarios=("Alumno", "Curso"), numero_pc=3, pool=2):
+        self.carpeta = Path(carpeta)
+        self.latencias = latencias
+        self.numero_pc = numero_pc
+        self.usb = self.carpeta / "usb" / "CID-Centro_Computo"
+        self._crear_assets()
+
+        self.usuario_actual = getpass.getuser()
+        datos = []
+        for i, nombre in enumerate((self.usuario_actual, *usuarios)):
+            perfil = self.carpeta / "perfiles" / nombre
+            perfil.mkdir(parents=True, exist_ok=True)
+            (perfil / "NTUSER.DAT").write_bytes(b"regf")
+            datos.append({"nombre": nombre, "sid": f"{self.SID_BASE}-{1001 + i}",
+                          "habilitado": True, "perfil": str(perfil)})
+        self.usuarios = list(usuarios)
+
+        self.ejecutor = EjecutorSimulado(latencias, datos, tamano=pool)
+        self.inventario = InventarioUsuarios(self.ejecutor)
+        self.registro = BackendMemoria(latencia=latencias.registro)
+        self.reg = BackendRegFalso(latencia=latencias.reg_load)
+        self.hives = GestorHives(self.reg)
+        self.staging = SincronizadorUSB(self.carpeta / "staging", latencias)
+        self.preprocesador = PreprocesadorFondos(cache=self.carpeta / "fondos")
+
+    def _crear_assets(self):
+        for sub in ("wallpapers", "lockscreen", "tareasprogramadas"):
+            (self.usb / sub).mkdir(parents=True, exist_ok=True)
+        imagen = b"\xff\xd8" + bytes(512 * 1024)
+        for n in range(1, 21):
+            (self.usb / "wallpapers" / f"PC-{n}.jpg").write_bytes(imagen)
+        (self.usb / "lockscreen" / "PC-Bloqueo.jpg").write_bytes(imagen)
+
+    def configurador(self, numero_pc=None, **kwargs):
+        """ConfiguradorPC preparado con los backends de este equipo (kwargs los sustituyen)"""
+        from core.configurador import ConfiguradorPC
+
+        backends = dict(ejecutor=self.ejecutor, inventario=self.inventario, backend_registro=self.registro,
+                        hives=self.hives, preprocesador=self.preprocesador, staging=self.staging)
+        return self.preparar(ConfiguradorPC(numero_pc or self.numero_pc, **{**backends, **kwargs}))
+
+    def preparar(self, configurador):
+        """Apunta el configurador a la USB simulada y sustituye el refresco del escritorio"""
+        configurador.es_admin = True
+        configurador.carpeta_assets = self.usb
+        configurador.ruta_wallpapers = self.usb / "wallpapers"
+        configurador.ruta_lockscreen = self.usb / "lockscreen"
+        configurador.ruta_temas = self.carpeta / "temas"
+        configurador.refrescar_fondo = lambda ruta: True
+        return configurador
+
+    def contadores(self):
+        return {
+            "powershell_inicios": self.ejecutor.inicios,
+            "powershell_comandos": self.ejecutor.comandos,
+            "registro_lecturas": self.registro.lecturas,
+            "registro_aperturas": self.registro.aperturas,
+            "registro_escrituras": self.registro.escrituras,
+            "hive_cargas": self.reg.cargas,
+            "hive_descargas": self.reg.descargas,
+            "usb_lecturas": self.staging.lecturas,
+        }
+
+    def limpiar(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
@@ -0,0 +1,43 @@
+"""Fixtures compartidas: equipos simulados (benchmarks/simulacion.py) para las pruebas"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src y benchmarks al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from simulacion import EntornoSimulado, Latencias
+
+from core import catalogo_tareas, perfiles, staging, transcodificacion
+
+SIN_LATENCIA = Latencias(0, 0, 0, 0, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def datos_aislados(tmp_path_factory, monkeypatch):
+    """Carpeta personal y de datos propias de cada prueba: nada se escribe en el equipo real"""
+    raiz = tmp_path_factory.mktemp("datos")
+    for variable, sub in (("HOME", "home"), ("USERPROFILE", "home"),
+                          ("LOCALAPPDATA", "localappdata"), ("PROGRAMDATA", "programdata")):
+        monkeypatch.setenv(variable, str(raiz / sub))
+    # Los singletons guardan la carpeta con la que se crearon
+    monkeypatch.setattr(perfiles, "_cache", None)
+    monkeypatch.setattr(catalogo_tareas, "_catalogo", None)
+    monkeypatch.setattr(staging, "_sincronizador_compartido", None)
+    monkeypatch.setattr(transcodificacion, "_preprocesador_compartido", None)
+    return raiz
+
+
+@pytest.fixture
+def sin_latencia():
+    return SIN_LATENCIA
+
+
+@pytest.fixture
+def crear_entorno(tmp_path):
+    """crear_entorno("equipo-1", latencias, usuarios=...): un EntornoSimulado en su carpeta de tmp_path"""
+    def crear(nombre="equipo", latencias=SIN_LATENCIA, **kwargs):
+        return EntornoSimulado(tmp_path / nombre, latencias, **kwargs)
+    return crear
@@ -0,0 +1,473 @@
+"""
+Configurador de PCs - Línea de comandos
+Mismas tareas que la interfaz, sin importar tkinter, para scripts de
+despliegue (varias instancias en paralelo, sin ventana):
+
+    python start.py --cli apply --centro CID-Centro_Computo --pc 12 --tema-oscuro --fondo-pantalla
+    python start.py --cli apply --centro CID-Centro_Computo --pc 12 --todas --todos-usuarios --json
+    python start.py --cli apply --centro UD2-Laboratorio_Software --pc 4 --perfil
+    python start.py --cli usuarios --admin-nombre "Admin CC" --usuario-estandar Alumno
+    python start.py --cli centros
+    python start.py --cli agente --host 0.0.0.0 --token SECRETO --permitir-assets \\\\servidor\\assets
+    python start.py --cli agente --residente    (o --instalar para abrirlo al iniciar sesión)
+    python start.py --cli flota --equipos laboratorio.txt --centro CID-Centro_Computo --todas --limite 10
+    python start.py --cli arranque --centro CID-Centro_Computo --salida PC-12.csv
+    python -m cli ...                     (desde src/)
+
+Con --json cada línea de la salida es un objeto JSON:
+    {"t": 0.004, "evento": "log", "mensaje": "..."}
+    {"t": 3.218, "evento": "resultado", "exitosos": 5, "total": 5, "codigo": 0}
+
+Códigos de salida: 0 todo correcto, 1 alguna tarea falló, 2 argumentos
+inválidos, 3 centro o assets no encontrados, 4 faltan permisos de
+administrador, 5 error inesperado, 130 interrumpido.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+SALIDA_OK = 0
+SALIDA_PARCIAL = 1
+SALIDA_USO = 2
+SALIDA_ASSETS = 3
+SALIDA_PERMISOS = 4
+SALIDA_ERROR = 5
+SALIDA_INTERRUMPIDO = 130
+
+# Clave de `opciones` -> ayuda (la bandera es la clave con guiones: --tema-oscuro)
+OPCIONES = {
+    'activar_windows': "activar Windows y Office con los scripts del centro",
+    'tema_oscuro': "tema oscuro del sistema y las aplicaciones",
+    'fondo_pantalla': "fondo de pantalla PC-<n> del centro",
+    'fondo_bloqueo': "fondo de la pantalla de bloqueo",
+    'bloquear_personalizacion': "impedir que el usuario cambie la personalización",
+    'optimizar_arranque': "deshabilitar programas innecesarios del inicio",
+    'instalar_tareas': "instalar las tareas programadas del centro",
+    'reiniciar_explorer': "reiniciar el explorador al terminar (si hubo cambios)",
+    'mostrar_keys': "mostrar las claves de producto de Windows y Office",
+}
+
+# Las que marca "Todas" en la interfaz
+OPCIONES_TODAS = [k for k in OPCIONES if k != 'instalar_tareas']
+
+
+class Salida:
+    """Progreso en texto o en líneas JSON; se puede llamar desde varios hilos"""
+
+    def __init__(self, como_json=False, silencioso=False):
+        self.como_json = como_json
+        self.silencioso = silencioso
+        self.inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def evento(self, tipo, **datos):
+        if not self.como_json:
+            return
+        linea = json.dumps({"t": round(time.perf_counter() - self.inicio, 3), "evento": tipo, **datos},
+                           ensure_ascii=False)
+        with self._lock:
+            print(linea, flush=True)
+
+    def log(self, mensaje):
+        if self.como_json:
+            self.evento("log", mensaje=mensaje)
+        elif not self.silencioso:
+            with self._lock:
+                print(mensaje, flush=True)
+
+
+def _asegurar_consola():
+    """El .exe no tiene consola (console=False): usar la del proceso que lo lanzó"""
+    if sys.stdout is not None:
+        try:
+            sys.stdout.reconfigure(errors="replace")
+        except (AttributeError, ValueError):
+            pass
+        return
+    try:
+        import ctypes
+        ATTACH_PARENT_PROCESS = -1
+        if ctypes.windll.kernel32.AttachConsole(ATTACH_PARENT_PROCESS):
+            sys.stdout = open("CONOUT$", "w", encoding="utf-8", errors="replace")
+            sys.stderr = sys.stdout
+            return
+    except Exception:
+        pass
+    sys.stdout = sys.stderr = open(os.devnull, "w")
+
+
+def resolver_centro(valor):
+    """Carpeta del centro a partir de su carpeta o su nombre visible (None si no existe)"""
+    from core.configurador import BASE_PATH
+    from core.perfiles import centros
+
+    disponibles = centros(BASE_PATH.parent / "assets")
+    if valor in disponibles:
+        return disponibles[valor]
+    if valor in disponibles.values() or (BASE_PATH.parent / "assets" / valor).is_dir():
+        return valor
+    return None
+
+
+def _opciones(args, perfil=None):
+    seleccion = OPCIONES_TODAS if args.todas else []
+    opciones = {k: (k in seleccion or getattr(args, k)) for k in OPCIONES}
+    if args.perfil and perfil:
+        # Además de las indicadas, las que marca el perfil del centro
+        opciones = {k: opciones[k] or k in perfil.tareas for k in OPCIONES}
+    if args.sin_zona_horaria:
+        opciones['zona_horaria'] = False
+    return opciones
+
+
+def _validar(args, salida, carpeta_assets=None):
+    """(código de salida si no se puede aplicar o None, carpeta del centro, opciones)"""
+    from core.assets import AssetIndex
+    from core.configurador import BASE_PATH
+    from core.perfiles import ErrorPerfil, plan_centro
+
+    carpeta_centro = resolver_centro(args.centro)
+    if carpeta_centro is None:
+        salida.log(f"❌ Centro desconocido: {args.centro}")
+        return SALIDA_ASSETS, None, None
+    carpeta_assets = carpeta_assets or BASE_PATH.parent / "assets" / carpeta_centro
+    try:
+        perfil = plan_centro(carpeta_assets)
+    except (ErrorPerfil, OSError) as e:
+        salida.log(f"❌ Perfil del centro no válido: {e}")
+        return SALIDA_ASSETS, carpeta_centro, None
+
+    opciones = _opciones(args, perfil)
+    if not any(opciones.get(k) for k in OPCIONES):
+        salida.log("❌ Seleccione al menos una tarea (o --todas / --perfil)")
+        return SALIDA_USO, carpeta_centro, None
+    if (opciones['fondo_pantalla'] or opciones['fondo_bloqueo']) and not AssetIndex(carpeta_assets).completo():
+        salida.log(f"❌ No se encontraron las carpetas de assets de '{carpeta_centro}'")
+        return SALIDA_ASSETS, carpeta_centro, None
+    return None, carpeta_centro, opciones
+
+
+def comando_apply(args, salida):
+    codigo, carpeta_centro, opciones = _validar(args, salida)
+    if codigo is not None:
+        return codigo, None
+
+    salida.evento("inicio", centro=carpeta_centro, pc=args.pc, opciones=opciones)
+    usuarios = args.usuario or []
+    if args.todos_usuarios or len(usuarios) > 1:
+        from core.multiusuario import ConfiguradorMultiusuario
+        lote = ConfiguradorMultiusuario(args.pc, usuarios=usuarios or None, carpeta_centro=carpeta_centro,
+                                        callback=salida.log)
+        informe = lote.aplicar(opciones)
+        exitosos, total = informe.totales()
+        extra = {"usuarios": [u._asdict() for u in informe.usuarios]}
+    else:
+        usuario = usuarios[0] if usuarios else None
+        resultado = None if args.local else _aplicar_en_residente(args.pc, opciones, carpeta_centro, usuario, salida)
+        if resultado is None:
+            from core.configurador import ConfiguradorPC
+            configurador = ConfiguradorPC(args.pc, carpeta_centro=carpeta_centro,
+                                          usuario_objetivo=usuario, callback=salida.log)
+            resultado = configurador.aplicar_configuracion_completa(opciones)
+        exitosos, total = resultado
+        extra = {}
+    codigo = SALIDA_OK if exitosos == total else SALIDA_PARCIAL
+    return codigo, {"exitosos": exitosos, "total": total, **extra}
+
+
+def _aplicar_en_residente(numero_pc, opciones, carpeta_centro, usuario, salida):
+    """(exitosos, total) aplicados por el agente residente, o None si no hay uno abierto"""
+    from core.agente import ErrorAgente, agente_residente, aplicar_en_residente
+
+    residente = agente_residente()
+    if residente is None:
+        return None
+    salida.log("📡 Usando el agente residente")
+    salida.evento("agente_residente", puerto=residente[0])
+    try:
+        return aplicar_en_residente(residente, numero_pc, opciones, carpeta_centro, usuario, salida.log)
+    except ErrorAgente as e:
+        salida.log(f"⚠️  Agente residente no disponible ({e}): se configura desde este proceso")
+        return None
+
+
+def comando_usuarios(args, salida):
+    import getpass
+    from core.usuarios import GestorUsuarios
+
+    password = args.admin_pass or os.environ.get("CLA_ADMIN_PASS")
+    if args.centro:
+        # Cuentas declaradas en el perfil del centro, salvo las indicadas aquí
+        from core.configurador import BASE_PATH
+        from core.perfiles import ErrorPerfil, plan_centro
+        carpeta_centro = resolver_centro(args.centro)
+        if carpeta_centro is None:
+            salida.log(f"❌ Centro desconocido: {args.centro}")
+            return SALIDA_ASSETS, None
+        try:
+            perfil = plan_centro(BASE_PATH.parent / "assets" / carpeta_centro)
+        except (ErrorPerfil, OSError) as e:
+            salida.log(f"❌ Perfil del centro no válido: {e}")
+            return SALIDA_ASSETS, None
+        args.admin_nombre = args.admin_nombre or perfil.administrador
+        args.usuario_estandar = args.usuario_estandar or next(iter(perfil.estandar), None)
+    if not (args.admin_nombre or password or args.usuario_estandar):
+        salida.log("❌ Indique --admin-nombre, --admin-pass o --usuario-estandar")
+        return SALIDA_USO, None
+
+    gestor = GestorUsuarios(callback=salida.log)
+    if not gestor.es_admin:
+        salida.log("❌ Se requieren permisos de administrador")
+        return SALIDA_PERMISOS, None
+
+    usuario_actual = getpass.getuser()
+    pasos = []
+    if args.admin_nombre:
+        pasos.append(lambda: gestor.cambiar_nombre_visible(usuario_actual, args.admin_nombre))
+    if password:
+        pasos.append(lambda: gestor.cambiar_password(usuario_actual, password))
+    if args.usuario_estandar:
+        pasos.append(lambda: gestor.crear_usuario(args.usuario_estandar, "", es_admin=False))
+        pasos.append(gestor.configurar_uac)
+
+    exitosos = 0
+    for paso in pasos:
+        ok, msg = paso()
+        salida.log(msg)
+        if not ok and "ya existe" not in msg.lower():
+            break
+        exitosos += 1
+    codigo = SALIDA_OK if exitosos == len(pasos) else SALIDA_PARCIAL
+    return codigo, {"exitosos": exitosos, "total": len(pasos)}
+
+
+def comando_centros(args, salida):
+    from core.assets import AssetIndex
+    from core.catalogo_tareas import describir, obtener_catalogo_tareas
+    from core.configurador import BASE_PATH
+    from core.perfiles import ErrorPerfil, archivo_perfil, centros as centros_disponibles, plan_centro
+
+    catalogo = obtener_catalogo_tareas()
+    centros = []
+    for nombre, carpeta in centros_disponibles(BASE_PATH.parent / "assets").items():
+        ruta = BASE_PATH.parent / "assets" / carpeta
+        assets = AssetIndex(ruta)
+        resumen = assets.resumen() if assets.completo() else None
+        perfil = None
+        if archivo_perfil(ruta):
+            try:
+                perfil = {"tareas": list(plan_centro(ruta).tareas)}
+            except (ErrorPerfil, OSError) as e:
+                perfil = {"error": str(e)}
+        tareas = [{"nombre": t.nombre, "descripcion": describir(t), "errores": list(t.errores),
+                   "advertencias": list(t.advertencias)}
+                  for t in catalogo.tareas(sorted((ruta / "tareasprogramadas").glob("*.xml")))]
+        centros.append({"nombre": nombre, "carpeta": carpeta, "assets": resumen, "perfil": perfil,
+                        "tareas": tareas})
+        if not salida.como_json:
+            estado = (f"{resumen['fondos']} fondos, {resumen['tareas']} tareas" if resumen
+                      else "sin assets")
+            if perfil:
+                estado += f", perfil no válido: {perfil['error']}" if "error" in perfil else ", con perfil"
+            invalidas = sum(1 for t in tareas if t["errores"])
+            if invalidas:
+                estado += f", {invalidas} tarea(s) no válida(s)"
+            salida.log(f"{carpeta:<28} {nombre:<30} {estado}")
+    return SALIDA_OK, {"centros": centros}
+
+
+def comando_agente(args, salida):
+    import asyncio
+    from core.agente import (PUERTO_DEFECTO, PUERTO_RESIDENTE, AgenteConfiguracion, instalar_residente,
+                             raices_assets_por_defecto)
+
+    if args.instalar:
+        ok, msg = instalar_residente()
+        salida.log(msg)
+        return (SALIDA_OK if ok else SALIDA_ERROR), None
+    raices = None
+    if args.permitir_assets:
+        raices = raices_assets_por_defecto() + args.permitir_assets
+    try:
+        if args.residente:
+            agente = AgenteConfiguracion.residente(args.puerto or PUERTO_RESIDENTE, callback=salida.log)
+        else:
+            agente = AgenteConfiguracion(args.host, args.puerto or PUERTO_DEFECTO, token=args.token,
+                                         callback=salida.log, raices_assets=raices)
+    except ValueError as e:
+        salida.log(f"❌ {e}")
+        return SALIDA_USO, None
+    try:
+        asyncio.run(agente.servir())
+    except OSError as e:
+        salida.log(f"❌ No se pudo escuchar en {agente.host}:{agente.puerto}: {e}")
+        return SALIDA_ERROR, None
+    return SALIDA_OK, {"trabajos": agente.trabajos}
+
+
+def comando_flota(args, salida):
+    from core.flota import CoordinadorFlota, leer_lista_equipos
+
+    try:
+        equipos = leer_lista_equipos(args.equipos, args.primer_pc)
+    except (OSError, ValueError, KeyError) as e:
+        salida.log(f"❌ Lista de equipos no válida: {e}")
+        return SALIDA_USO, None
+    # Los agentes leen los assets de --assets; se comprueban desde aquí si son accesibles
+    codigo, carpeta_centro, opciones = _validar(args, salida, args.assets)
+    if codigo is not None:
+        return codigo, None
+
+    salida.evento("inicio", centro=carpeta_centro, equipos=len(equipos), opciones=opciones)
+    coordinador = CoordinadorFlota(equipos, carpeta_centro, opciones, assets=args.assets, token=args.token,
+                                   limite=args.limite, callback=salida.log,
+                                   al_progreso=lambda p: salida.evento("progreso", **p))
+    informe = coordinador.aplicar()
+    correctos, total = informe.totales()
+    codigo = SALIDA_OK if correctos == total else SALIDA_PARCIAL
+    return codigo, {"equipos_correctos": correctos, "equipos": total,
+                    "resultados": [{**r._asdict(), "equipo": r.equipo._asdict()} for r in informe.resultados]}
+
+
+def comando_arranque(args, salida):
+    from core.configurador import BASE_PATH, ConfiguradorPC
+    from core.impacto_arranque import leer_tiempos
+    from core.perfiles import ErrorPerfil, plan_centro
+
+    carpeta_centro = resolver_centro(args.centro) if args.centro else 'CID-Centro_Computo'
+    if carpeta_centro is None:
+        salida.log(f"❌ Centro desconocido: {args.centro}")
+        return SALIDA_ASSETS, None
+    try:
+        plan_centro(BASE_PATH.parent / "assets" / carpeta_centro)
+    except (ErrorPerfil, OSError) as e:
+        salida.log(f"❌ Perfil del centro no válido: {e}")
+        return SALIDA_ASSETS, None
+    try:
+        tiempos = leer_tiempos(args.tiempos) if args.tiempos else None
+    except (OSError, ValueError) as e:
+        salida.log(f"❌ Archivo de tiempos no válido: {e}")
+        return SALIDA_USO, None
+
+    configurador = ConfiguradorPC(1, carpeta_centro=carpeta_centro, callback=salida.log)
+    informe = configurador.analizar_arranque(tiempos)
+    if args.salida:
+        try:
+            if args.salida.lower().endswith(".csv"):
+                informe.guardar_csv(args.salida)
+            else:
+                informe.guardar_json(args.salida)
+        except OSError as e:
+            salida.log(f"❌ No se pudo guardar el informe: {e}")
+            return SALIDA_ERROR, None
+        salida.log(f"📄 Informe guardado en {args.salida}")
+
+    if not salida.como_json:
+        salida.log(f"Programas de arranque por costo estimado ({len(informe.entradas)}):")
+        for linea in informe.lineas(args.limite):
+            salida.log(linea)
+        salida.log(f"\nCambios que aplicaría optimizar-arranque ({len(informe.cambios)}, sin aplicar):")
+        for linea in informe.diff() or ["   (ninguno)"]:
+            salida.log(linea)
+        return SALIDA_OK, None
+    return SALIDA_OK, informe.a_dict()
+
+
+def _agregar_opciones(parser):
+    parser.add_argument("--centro", required=True, help="carpeta o nombre del centro (ver 'centros')")
+    for clave, ayuda in OPCIONES.items():
+        parser.add_argument("--" + clave.replace("_", "-"), dest=clave, action="store_true", help=ayuda)
+    parser.add_argument("--todas", action="store_true", help="todas las tareas salvo instalar-tareas")
+    parser.add_argument("--perfil", action="store_true", help="las tareas que marca el perfil del centro")
+    parser.add_argument("--sin-zona-horaria", action="store_true", help="no cambiar la zona horaria")
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="cla-winconfig --cli",
+                                     description="Configurador de PCs para centros de cómputo")
+    parser.add_argument("--json", action="store_true", help="progreso y resultado como líneas JSON")
+    parser.add_argument("-q", "--silencioso", action="store_true", help="solo el código de salida")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    apply = sub.add_parser("apply", help="aplicar la configuración del equipo")
+    apply.add_argument("--pc", type=int, required=True, help="número de PC")
+    _agregar_opciones(apply)
+    apply.add_argument("--usuario", action="append", help="usuario objetivo (se puede repetir)")
+    apply.add_argument("--todos-usuarios", action="store_true", help="todos los usuarios reales del equipo")
+    apply.add_argument("--local", action="store_true", help="no usar el agente residente aunque esté abierto")
+    apply.set_defaults(funcion=comando_apply)
+
+    usuarios = sub.add_parser("usuarios", help="cuentas locales del centro")
+    usuarios.add_argument("--admin-nombre", help="nombre visible del administrador actual")
+    usuarios.add_argument("--admin-pass", help="nueva contraseña del administrador (o CLA_ADMIN_PASS)")
+    usuarios.add_argument("--usuario-estandar", help="crear este usuario estándar y configurar UAC")
+    usuarios.add_argument("--centro", help="tomar las cuentas del perfil de este centro")
+    usuarios.set_defaults(funcion=comando_usuarios)
+
+    centros = sub.add_parser("centros", help="centros disponibles y sus assets")
+    centros.set_defaults(funcion=comando_centros)
+
+    agente = sub.add_parser("agente", help="recibir trabajos del coordinador de la flota")
+    agente.add_argument("--host", default="127.0.0.1", help="dirección de escucha (0.0.0.0 para la red)")
+    agente.add_argument("--puerto", type=int, help="puerto de escucha (8750; 8751 el residente)")
+    agente.add_argument("--token", help="secreto compartido con el coordinador (o CLA_FLOTA_TOKEN)")
+    agente.add_argument("--permitir-assets", action="append", default=[], metavar="RUTA",
+                        help="carpeta (o recurso de red) de la que los trabajos pueden leer assets; "
+                             "repetible (o CLA_ASSETS_PERMITIDOS)")
+    agente.add_argument("--residente", action="store_true",
+                        help="agente local con cachés precargadas para la interfaz y 'apply'")
+    agente.add_argument("--instalar", action="store_true",
+                        help="abrir el agente residente al iniciar sesión (tarea programada elevada)")
+    agente.set_defaults(funcion=comando_agente)
+
+    arranque = sub.add_parser("arranque", help="informe del costo de los programas de arranque (sin cambios)")
+    arranque.add_argument("--centro", help="centro cuyas reglas de arranque se evalúan (predeterminadas si no)")
+    arranque.add_argument("--salida", help="guardar el informe completo (.json o .csv)")
+    arranque.add_argument("--tiempos", help="JSON {ejecutable: ms} con tiempos medidos en otros arranques")
+    arranque.add_argument("--limite", type=int, default=20, help="entradas a mostrar (20)")
+    arranque.set_defaults(funcion=comando_arranque)
+
+    flota = sub.add_parser("flota", help="configurar todos los equipos de una lista a la vez")
+    flota.add_argument("--equipos", required=True, help="lista de equipos (texto o JSON)")
+    flota.add_argument("--primer-pc", type=int, default=1, help="primer número para los equipos sin número")
+    _agregar_opciones(flota)
+    flota.add_argument("--assets", help="carpeta de assets del centro accesible desde los equipos (UNC)")
+    flota.add_argument("--limite", type=int, default=8, help="equipos configurándose a la vez")
+    flota.add_argument("--token", help="secreto compartido con los agentes (o CLA_FLOTA_TOKEN)")
+    flota.set_defaults(funcion=comando_flota)
+    return parser
+
+
+def main(argv=None):
+    _asegurar_consola()
+    parser = crear_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return SALIDA_USO if e.code else SALIDA_OK
+    if args.comando == "apply" and args.pc < 1:
+        parser.print_usage()
+        return SALIDA_USO
+
+    salida = Salida(args.json, args.silencioso)
+    try:
+        codigo, resultado = args.funcion(args, salida)
+    except KeyboardInterrupt:
+        codigo, resultado = SALIDA_INTERRUMPIDO, None
+    except BrokenPipeError:
+        # Quien leía la salida (p. ej. `| head`) terminó: seguir sin consola
+        sys.stdout = open(os.devnull, "w")
+        return SALIDA_ERROR
+    except Exception as e:
+        salida.log(f"❌ Error inesperado: {e}")
+        codigo, resultado = SALIDA_ERROR, None
+    salida.evento("resultado", codigo=codigo, **(resultado or {}))
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,20 @@
 """Módulo de lógica de configuración para el Configurador de PCs"""
-from .configurador import ConfiguradorPC
-from .usuarios import GestorUsuarios
 
-__all__ = ['ConfiguradorPC', 'GestorUsuarios']
+__all__ = ['ConfiguradorPC', 'ConfiguradorMultiusuario', 'GestorUsuarios']
+
+# Las clases se importan al pedirlas: `import core.assets` (la CLI, la
+# interfaz al arrancar) no carga el configurador completo
+_MODULOS = {
+    'ConfiguradorPC': 'configurador',
+    'ConfiguradorMultiusuario': 'multiusuario',
+    'GestorUsuarios': 'usuarios',
+}
+
+
+def __getattr__(nombre):
+    if nombre in _MODULOS:
+        from importlib import import_module
+        valor = getattr(import_module(f".{_MODULOS[nombre]}", __name__), nombre)
+        globals()[nombre] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
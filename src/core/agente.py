@@ -0,0 +1,387 @@
+"""
+Agente de configuración
+Recibe trabajos de configuración por un socket TCP y los aplica en este
+equipo, devolviendo el log en vivo. Lo usa el coordinador de la flota
+(flota.py) para configurar un laboratorio entero desde un solo equipo.
+
+Protocolo: un objeto JSON UTF-8 por línea.
+    -> {"tipo": "configurar", "token": "...", "pc": 12, "centro": "CID-Centro_Computo",
+        "opciones": {...}, "assets": "\\\\servidor\\assets\\CID-Centro_Computo"}
+    <- {"tipo": "aceptado", "pc": 12}
+    <- {"tipo": "log", "mensaje": "..."}                  (cero o más)
+    <- {"tipo": "resultado", "exitosos": 5, "total": 5}
+    <- {"tipo": "error", "mensaje": "..."}                (en lugar del resultado)
+
+    -> {"tipo": "estado", "token": "..."}
+    <- {"tipo": "estado", "equipo": "LAB-12", "ocupado": false, "trabajos": 3}
+
+"assets" es opcional (por defecto, los assets del centro junto al programa).
+El agente solo acepta rutas de assets dentro de sus raíces permitidas (la
+carpeta assets del programa y las de CLA_ASSETS_PERMITIDOS o
+--permitir-assets): no confía en la ruta que envía el coordinador.
+Un equipo aplica un trabajo a la vez; los demás esperan su turno.
+
+Modo residente (--residente): un agente local que queda abierto con el
+inventario de usuarios, el índice de assets y el pool de PowerShell ya
+cargados. La interfaz y `cli apply` le envían sus trabajos en lugar de
+configurar en su propio proceso, así que ni repiten ese arranque ni piden
+elevación (el agente ya es administrador, p. ej. como tarea al iniciar
+sesión). Escucha solo en 127.0.0.1 con un token aleatorio que publica en
+el perfil del usuario que lo inició (archivo_residente()).
+"""
+
+import asyncio
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+from .archivos import directorio_datos
+
+PUERTO_DEFECTO = 8750
+PUERTO_RESIDENTE = 8751
+TAREA_RESIDENTE = "CLA-WinConfig Agente"
+# Raíces de assets permitidas además de la del programa (separadas por os.pathsep)
+VARIABLE_ASSETS = "CLA_ASSETS_PERMITIDOS"
+
+# Tamaño máximo de una línea del protocolo
+LIMITE_LINEA = 1024 * 1024
+
+_FIN = object()
+
+
+class ErrorAgente(Exception):
+    """El agente rechazó el trabajo o la conexión se cortó"""
+
+
+async def enviar(writer, mensaje):
+    writer.write(json.dumps(mensaje, ensure_ascii=False).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+async def recibir(reader):
+    """Siguiente mensaje o None si el otro extremo cerró la conexión"""
+    linea = await reader.readline()
+    if not linea:
+        return None
+    return json.loads(linea)
+
+
+def token_por_defecto():
+    return os.environ.get("CLA_FLOTA_TOKEN") or None
+
+
+def es_local(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+def archivo_residente():
+    """%LOCALAPPDATA%\\CLA-WinConfig\\agente.json (puerto y token del agente residente)"""
+    return directorio_datos("agente.json")
+
+
+def raices_assets_por_defecto():
+    """Carpeta assets junto al programa y las raíces de CLA_ASSETS_PERMITIDOS"""
+    from .configurador import BASE_PATH
+
+    extra = os.environ.get(VARIABLE_ASSETS, "").split(os.pathsep)
+    return [BASE_PATH.parent / "assets"] + [Path(r.strip()) for r in extra if r.strip()]
+
+
+def dentro_de(ruta, raices):
+    """True si `ruta` (resueltos .. y enlaces) está dentro de alguna de las raíces"""
+    ruta = os.path.normcase(os.path.realpath(ruta))
+    for raiz in raices:
+        raiz = os.path.normcase(os.path.realpath(raiz))
+        try:
+            if os.path.commonpath([ruta, raiz]) == raiz:
+                return True
+        except ValueError:
+            continue  # otra unidad o un recurso de red distinto
+    return False
+
+
+def apuntar_assets(configurador, ruta):
+    """Usa los assets de `ruta` (carpeta del centro, local o de red)"""
+    configurador.carpeta_assets = Path(ruta)
+    configurador.ruta_wallpapers = configurador.carpeta_assets / "wallpapers"
+    configurador.ruta_lockscreen = configurador.carpeta_assets / "lockscreen"
+
+
+class AgenteConfiguracion:
+    """
+    Servidor de trabajos de configuración. `crear_configurador(trabajo,
+    callback)` construye el ConfiguradorPC de cada trabajo (se sustituye en
+    las pruebas por uno con backends simulados). Todo mensaje debe llevar
+    el token: fuera de localhost hay que indicarlo (compartido con el
+    coordinador); en localhost, si no se indica, se genera uno aleatorio.
+
+    Con `archivo` publica puerto y token ahí al iniciar (modo residente) y
+    `calentar()` carga las cachés compartidas antes del primer trabajo.
+    `raices_assets` son las carpetas de las que puede leer assets un trabajo.
+    """
+
+    def __init__(self, host="127.0.0.1", puerto=PUERTO_DEFECTO, token=None, crear_configurador=None,
+                 callback=None, archivo=None, calentar=None, raices_assets=None):
+        self.host = host
+        self.puerto = puerto
+        self.token = token or token_por_defecto()
+        if not self.token and not es_local(host):
+            raise ValueError("Se requiere un token (--token o CLA_FLOTA_TOKEN) para escuchar fuera de localhost")
+        # Sin token cualquier usuario del equipo podría enviar trabajos a un proceso elevado
+        self.token_generado = not self.token
+        self.token = self.token or secrets.token_urlsafe(32)
+        self.crear_configurador = crear_configurador or self.configurador_por_defecto
+        self.callback = callback
+        self.archivo = archivo
+        self.calentar = calentar
+        self.raices_assets = list(raices_assets) if raices_assets is not None else None
+        self.trabajos = 0
+        self.ocupado = False
+        self.servidor = None
+        self._turno = None
+
+    def log(self, mensaje):
+        if self.callback:
+            self.callback(mensaje)
+
+    @classmethod
+    def residente(cls, puerto=PUERTO_RESIDENTE, callback=None, archivo=None):
+        """Agente local con token aleatorio publicado en archivo_residente()"""
+        return cls("127.0.0.1", puerto, token=secrets.token_urlsafe(32), callback=callback,
+                   archivo=archivo or archivo_residente(), calentar=calentar_caches)
+
+    @staticmethod
+    def configurador_por_defecto(trabajo, callback):
+        from .configurador import ConfiguradorPC
+        from .inventario import obtener_inventario
+
+        # En un agente residente el inventario puede ser de antes de crear la cuenta
+        usuario = trabajo.get("usuario")
+        inventario = obtener_inventario()
+        if usuario and not (inventario.disponible and inventario.existe(usuario)):
+            inventario.invalidar()
+        return ConfiguradorPC(trabajo["pc"], carpeta_centro=trabajo.get("centro") or 'CID-Centro_Computo',
+                              usuario_objetivo=usuario, callback=callback)
+
+    async def iniciar(self):
+        """Empieza a escuchar; con puerto=0 el sistema elige uno libre (queda en self.puerto)"""
+        self._turno = asyncio.Lock()
+        self.servidor = await asyncio.start_server(self.atender, self.host, self.puerto, limit=LIMITE_LINEA)
+        self.puerto = self.servidor.sockets[0].getsockname()[1]
+        self.log(f"📡 Agente escuchando en {self.host}:{self.puerto}")
+        if self.token_generado and not self.archivo:
+            self.log(f"🔑 Token de esta sesión (--token del coordinador): {self.token}")
+        if self.calentar:
+            # Los trabajos esperan su turno mientras se cargan las cachés
+            asyncio.create_task(self._calentar())
+        if self.archivo:
+            self.publicar()
+        return self
+
+    async def _calentar(self):
+        async with self._turno:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.calentar, self.log)
+            except Exception as e:
+                self.log(f"⚠️  No se pudieron precargar las cachés: {e}")
+
+    def publicar(self):
+        self.archivo.parent.mkdir(parents=True, exist_ok=True)
+        self.archivo.write_text(json.dumps({"puerto": self.puerto, "token": self.token, "pid": os.getpid()}),
+                                encoding="utf-8")
+
+    async def servir(self):
+        if self.servidor is None:
+            await self.iniciar()
+        try:
+            await self.servidor.serve_forever()
+        finally:
+            await self.cerrar()
+
+    async def cerrar(self):
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        if self.archivo:
+            self.archivo.unlink(missing_ok=True)
+
+    def rechazo(self, trabajo):
+        """Motivo por el que no se acepta un trabajo de configuración, o None"""
+        centro = trabajo.get("centro")
+        if centro is not None and (not isinstance(centro, str) or centro in (".", "..")
+                                   or any(c in centro for c in "/\\:")):
+            return "Centro no válido"
+        assets = trabajo.get("assets")
+        if assets is not None:
+            raices = self.raices_assets if self.raices_assets is not None else raices_assets_por_defecto()
+            if not isinstance(assets, str) or not dentro_de(assets, raices):
+                return "Ruta de assets no permitida en este equipo"
+        return None
+
+    def autorizado(self, mensaje):
+        return hmac.compare_digest(str(mensaje.get("token") or ""), self.token)
+
+    async def atender(self, reader, writer):
+        try:
+            mensaje = await recibir(reader)
+            if mensaje is None:
+                return
+            if not self.autorizado(mensaje):
+                await enviar(writer, {"tipo": "error", "mensaje": "Token inválido"})
+            elif mensaje.get("tipo") == "estado":
+                await enviar(writer, {"tipo": "estado", "equipo": socket.gethostname(),
+                                      "ocupado": self.ocupado, "trabajos": self.trabajos})
+            elif mensaje.get("tipo") == "configurar" and isinstance(mensaje.get("pc"), int):
+                motivo = self.rechazo(mensaje)
+                if motivo:
+                    self.log(f"⚠️  Trabajo rechazado: {motivo}")
+                    await enviar(writer, {"tipo": "error", "mensaje": motivo})
+                    return
+                async with self._turno:
+                    await self.ejecutar(mensaje, writer)
+            else:
+                await enviar(writer, {"tipo": "error", "mensaje": "Mensaje no válido"})
+        except (ConnectionError, ValueError) as e:
+            self.log(f"⚠️  Conexión interrumpida: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def ejecutar(self, trabajo, writer):
+        """Aplica el trabajo en un hilo y reenvía su log mientras tanto"""
+        loop = asyncio.get_running_loop()
+        cola = asyncio.Queue()
+
+        def callback(mensaje):
+            loop.call_soon_threadsafe(cola.put_nowait, mensaje)
+
+        def aplicar():
+            configurador = self.crear_configurador(trabajo, callback)
+            if trabajo.get("assets"):
+                apuntar_assets(configurador, trabajo["assets"])
+            return configurador.aplicar_configuracion_completa(trabajo.get("opciones") or {})
+
+        self.ocupado = True
+        self.trabajos += 1
+        self.log(f"⚙️  Configurando PC-{trabajo['pc']}")
+        conectado = True
+        try:
+            await enviar(writer, {"tipo": "aceptado", "pc": trabajo["pc"]})
+            futuro = loop.run_in_executor(None, aplicar)
+            futuro.add_done_callback(lambda _: cola.put_nowait(_FIN))
+            while (mensaje := await cola.get()) is not _FIN:
+                if conectado:
+                    try:
+                        await enviar(writer, {"tipo": "log", "mensaje": mensaje})
+                    except ConnectionError:
+                        # El coordinador se fue: el trabajo sigue hasta el final
+                        conectado = False
+            try:
+                exitosos, total = futuro.result()
+                respuesta = {"tipo": "resultado", "exitosos": exitosos, "total": total}
+            except Exception as e:
+                respuesta = {"tipo": "error", "mensaje": f"Error inesperado: {e}"}
+            self.log(f"✓ PC-{trabajo['pc']} terminado")
+            if conectado:
+                await enviar(writer, respuesta)
+        finally:
+            self.ocupado = False
+
+
+def calentar_caches(callback=None):
+    """Carga inventario, pool de PowerShell, índices de assets y catálogo de tareas de los centros"""
+    from .assets import CENTROS, AssetIndex
+    from .catalogo_tareas import obtener_catalogo_tareas
+    from .configurador import BASE_PATH
+    from .inventario import obtener_inventario
+
+    # La consulta del inventario también abre las sesiones del pool de PowerShell
+    inventario = obtener_inventario()
+    usuarios = inventario.usuarios()
+    for carpeta in CENTROS.values():
+        AssetIndex(BASE_PATH.parent / "assets" / carpeta).resumen()
+    obtener_catalogo_tareas().centros(BASE_PATH.parent / "assets")
+    if callback:
+        callback(f"✓ Cachés listas: {len(usuarios)} usuario(s), {len(CENTROS)} centro(s)")
+
+
+async def solicitar(host, puerto, trabajo, callback=None, timeout_conexion=10):
+    """Envía un trabajo a un agente y devuelve (exitosos, total); su log va al callback"""
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, puerto, limit=LIMITE_LINEA), timeout_conexion)
+    except (OSError, asyncio.TimeoutError) as e:
+        raise ErrorAgente(f"sin conexión con {host}:{puerto} ({e or 'tiempo agotado'})") from None
+    try:
+        await enviar(writer, trabajo)
+        while True:
+            mensaje = await recibir(reader)
+            if mensaje is None:
+                raise ErrorAgente("el agente cerró la conexión")
+            if mensaje["tipo"] == "log":
+                if callback:
+                    callback(mensaje["mensaje"])
+            elif mensaje["tipo"] == "resultado":
+                return mensaje["exitosos"], mensaje["total"]
+            elif mensaje["tipo"] == "error":
+                raise ErrorAgente(mensaje["mensaje"])
+    except (ConnectionError, ValueError, KeyError) as e:
+        raise ErrorAgente(f"conexión interrumpida ({e})") from None
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def agente_residente(archivo=None, timeout=0.5):
+    """(puerto, token) del agente residente si está respondiendo, o None"""
+    archivo = archivo or archivo_residente()
+    try:
+        datos = json.loads(archivo.read_text(encoding="utf-8"))
+        with socket.create_connection(("127.0.0.1", datos["puerto"]), timeout=timeout):
+            pass
+        return datos["puerto"], datos["token"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def aplicar_en_residente(residente, numero_pc, opciones, carpeta_centro='CID-Centro_Computo',
+                         usuario_objetivo=None, callback=None):
+    """aplicar_configuracion_completa en el agente residente; lanza ErrorAgente si no se pudo"""
+    puerto, token = residente
+    trabajo = {"tipo": "configurar", "token": token, "pc": numero_pc, "centro": carpeta_centro,
+               "opciones": opciones, "usuario": usuario_objetivo}
+    return asyncio.run(solicitar("127.0.0.1", puerto, trabajo, callback))
+
+
+def comando_residente():
+    """Línea de comandos que arranca el agente residente (para la tarea al iniciar sesión)"""
+    if getattr(sys, "frozen", False):
+        return f'"{sys.executable}" --cli agente --residente'
+    inicio = Path(__file__).resolve().parent.parent / "start.py"
+    return f'"{sys.executable}" "{inicio}" --cli agente --residente'
+
+
+def instalar_residente():
+    """Tarea al iniciar sesión que abre el agente residente con privilegios elevados"""
+    # Dentro de /TR las comillas del comando van escapadas
+    accion = comando_residente().replace('"', '\\"')
+    cmd = f'schtasks /Create /TN "{TAREA_RESIDENTE}" /SC ONLOGON /RL HIGHEST /F /TR "{accion}"'
+    resultado = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    if resultado.returncode == 0:
+        return True, f"✓ Tarea '{TAREA_RESIDENTE}' instalada: el agente se abrirá al iniciar sesión"
+    return False, f"❌ Error instalando '{TAREA_RESIDENTE}': {resultado.stderr.strip()}"
@@ -0,0 +1,27 @@
+"""
+Utilidades de archivos compartidas por las cachés del programa
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+
+def hash_archivo(ruta, bloque=1024 * 1024):
+    """SHA-256 del contenido (hexadecimal), leído por bloques"""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def directorio_datos(sub, maquina=False):
+    """
+    %LOCALAPPDATA%\\CLA-WinConfig\\<sub> (o %PROGRAMDATA% si los datos son del
+    equipo y los leen todos los usuarios); ~/.cache/cla-winconfig fuera de Windows
+    """
+    base = os.environ.get("PROGRAMDATA" if maquina else "LOCALAPPDATA")
+    if base:
+        return Path(base) / "CLA-WinConfig" / sub
+    return Path.home() / ".cache" / "cla-winconfig" / sub
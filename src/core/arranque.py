@@ -0,0 +1,249 @@
+"""
+Escáner de programas de arranque
+Recorre en una sola pasada todas las ubicaciones de inicio (Run, RunOnce,
+Wow6432Node, StartupApproved y las carpetas Inicio) y clasifica cada
+entrada con las reglas del perfil del centro.
+
+Las reglas bloquear/proteger se compilan en una única expresión regular
+construida como un árbol de prefijos: cada posición del texto se prueba
+contra el árbol, no contra cada patrón, así que el coste por entrada no
+crece con el número de reglas.
+"""
+
+import os
+import re
+from collections import Counter, namedtuple
+from pathlib import Path
+
+from .registro import HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, REG_BINARY, Diferencia, RegistryBatch
+
+BLOQUEADA = "bloqueada"
+PROTEGIDA = "protegida"
+NORMAL = "normal"
+
+# Tipos de ubicación
+RUN = "run"
+RUN_ONCE = "run_once"
+APROBADO = "aprobado"
+CARPETA = "carpeta"
+
+RUTA_RUN = r"Software\Microsoft\Windows\CurrentVersion\Run"
+RUTA_RUN_ONCE = r"Software\Microsoft\Windows\CurrentVersion\RunOnce"
+RUTA_RUN_WOW = r"Software\Wow6432Node\Microsoft\Windows\CurrentVersion\Run"
+RUTA_RUN_ONCE_WOW = r"Software\Wow6432Node\Microsoft\Windows\CurrentVersion\RunOnce"
+RUTA_APROBADO = r"Software\Microsoft\Windows\CurrentVersion\Explorer\StartupApproved"
+CARPETA_INICIO = Path("Microsoft", "Windows", "Start Menu", "Programs", "Startup")
+
+# StartupApproved: primer byte impar = deshabilitado (03 00 00 00 ...)
+DESHABILITADO = b"\x03" + b"\x00" * 7
+
+# `aprobacion` es la ruta de StartupApproved que controla la entrada (None en RunOnce);
+# en las entradas de la carpeta Inicio `ruta` es la carpeta y `comando` el archivo
+EntradaArranque = namedtuple("EntradaArranque", ["tipo", "hive", "ruta", "nombre", "comando", "estado",
+                                                 "regla", "deshabilitada", "aprobacion"])
+# Programas de inicio activos de un ámbito antes y después de optimizar
+ResumenArranque = namedtuple("ResumenArranque", ["usuario", "antes", "despues", "error"])
+# Un ámbito de inicio: HKLM o un usuario (HKCU o HKU\<SID>\ como prefijo) y su carpeta Inicio
+Ambito = namedtuple("Ambito", ["hive", "prefijo", "carpeta"])
+
+FIN = ""  # marca de fin de patrón en el árbol de prefijos
+
+
+def _patron(nodo):
+    """Alternancia anidada de un nivel del árbol de prefijos"""
+    ramas = [re.escape(c) + _patron(hijo) for c, hijo in sorted(nodo.items()) if c != FIN]
+    if not ramas:
+        return ""
+    return ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+
+
+def compilar_patrones(patrones):
+    """Expresión regular que encuentra cualquiera de los patrones (en minúsculas)"""
+    arbol = {}
+    for patron in filter(None, patrones):
+        nodo = arbol
+        for c in patron.lower():
+            if FIN in nodo:
+                break  # un prefijo ya es regla: contener el patrón largo no añade nada
+            nodo = nodo.setdefault(c, {})
+        else:
+            nodo.clear()
+            nodo[FIN] = {}
+    return _patron(arbol) if arbol else "(?!)"
+
+
+class Reglas:
+    """Bloquear/proteger compilados en una sola expresión; proteger prevalece"""
+
+    def __init__(self, bloquear=(), proteger=()):
+        self.bloquear = tuple(bloquear)
+        self.proteger = tuple(proteger)
+        self._regex = re.compile(f"(?=(?P<proteger>{compilar_patrones(self.proteger)})"
+                                 f"|(?P<bloquear>{compilar_patrones(self.bloquear)}))")
+
+    @classmethod
+    def de_perfil(cls, plan):
+        return cls(plan.bloquear, plan.proteger)
+
+    def clasificar(self, texto):
+        """(estado, texto que coincidió o None)"""
+        bloqueo = None
+        for m in self._regex.finditer(texto.lower()):
+            if m.group("proteger") is not None:
+                return PROTEGIDA, m.group("proteger")
+            if bloqueo is None:
+                bloqueo = m.group("bloquear")
+        return (BLOQUEADA, bloqueo) if bloqueo is not None else (NORMAL, None)
+
+
+class InventarioArranque:
+    """Entradas de arranque clasificadas"""
+
+    def __init__(self, entradas):
+        self.entradas = entradas
+
+    def __iter__(self):
+        return iter(self.entradas)
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def con_estado(self, estado):
+        return [e for e in self.entradas if e.estado == estado]
+
+    def activas(self):
+        """Entradas que se ejecutan al iniciar sesión (no deshabilitadas en StartupApproved)"""
+        return sum(1 for e in self.entradas if not e.deshabilitada)
+
+    def cuenta(self):
+        """{estado: número de entradas}"""
+        cuenta = Counter(e.estado for e in self.entradas)
+        return {estado: cuenta[estado] for estado in (BLOQUEADA, PROTEGIDA, NORMAL)}
+
+
+def optimizable(entrada):
+    """
+    Solo Run (también Wow6432Node) y StartupApproved\\Run/Run32. RunOnce
+    (pasos pendientes de instaladores y actualizaciones) y la carpeta
+    Inicio se escanean e informan, pero no se tocan.
+    """
+    if entrada.tipo == RUN:
+        return True
+    return entrada.tipo == APROBADO and entrada.ruta.endswith(("\\Run", "\\Run32"))
+
+
+def cambios_propuestos(inventario):
+    """
+    Lo que optimizar_arranque hace con las entradas bloqueadas:
+    ({(hive, ruta): nombres de Run a eliminar}, entradas a deshabilitar en StartupApproved).
+    También se deshabilita el StartupApproved de los valores de Run eliminados,
+    para que no reaparezcan habilitados si el programa vuelve a crearlos.
+    """
+    eliminar = {}
+    bloqueadas = [e for e in inventario.con_estado(BLOQUEADA) if optimizable(e)]
+    for entrada in bloqueadas:
+        if entrada.tipo == RUN:
+            eliminar.setdefault((entrada.hive, entrada.ruta), []).append(entrada.nombre)
+    deshabilitar = [e for e in bloqueadas if e.aprobacion and not e.deshabilitada]
+    return eliminar, deshabilitar
+
+
+def lote_deshabilitar(backend, entradas, tarea=None):
+    lote = RegistryBatch(backend)
+    for entrada in entradas:
+        lote.establecer(entrada.hive, entrada.aprobacion, entrada.nombre, REG_BINARY, DESHABILITADO, tarea=tarea)
+    return lote
+
+
+def diferencias(inventario, backend):
+    """Diferencias (actual -> deseado, None = eliminado) que aplicaría la optimización, sin escribir nada"""
+    eliminar, deshabilitar = cambios_propuestos(inventario)
+    comandos = {(e.hive, e.ruta, e.nombre): e.comando for e in inventario}
+    cambios = [Diferencia(hive, ruta, nombre, comandos[(hive, ruta, nombre)], None)
+               for (hive, ruta), nombres in eliminar.items() for nombre in nombres]
+    return cambios + lote_deshabilitar(backend, deshabilitar).delta()
+
+
+def carpeta_inicio(base):
+    return Path(base) / CARPETA_INICIO if base else None
+
+
+def ambitos_por_defecto():
+    """Equipo (HKLM + Inicio común) y usuario actual (HKCU + su Inicio)"""
+    return [Ambito(HKEY_LOCAL_MACHINE, "", carpeta_inicio(os.environ.get("PROGRAMDATA"))),
+            Ambito(HKEY_CURRENT_USER, "", carpeta_inicio(os.environ.get("APPDATA")))]
+
+
+class EscanerArranque:
+    """
+    Enumera las ubicaciones de inicio de cada ámbito con una lectura por
+    clave y por carpeta. Las entradas de Run y de la carpeta Inicio llevan
+    el estado de su valor de StartupApproved (deshabilitada).
+    """
+
+    def __init__(self, reglas, backend, ambitos=None):
+        self.reglas = reglas
+        self.backend = backend
+        self.ambitos = ambitos if ambitos is not None else ambitos_por_defecto()
+
+    def ubicaciones(self, ambito):
+        """(tipo, ruta, subclave de StartupApproved) de un ámbito"""
+        p = ambito.prefijo
+        ubicaciones = [(RUN, p + RUTA_RUN, "Run"), (RUN_ONCE, p + RUTA_RUN_ONCE, None)]
+        if ambito.hive == HKEY_LOCAL_MACHINE:
+            ubicaciones += [(RUN, p + RUTA_RUN_WOW, "Run32"), (RUN_ONCE, p + RUTA_RUN_ONCE_WOW, None)]
+        return ubicaciones
+
+    def _aprobados(self, ambito):
+        """{subclave: {nombre en minúsculas: (nombre, datos)}} de StartupApproved"""
+        aprobados = {}
+        for subclave in ("Run", "Run32", "StartupFolder"):
+            valores = self.backend.enumerar(ambito.hive, f"{ambito.prefijo}{RUTA_APROBADO}\\{subclave}")
+            aprobados[subclave] = {n.lower(): (n, datos) for n, (tipo, datos) in valores.items()
+                                   if tipo == REG_BINARY}
+        return aprobados
+
+    def _entrada(self, tipo, hive, ruta, nombre, comando, texto, aprobados, subclave, prefijo):
+        deshabilitada = False
+        aprobacion = None
+        if subclave:
+            aprobacion = f"{prefijo}{RUTA_APROBADO}\\{subclave}"
+            datos = aprobados[subclave].get(nombre.lower(), (None, b""))[1]
+            deshabilitada = bool(datos) and datos[0] & 1 == 1
+        estado, regla = self.reglas.clasificar(texto)
+        return EntradaArranque(tipo, hive, ruta, nombre, comando, estado, regla, deshabilitada, aprobacion)
+
+    def escanear(self):
+        entradas = []
+        for ambito in self.ambitos:
+            aprobados = self._aprobados(ambito)
+            vistos = {subclave: set() for subclave in aprobados}
+
+            for tipo, ruta, subclave in self.ubicaciones(ambito):
+                for nombre, (_, comando) in self.backend.enumerar(ambito.hive, ruta).items():
+                    comando = str(comando)
+                    entradas.append(self._entrada(tipo, ambito.hive, ruta, nombre, comando, f"{nombre} {comando}",
+                                                  aprobados, subclave, ambito.prefijo))
+                    if subclave:
+                        vistos[subclave].add(nombre.lower())
+
+            if ambito.carpeta is not None:
+                ruta = str(ambito.carpeta)
+                try:
+                    archivos = [a for a in os.scandir(ruta) if a.is_file() and a.name.lower() != "desktop.ini"]
+                except OSError:
+                    archivos = []
+                for archivo in archivos:
+                    entradas.append(self._entrada(CARPETA, ambito.hive, ruta, archivo.name, archivo.path, archivo.name,
+                                                  aprobados, "StartupFolder", ambito.prefijo))
+                    vistos["StartupFolder"].add(archivo.name.lower())
+
+            # Valores de StartupApproved sin entrada visible (p. ej. apps de la Store)
+            for subclave, valores in aprobados.items():
+                ruta = f"{ambito.prefijo}{RUTA_APROBADO}\\{subclave}"
+                for clave, (nombre, datos) in valores.items():
+                    if clave not in vistos[subclave]:
+                        estado, regla = self.reglas.clasificar(nombre)
+                        entradas.append(EntradaArranque(APROBADO, ambito.hive, ruta, nombre, "", estado, regla,
+                                                        bool(datos) and datos[0] & 1 == 1, ruta))
+        return InventarioArranque(entradas)
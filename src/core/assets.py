@@ -0,0 +1,139 @@
+"""
+Índice de assets por centro de cómputo
+Cada carpeta (wallpapers, lockscreen, tareasprogramadas) se lee con un
+único os.scandir y se vuelve a leer solo si cambia su fecha de
+modificación. Lo comparten ConfiguradorPC y la interfaz.
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+
+# Orden de preferencia cuando hay varias imágenes con el mismo nombre
+EXTENSIONES_IMAGEN = ('.jpg', '.png', '.jpeg')
+
+NOMBRE_BLOQUEO = "PC-Bloqueo"
+
+# Centros de cómputo: nombre visible -> carpeta en assets/
+CENTROS = {
+    'CID-Centro de Cómputo': 'CID-Centro_Computo',
+    'UD2-Laboratorio de Software': 'UD2-Laboratorio_Software',
+    'UD2-Laboratorio de Finanzas': 'UD2-Laboratorio_Finanzas',
+    'UD2-Laboratorio de Redes': 'UD2-Laboratorio_Redes',
+    'UD1-Centro de Cómputo': 'UD1-Centro_Computo',
+    'UD1-Aula de Cómputo': 'UD1-Aula_Computo'
+}
+PATRON_PC = re.compile(r"^PC-(\d+)$", re.IGNORECASE)
+
+
+class IndiceCarpeta:
+    """Archivos de una carpeta indexados por nombre (sin distinguir mayúsculas)"""
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.escaneos = 0
+        self._mtime = None
+        self._archivos = {}
+        self._lock = threading.Lock()
+
+    def _actual(self):
+        try:
+            mtime = os.stat(self.ruta).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self._mtime:
+                archivos = {}
+                if mtime is not None:
+                    with os.scandir(self.ruta) as entradas:
+                        for entrada in entradas:
+                            if entrada.is_file():
+                                archivos[entrada.name.lower()] = Path(entrada.path)
+                    self.escaneos += 1
+                self._archivos = archivos
+                self._mtime = mtime
+            return self._archivos
+
+    @property
+    def existe(self):
+        self._actual()
+        return self._mtime is not None
+
+    def imagen(self, nombre_base):
+        """Primera imagen `nombre_base` según EXTENSIONES_IMAGEN, o None"""
+        archivos = self._actual()
+        for ext in EXTENSIONES_IMAGEN:
+            ruta = archivos.get(f"{nombre_base}{ext}".lower())
+            if ruta:
+                return ruta
+        return None
+
+    def con_extension(self, extension):
+        """Archivos con la extensión dada, ordenados por nombre"""
+        extension = extension.lower()
+        return sorted((r for n, r in self._actual().items() if n.endswith(extension)),
+                      key=lambda r: r.name.lower())
+
+    def numeros_pc(self):
+        """Números de PC con imagen propia (PC-<n>.<ext>)"""
+        numeros = set()
+        for ruta in self._actual().values():
+            coincidencia = PATRON_PC.match(ruta.stem)
+            if coincidencia and ruta.suffix.lower() in EXTENSIONES_IMAGEN:
+                numeros.add(int(coincidencia.group(1)))
+        return sorted(numeros)
+
+    def invalidar(self):
+        with self._lock:
+            self._mtime = None
+            self._archivos = {}
+
+
+class AssetIndex:
+    """Assets de un centro: fondo y bloqueo por número de PC y XML de tareas"""
+
+    def __init__(self, carpeta_centro, wallpapers=None, lockscreen=None, tareasprogramadas=None):
+        self.carpeta = Path(carpeta_centro)
+        self.wallpapers = indice_carpeta(wallpapers or self.carpeta / "wallpapers")
+        self.lockscreen = indice_carpeta(lockscreen or self.carpeta / "lockscreen")
+        self.tareasprogramadas = indice_carpeta(tareasprogramadas or self.carpeta / "tareasprogramadas")
+
+    def wallpaper(self, numero_pc):
+        return self.wallpapers.imagen(f"PC-{numero_pc}")
+
+    def fondo_bloqueo(self, numero_pc):
+        """Imagen propia de la PC o, si no hay, la común PC-Bloqueo"""
+        return self.lockscreen.imagen(f"PC-{numero_pc}") or self.lockscreen.imagen(NOMBRE_BLOQUEO)
+
+    def tareas(self):
+        return self.tareasprogramadas.con_extension(".xml")
+
+    def completo(self):
+        """True si existen las carpetas de fondos y de bloqueo"""
+        return self.wallpapers.existe and self.lockscreen.existe
+
+    def resumen(self):
+        return {
+            "fondos": len(self.wallpapers.numeros_pc()),
+            "bloqueo": self.lockscreen.imagen(NOMBRE_BLOQUEO) is not None,
+            "tareas": len(self.tareas()),
+        }
+
+    def invalidar(self):
+        for indice in (self.wallpapers, self.lockscreen, self.tareasprogramadas):
+            indice.invalidar()
+
+
+_indices = {}
+_lock_indices = threading.Lock()
+
+
+def indice_carpeta(ruta):
+    """Índice compartido de una carpeta (uno por ruta en todo el proceso)"""
+    clave = os.path.normcase(os.path.abspath(ruta))
+    with _lock_indices:
+        if clave not in _indices:
+            _indices[clave] = IndiceCarpeta(ruta)
+        return _indices[clave]
+
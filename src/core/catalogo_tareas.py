@@ -0,0 +1,269 @@
+"""
+Catálogo de tareas programadas
+Lee una sola vez los XML de tareasprogramadas de cada centro y extrae sus
+disparadores, acciones, cuenta (principal) y codificación, con los errores
+que harían fallar a schtasks y las advertencias. El modelo se guarda por
+hash del archivo (en memoria y en disco), así que la interfaz y el
+instalador obtienen el listado y la validación sin lanzar ningún proceso.
+"""
+
+import json
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from pathlib import Path
+
+from .archivos import directorio_datos, hash_archivo
+
+VERSION_CATALOGO = 1
+NS = "{http://schemas.microsoft.com/windows/2004/02/mit/task}"
+
+# Disparador -> descripción para los listados
+DISPARADORES = {
+    "LogonTrigger": "al iniciar sesión",
+    "BootTrigger": "al arrancar el equipo",
+    "TimeTrigger": "una vez",
+    "CalendarTrigger": "programada",
+    "IdleTrigger": "con el equipo inactivo",
+    "EventTrigger": "ante un evento",
+    "RegistrationTrigger": "al registrarla",
+    "SessionStateChangeTrigger": "al cambiar la sesión",
+}
+ACCIONES = ("Exec", "ComHandler")
+# Windows 8 y posteriores no registran tareas con estas acciones
+ACCIONES_OBSOLETAS = ("SendEmail", "ShowMessage")
+
+Disparador = namedtuple("Disparador", ["tipo", "habilitado", "inicio", "usuario"])
+Accion = namedtuple("Accion", ["tipo", "comando", "argumentos", "directorio"])
+Principal = namedtuple("Principal", ["usuario", "grupo", "tipo_inicio", "nivel"])
+TareaXML = namedtuple("TareaXML", ["nombre", "archivo", "hash", "codificacion", "autor", "descripcion",
+                                   "habilitada", "disparadores", "acciones", "principal", "errores",
+                                   "advertencias"])
+
+
+def directorio_catalogo():
+    """%LOCALAPPDATA%\\CLA-WinConfig\\tareas o ~/.cache fuera de Windows"""
+    return directorio_datos("tareas")
+
+
+def detectar_codificacion(datos):
+    """(codificación real según el BOM, codificación declarada en <?xml ...?> o None)"""
+    if datos.startswith(b"\xff\xfe"):
+        real = "utf-16-le"
+    elif datos.startswith(b"\xfe\xff"):
+        real = "utf-16-be"
+    else:
+        real = "utf-8"
+    cabecera = datos[:200].decode(real, errors="ignore")
+    m = re.match(r"\ufeff?\s*<\?xml[^>]*encoding=[\"']([\w-]+)[\"']", cabecera)
+    return real, m.group(1) if m else None
+
+
+def _familia(codificacion):
+    """utf8 / utf16 / el nombre tal cual para las demás"""
+    nombre = codificacion.lower().replace("-", "").replace("_", "")
+    return "utf16" if nombre.startswith("utf16") else nombre
+
+
+def _texto(elemento, ruta):
+    """Texto de un descendiente ("Settings/Enabled") en el espacio de nombres de las tareas"""
+    hijo = elemento.find("/".join(NS + parte for parte in ruta.split("/")))
+    return hijo.text.strip() if hijo is not None and hijo.text else None
+
+
+def _cuenta_ajena(usuario):
+    """Motivo si la cuenta solo existe en otro equipo (SID local o EQUIPO\\usuario ajeno)"""
+    if not usuario:
+        return None
+    if re.fullmatch(r"S-1-5-21-\d+-\d+-\d+-\d+", usuario):
+        return f"usa el SID local {usuario}, que solo existe en el equipo donde se exportó"
+    equipo = os.environ.get("COMPUTERNAME")
+    dominio = usuario.split("\\", 1)[0] if "\\" in usuario else None
+    if equipo and dominio and dominio.upper() not in (equipo.upper(), "NT AUTHORITY", "BUILTIN",
+                                                      os.environ.get("USERDOMAIN", "").upper()):
+        return f"usa la cuenta {usuario} de otro equipo"
+    return None
+
+
+def analizar(ruta, hash_xml=None):
+    """TareaXML de un archivo; los problemas quedan en errores/advertencias (nunca lanza)"""
+    ruta = Path(ruta)
+    errores, advertencias = [], []
+    tarea = dict(nombre=ruta.stem, archivo=str(ruta), hash=hash_xml, codificacion=None, autor=None,
+                 descripcion=None, habilitada=True, disparadores=(), acciones=(),
+                 principal=None, errores=errores, advertencias=advertencias)
+    try:
+        datos = ruta.read_bytes()
+    except OSError as e:
+        errores.append(f"no se puede leer: {e}")
+        return _cerrar(tarea)
+    tarea["hash"] = hash_xml or hash_archivo(ruta)
+
+    real, declarada = detectar_codificacion(datos)
+    tarea["codificacion"] = real
+    familias = {_familia(declarada or real), _familia(real)}
+    if len(familias) > 1 and "utf16" in familias:
+        errores.append(f"declara encoding=\"{declarada}\" pero el archivo está en {real.upper()}")
+    try:
+        raiz = ET.fromstring(datos.decode(real).lstrip("\ufeff"))
+    except (UnicodeDecodeError, ET.ParseError) as e:
+        errores.append(f"XML mal formado: {e}")
+        return _cerrar(tarea)
+    if raiz.tag != NS + "Task":
+        errores.append("el elemento raíz no es <Task> del Programador de tareas")
+        return _cerrar(tarea)
+
+    tarea["autor"] = _texto(raiz, "RegistrationInfo/Author")
+    tarea["descripcion"] = _texto(raiz, "RegistrationInfo/Description")
+    tarea["habilitada"] = (_texto(raiz, "Settings/Enabled") or "true").lower() != "false"
+    if not tarea["habilitada"]:
+        advertencias.append("la tarea está deshabilitada (Settings/Enabled)")
+
+    disparadores = []
+    elementos = raiz.find(NS + "Triggers")
+    for elemento in elementos if elementos is not None else ():
+        tipo = elemento.tag.replace(NS, "")
+        if tipo not in DISPARADORES:
+            errores.append(f"disparador desconocido: {tipo}")
+            continue
+        disparador = Disparador(tipo, (_texto(elemento, "Enabled") or "true").lower() != "false",
+                                _texto(elemento, "StartBoundary"), _texto(elemento, "UserId"))
+        motivo = _cuenta_ajena(disparador.usuario)
+        if motivo:
+            advertencias.append(f"el disparador {DISPARADORES[tipo]} {motivo}")
+        disparadores.append(disparador)
+    tarea["disparadores"] = tuple(disparadores)
+
+    acciones = []
+    elementos = raiz.find(NS + "Actions")
+    for elemento in elementos if elementos is not None else ():
+        tipo = elemento.tag.replace(NS, "")
+        if tipo in ACCIONES_OBSOLETAS:
+            errores.append(f"la acción {tipo} ya no está admitida en Windows 10/11")
+        elif tipo not in ACCIONES:
+            errores.append(f"acción desconocida: {tipo}")
+        elif tipo == "Exec" and not _texto(elemento, "Command"):
+            errores.append("acción Exec sin <Command>")
+        else:
+            acciones.append(Accion(tipo, _texto(elemento, "Command") or _texto(elemento, "ClassId"),
+                                   _texto(elemento, "Arguments"), _texto(elemento, "WorkingDirectory")))
+    if not acciones and not errores:
+        errores.append("la tarea no tiene acciones")
+    tarea["acciones"] = tuple(acciones)
+
+    elemento = raiz.find(f"{NS}Principals/{NS}Principal")
+    if elemento is not None:
+        principal = Principal(_texto(elemento, "UserId"), _texto(elemento, "GroupId"),
+                              _texto(elemento, "LogonType"), _texto(elemento, "RunLevel"))
+        motivo = _cuenta_ajena(principal.usuario)
+        if motivo:
+            advertencias.append(f"la cuenta de ejecución {motivo}")
+        tarea["principal"] = principal
+    return _cerrar(tarea)
+
+
+def _cerrar(tarea):
+    return TareaXML(**{**tarea, "errores": tuple(tarea["errores"]), "advertencias": tuple(tarea["advertencias"])})
+
+
+def describir(tarea):
+    """Una línea legible: cuándo se ejecuta y qué hace"""
+    cuando = ", ".join(DISPARADORES[d.tipo] for d in tarea.disparadores) or "sin disparadores"
+    que = "; ".join(" ".join(filter(None, (a.comando, a.argumentos))) for a in tarea.acciones)
+    return f"{tarea.nombre} ({cuando}) → {que}" if que else f"{tarea.nombre} ({cuando})"
+
+
+def _a_json(tarea):
+    datos = tarea._asdict()
+    datos["disparadores"] = [d._asdict() for d in tarea.disparadores]
+    datos["acciones"] = [a._asdict() for a in tarea.acciones]
+    datos["principal"] = tarea.principal._asdict() if tarea.principal else None
+    return {"version": VERSION_CATALOGO, "tarea": datos}
+
+
+def _desde_json(datos):
+    tarea = datos["tarea"]
+    return TareaXML(**{**tarea,
+                       "disparadores": tuple(Disparador(**d) for d in tarea["disparadores"]),
+                       "acciones": tuple(Accion(**a) for a in tarea["acciones"]),
+                       "principal": Principal(**tarea["principal"]) if tarea["principal"] else None,
+                       "errores": tuple(tarea["errores"]), "advertencias": tuple(tarea["advertencias"])})
+
+
+class CatalogoTareas:
+    """
+    TareaXML por archivo. En memoria por ruta (mientras no cambien fecha ni
+    tamaño no se vuelve a leer) y en disco por hash del XML.
+    """
+
+    def __init__(self, carpeta=None):
+        self.carpeta = Path(carpeta) if carpeta else directorio_catalogo()
+        self.analisis = 0
+        self._memoria = {}
+        self._lock = threading.Lock()
+
+    def tarea(self, ruta):
+        estado = os.stat(ruta)
+        clave = os.path.normcase(os.path.abspath(ruta))
+        firma = (estado.st_mtime_ns, estado.st_size)
+        with self._lock:
+            guardada = self._memoria.get(clave)
+            if guardada and guardada[0] == firma:
+                return guardada[1]
+
+        hash_xml = hash_archivo(ruta)
+        tarea = self._cargar(hash_xml)
+        if tarea is None:
+            tarea = analizar(ruta, hash_xml)
+            self.analisis += 1
+            self._guardar(tarea)
+        tarea = tarea._replace(nombre=Path(ruta).stem, archivo=str(ruta))
+        with self._lock:
+            self._memoria[clave] = (firma, tarea)
+        return tarea
+
+    def tareas(self, archivos_xml):
+        return [self.tarea(xml) for xml in archivos_xml]
+
+    def centros(self, carpeta_assets):
+        """{carpeta del centro: [TareaXML]} de todos los centros de carpeta_assets"""
+        catalogo = {}
+        for carpeta in sorted(Path(carpeta_assets).glob("*/tareasprogramadas")):
+            catalogo[carpeta.parent.name] = self.tareas(sorted(carpeta.glob("*.xml")))
+        return catalogo
+
+    def _ruta(self, hash_xml):
+        return self.carpeta / f"{hash_xml}.json"
+
+    def _cargar(self, hash_xml):
+        try:
+            datos = json.loads(self._ruta(hash_xml).read_text(encoding="utf-8"))
+            if datos.get("version") == VERSION_CATALOGO:
+                return _desde_json(datos)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _guardar(self, tarea):
+        try:
+            self.carpeta.mkdir(parents=True, exist_ok=True)
+            temporal = self._ruta(tarea.hash).with_suffix(f".{os.getpid()}.tmp")
+            temporal.write_text(json.dumps(_a_json(tarea), ensure_ascii=False), encoding="utf-8")
+            os.replace(temporal, self._ruta(tarea.hash))
+        except OSError:
+            pass
+
+
+_catalogo = None
+_lock_catalogo = threading.Lock()
+
+
+def obtener_catalogo_tareas():
+    """Catálogo compartido por la interfaz, el instalador y el agente residente"""
+    global _catalogo
+    with _lock_catalogo:
+        if _catalogo is None:
+            _catalogo = CatalogoTareas()
+        return _catalogo
@@ -1,13 +1,33 @@
 """Lógica de configuración del PC"""
 import os
 import sys
-import winreg
 import ctypes
 import shutil
 import subprocess
 import getpass
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
+from .arranque import (APROBADO, CARPETA, Ambito, EscanerArranque, Reglas, ResumenArranque, ambitos_por_defecto,
+                       cambios_propuestos, carpeta_inicio, diferencias, lote_deshabilitar)
+from .assets import AssetIndex
+from .hives import obtener_gestor_hives
+from .impacto_arranque import InformeImpacto, evaluar, tiempos_arranque
+from . import instrumentacion
+from .instrumentacion import medido
+from .inventario import obtener_inventario
+from .perfiles import ErrorPerfil, obtener_cache_planes, plan_centro
+from .planificador import PlanificadorTareas
+from .powershell import obtener_ejecutor
+from .registro import (HKEY_CURRENT_USER, HKEY_USERS, REG_DWORD, REG_SZ,
+                       RegistryBatch, backend_por_defecto, nombre_clave)
+from .resolvedor_sid import resolvedor_por_defecto
+from .staging import obtener_sincronizador
+from .tareas_programadas import InstaladorTareas
+from .transcodificacion import obtener_preprocesador
+
 # Detectar si está empaquetado en .exe
 if getattr(sys, 'frozen', False):
     # Ruta cuando está en .exe
@@ -16,73 +36,23 @@ else:
     # Ruta cuando se ejecuta como script
     BASE_PATH = Path(__file__).parent.parent
 
+# Serializa el callback de log entre hilos (tareas en paralelo)
+_lock_log = threading.RLock()
 
-class ConfiguradorPC:
-    def __init__(self, numero_pc, carpeta_centro='CID-Centro_Computo', usuario_objetivo=None, callback=None):
-        self.numero_pc = numero_pc
-        self.carpeta_centro = carpeta_centro
-        carpeta_base = BASE_PATH.parent / "assets" / carpeta_centro
-        self.ruta_wallpapers = carpeta_base / "wallpapers"
-        self.ruta_lockscreen = carpeta_base / "lockscreen"
-        self.es_admin = self.verificar_admin()
-        self.callback = callback
-        
-        # Carpeta para almacenar fondos de pantalla
-        self.ruta_pictures = Path.home() / "Fondos"
-        self.ruta_pictures.mkdir(parents=True, exist_ok=True)
-
-        # Usuario objetivo y su SID
-        self.usuario_objetivo = usuario_objetivo or getpass.getuser()
-        self.sid_objetivo = self.obtener_sid_usuario(self.usuario_objetivo)
 
+class ConfiguradorPC:
+    @medido
     def obtener_sid_usuario(self, nombre_usuario):
-        """Obtiene el SID de un usuario local con reintentos"""
-        max_intentos = 5
-        
-        for intento in range(1, max_intentos + 1):
-            try:
-                # Método 1: Usar PowerShell con Get-LocalUser
-                cmd = [
-                    "powershell",
-                    "-NoProfile",
-                    "-Command",
-                    f"(Get-LocalUser -Name '{nombre_usuario}').SID.Value"
-                ]
-                r = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                sid = r.stdout.strip()
-                
-                if sid and sid.startswith('S-1-5-'):
-                    self.log(f"✓ SID obtenido para '{nombre_usuario}': {sid}")
-                    return sid
-                
-                # Método 2: Usar WMIC como alternativa
-                cmd_wmic = f'wmic useraccount where name="{nombre_usuario}" get sid'
-                r_wmic = subprocess.run(cmd_wmic, shell=True, capture_output=True, text=True, timeout=10)
-                
-                lines = r_wmic.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    sid = lines[1].strip()
-                    if sid and sid.startswith('S-1-5-'):
-                        self.log(f"✓ SID obtenido para '{nombre_usuario}' (WMIC): {sid}")
-                        return sid
-                
-                # Si no se obtuvo, esperar y reintentar
-                if intento < max_intentos:
-                    self.log(f"⏳ Reintentando obtener SID... (intento {intento}/{max_intentos})")
-                    import time
-                    time.sleep(2)
-                
-            except Exception as e:
-                if intento < max_intentos:
-                    self.log(f"⚠️  Error obteniendo SID (intento {intento}): {e}")
-                    import time
-                    time.sleep(2)
-                else:
-                    self.log(f"✗ Error obteniendo SID después de {max_intentos} intentos: {e}")
-        
-        self.log(f"✗ No se pudo obtener el SID para '{nombre_usuario}' después de {max_intentos} intentos")
+        """Obtiene el SID de un usuario local (API nativa, inventario o PowerShell/WMIC)"""
+        sid, metodo = self.resolvedor.resolver(nombre_usuario)
+        if sid:
+            self.log(f"✓ SID obtenido para '{nombre_usuario}' ({metodo}): {sid}")
+            return sid
+
+        self.log(f"✗ No se pudo obtener el SID para '{nombre_usuario}'")
         return None
     
+    @medido
     def limpiar_cache_fondos(self):
         """Limpia el caché de fondos de pantalla de Windows para el usuario"""
         try:
@@ -172,14 +142,13 @@ logFile.Close
             
             # Crear la clave Run si no existe y agregar el script
             try:
-                key = winreg.CreateKeyEx(
-                    winreg.HKEY_USERS,
-                    f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\Run",
-                    0, 
-                    winreg.KEY_SET_VALUE
-                )
-                winreg.SetValueEx(key, "AplicarFondo", 0, winreg.REG_SZ, f'wscript.exe "{script_path}"')
-                winreg.CloseKey(key)
+                with self.escritura_registro() as lote:
+                    lote.establecer(
+                        HKEY_USERS,
+                        f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\Run",
+                        "AplicarFondo", REG_SZ, f'wscript.exe "{script_path}"',
+                        tarea='fondo_pantalla'
+                    )
                 
                 self.log("✓ Script de inicio creado para aplicar fondo al iniciar sesión")
                 return True
@@ -192,9 +161,70 @@ logFile.Close
             return False
         
     def log(self, mensaje):
-        """Envía mensaje al callback si existe"""
+        """Envía mensaje al callback si existe (las tareas en paralelo no se mezclan)"""
         if self.callback:
-            self.callback(mensaje)
+            with _lock_log:
+                self.callback(mensaje)
+    
+    @contextmanager
+    def lote_registro(self):
+        """
+        Agrupa las escrituras de registro de varias tareas.
+        Cada clave se abre una sola vez y todo se aplica al salir del bloque.
+        """
+        self.lote = RegistryBatch(self.backend_registro)
+        try:
+            yield self.lote
+        finally:
+            lote, self.lote = self.lote, None
+            self.aplicar_lote(lote)
+    
+    @medido
+    def aplicar_lote(self, lote):
+        """Escribe el lote (solo lo que difiere) e informa el resultado por clave"""
+        resultados = lote.flush()
+        if resultados and lote.cumple():
+            correctos = sum(r.sin_cambios for r in resultados)
+            self.log(f"✓ Registro: ya cumple la configuración ({correctos} valores sin cambios)")
+        elif resultados:
+            valores = sum(r.escritos for r in resultados)
+            correctos = sum(r.sin_cambios for r in resultados)
+            claves = sum(1 for r in resultados if r.escritos)
+            self.log(f"📝 Registro: {valores} valores escritos en {claves} claves ({correctos} ya correctos)")
+        for r in resultados:
+            if r.error:
+                self.log(f"✗ Error escribiendo {nombre_clave(r.hive, r.ruta)}: {r.error}")
+        return resultados
+    
+    @contextmanager
+    def escritura_registro(self):
+        """
+        Devuelve el lote activo (si hay uno abierto con lote_registro) o uno
+        temporal que se aplica al salir del bloque y propaga sus errores.
+        """
+        if self.lote is not None:
+            yield self.lote
+            return
+        with RegistryBatch(self.backend_registro) as lote:
+            yield lote
+    
+    def clave_usuario(self, ruta):
+        """(hive, ruta) de una clave del usuario objetivo: HKCU si somos él, HKU\\<SID> si no"""
+        if self.soy_usuario_objetivo:
+            return HKEY_CURRENT_USER, ruta
+        return HKEY_USERS, f"{self.sid_objetivo}\\{ruta}"
+    
+    def preparar_registro_usuario(self):
+        """Verifica que el registro del usuario objetivo sea accesible (HKCU o hive cargado)"""
+        if self.soy_usuario_objetivo:
+            return True
+        if not self.sid_objetivo:
+            self.log(f"✗ No se pudo obtener el SID del usuario '{self.usuario_objetivo}'")
+            return False
+        if not self.asegurar_hive_cargado():
+            self.log("✗ No se pudo cargar el registro del usuario")
+            return False
+        return True
     
     def copiar_imagen_a_pictures(self, ruta_origen, nombre_destino, publico=False):
         """
@@ -233,495 +263,340 @@ logFile.Close
             )
             sys.exit()
     
-    def asegurar_hive_cargado(self):
-        """Asegura que el hive del usuario objetivo esté cargado en HKEY_USERS"""
-        if not self.sid_objetivo:
-            return False
-        
+    def ruta_ntuser(self, nombre_usuario, sid):
+        """Ubicación de NTUSER.DAT: ProfileList (inventario) y rutas habituales de C:\\Users"""
+        posibles_rutas = [
+            f"C:\\Users\\{nombre_usuario}",
+            f"C:\\Users\\{nombre_usuario}.{os.environ.get('COMPUTERNAME', '')}",
+        ]
         try:
-            # Intentar abrir la clave para verificar si está cargada
-            test_key = winreg.OpenKey(
-                winreg.HKEY_USERS,
-                f"{self.sid_objetivo}",
-                0,
-                winreg.KEY_READ
-            )
-            winreg.CloseKey(test_key)
-            return True  # Ya está cargado
-        except FileNotFoundError:
-            # No está cargado, intentar cargarlo
-            self.log(f"⏳ Cargando registro de '{self.usuario_objetivo}'...")
-            
-            # Obtener ruta del perfil
-            profile_path = Path(f"C:/Users/{self.usuario_objetivo}")
-            ntuser_path = profile_path / "NTUSER.DAT"
-            
-            if not ntuser_path.exists():
-                self.log(f"✗ No se encuentra NTUSER.DAT en {profile_path}")
-                return False
-            
-            # Cargar el hive usando reg load
-            cmd = f'reg load "HKU\\{self.sid_objetivo}" "{ntuser_path}"'
-            resultado = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            
-            if resultado.returncode == 0:
-                self.log(f"✓ Registro cargado correctamente")
+            perfil = self.inventario.perfil_de_sid(sid)
+            if not perfil and not self.inventario.disponible:
+                r = self.ejecutor.ejecutar(
+                    f"(Get-ItemProperty 'HKLM:\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\ProfileList\\{sid}' -ErrorAction SilentlyContinue).ProfileImagePath",
+                    idempotente=True
+                )
+                perfil = r.stdout.strip()
+            if perfil:
+                posibles_rutas.insert(0, perfil)
+        except Exception:
+            pass
+        
+        for ruta in posibles_rutas:
+            ntuser_path = Path(ruta) / "NTUSER.DAT"
+            if ntuser_path.exists():
+                return str(ntuser_path)
+        
+        self.log(f"✗ No se encontró NTUSER.DAT en ninguna ubicación")
+        self.log(f"  Rutas buscadas: {posibles_rutas}")
+        return None
+    
+    @medido
+    def montar_hive(self, nombre_usuario, sid):
+        """Toma una referencia al hive del usuario (una sola por configurador y SID)"""
+        # Comprobar y adquirir juntos: dos tareas a la vez no deben tomar dos referencias
+        with self._lock_hives:
+            if sid in self.hives_montados:
                 return True
-            else:
-                self.log(f"✗ Error al cargar registro: {resultado.stderr}")
+            if not self.adquirir_hive(nombre_usuario, sid):
                 return False
+            self.hives_montados.add(sid)
+            return True
+
+    def adquirir_hive(self, nombre_usuario, sid):
+        """Una referencia más al hive del usuario; quien la toma la suelta con hives.liberar"""
+        try:
+            return self.hives.adquirir(sid, lambda: self.ruta_ntuser(nombre_usuario, sid), log=self.log)
         except Exception as e:
             self.log(f"✗ Error verificando hive: {e}")
             return False
     
-    def descargar_hive(self):
-        """Descarga el hive del usuario del registro si fue cargado manualmente"""
+    def asegurar_hive_cargado(self):
+        """Asegura que el hive del usuario objetivo esté cargado en HKEY_USERS"""
         if not self.sid_objetivo:
-            return
-        
+            return False
+        return self.montar_hive(self.usuario_objetivo, self.sid_objetivo)
+    
+    @medido
+    def descargar_hive(self):
+        """Suelta la referencia al hive del usuario objetivo (se descarga si nadie más lo usa)"""
+        # Sin resolver el SID: si no se resolvió, no hay nada montado
+        sid = self._sid_objetivo
+        with self._lock_hives:
+            if sid not in self.hives_montados:
+                return
+            self.hives_montados.discard(sid)
+        self.hives.liberar(sid, log=self.log)
+    
+    @contextmanager
+    def hive_usuario(self):
+        """
+        Mantiene montado el hive del usuario objetivo durante el bloque
+        y lo suelta al salir, aunque alguna tarea falle.
+        """
         try:
-            # Intentar descargar el hive
-            self.log(f"⏳ Descargando registro de '{self.usuario_objetivo}'...")
-            cmd = f'reg unload "HKU\\{self.sid_objetivo}"'
-            resultado = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            
-            # No mostrar error si ya está descargado
-            if resultado.returncode == 0:
-                self.log(f"✓ Registro descargado correctamente")
-            # Error 2 significa que no estaba cargado (es normal)
-            elif "no se puede encontrar" not in resultado.stderr.lower():
-                self.log(f"⚠️  Nota: {resultado.stderr.strip()}")
-        except Exception as e:
-            self.log(f"⚠️  Error al descargar hive: {e}")
-        
+            yield
+        finally:
+            self.descargar_hive()
+    
+    @medido
     def establecer_tema_oscuro(self):
         """Activa el tema oscuro de Windows"""
         try:
-            # ⭐ Si somos el usuario objetivo, usar HKEY_CURRENT_USER
-            if self.soy_usuario_objetivo:
-                key = winreg.CreateKeyEx(
-                    winreg.HKEY_CURRENT_USER,
-                    r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize",
-                    0,
-                    winreg.KEY_SET_VALUE
-                )
-                winreg.SetValueEx(key, "AppsUseLightTheme", 0, winreg.REG_DWORD, 0)
-                winreg.SetValueEx(key, "SystemUsesLightTheme", 0, winreg.REG_DWORD, 0)
-                winreg.CloseKey(key)
-                self.log("✓ Tema oscuro activado (usuario actual)")
-                return True
-            
-            # Si no somos el usuario objetivo, usar el método anterior con SID
-            if not self.sid_objetivo:
-                self.log("✗ No se pudo obtener el SID del usuario objetivo")
+            if not self.preparar_registro_usuario():
                 return False
             
-            # Asegurar que el hive esté cargado
-            if not self.asegurar_hive_cargado():
-                self.log("✗ No se pudo cargar el registro del usuario")
-                return False
+            hive, ruta = self.clave_usuario(r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize")
+            with self.escritura_registro() as lote:
+                lote.establecer(hive, ruta, "AppsUseLightTheme", REG_DWORD, 0, tarea='tema_oscuro')
+                lote.establecer(hive, ruta, "SystemUsesLightTheme", REG_DWORD, 0, tarea='tema_oscuro')
             
-            # Crear la clave si no existe
-            key = winreg.CreateKeyEx(
-                winreg.HKEY_USERS,
-                f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\Themes\\Personalize",
-                0,
-                winreg.KEY_SET_VALUE
-            )
-            winreg.SetValueEx(key, "AppsUseLightTheme", 0, winreg.REG_DWORD, 0)
-            winreg.SetValueEx(key, "SystemUsesLightTheme", 0, winreg.REG_DWORD, 0)
-            winreg.CloseKey(key)
-            self.log("✓ Tema oscuro activado")
+            if self.soy_usuario_objetivo:
+                self.log("✓ Tema oscuro activado (usuario actual)")
+            else:
+                self.log("✓ Tema oscuro activado")
             return True
         except Exception as e:
             self.log(f"✗ Error al activar tema oscuro: {e}")
             return False
 
     
+    @property
+    def perfil(self):
+        """Plan compilado del perfil del centro (el predeterminado si no tiene o no es válido)"""
+        if self._perfil is None:
+            try:
+                self._perfil = plan_centro(self.carpeta_assets)
+            except (ErrorPerfil, OSError) as e:
+                self.log(f"⚠️  Perfil del centro no válido, se usan las reglas predeterminadas: {e}")
+                self._perfil = obtener_cache_planes().defecto()
+        return self._perfil
+    
+    def valores_perfil(self, usuario=True, equipo=True):
+        """Valores de registro del perfil: los del usuario objetivo (HKCU) y/o los del equipo (HKLM)"""
+        return [v for v in self.perfil.registro if (usuario if v.usuario else equipo)]
+
+    @medido
+    def aplicar_registro_perfil(self, usuario=True, equipo=True):
+        """Valores de registro declarados en el perfil del centro"""
+        valores = self.valores_perfil(usuario, equipo)
+        if any(v.usuario for v in valores) and not self.preparar_registro_usuario():
+            return False
+        if not self.es_admin and not all(v.usuario for v in valores):
+            self.log("⚠️  Valores de HKLM del perfil omitidos (requieren permisos de administrador)")
+            valores = [v for v in valores if v.usuario]
+        with self.escritura_registro() as lote:
+            for v in valores:
+                hive, ruta = self.clave_usuario(v.ruta) if v.usuario else (v.hive, v.ruta)
+                lote.establecer(hive, ruta, v.nombre, v.tipo, v.valor, tarea='registro_perfil')
+        self.log(f"✓ Perfil del centro: {len(valores)} valor(es) de registro")
+        return True
+    
+    @property
+    def assets(self):
+        """Índice de assets del centro (las carpetas leídas se comparten entre instancias)"""
+        return AssetIndex(self.carpeta_assets, wallpapers=self.ruta_wallpapers, lockscreen=self.ruta_lockscreen)
+    
+    @medido
+    def preparar_assets(self):
+        """
+        Sincroniza los assets del centro a la copia local si están en un medio
+        externo y pasa a usarla; si falla se sigue con los originales.
+        """
+        if not self.staging or not self.staging.necesita_staging(self.carpeta_assets):
+            return True
+        try:
+            r = self.staging.sincronizar(self.carpeta_assets, self.carpeta_centro)
+        except Exception as e:
+            self.log(f"⚠️  No se pudo copiar los assets al equipo, se usan desde el origen: {e}")
+            return False
+        if r.copiados or r.eliminados:
+            self.log(f"📦 Assets copiados al equipo: {r.copiados} archivo(s), {r.bytes // 1024} KB "
+                     f"({r.omitidos} sin cambios)")
+        # Solo se redirigen las carpetas que siguen apuntando al origen
+        for atributo, sub in (('ruta_wallpapers', 'wallpapers'), ('ruta_lockscreen', 'lockscreen')):
+            if getattr(self, atributo) == self.carpeta_assets / sub:
+                setattr(self, atributo, r.destino / sub)
+        self.carpeta_assets = r.destino
+        return True
+    
+    @medido
+    def fondo_optimizado(self, archivo_fondo):
+        """Fondo pre-transcodificado en la caché local o el original si no hay Pillow"""
+        if not self.preprocesador:
+            return archivo_fondo
+        if archivo_fondo not in self._fondos_optimizados:
+            optimizado = self.preprocesador.optimizar(archivo_fondo)
+            if optimizado:
+                self.log(f"🗜️  Fondo optimizado en caché: {optimizado.name}")
+            self._fondos_optimizados[archivo_fondo] = optimizado or archivo_fondo
+        return self._fondos_optimizados[archivo_fondo]
+    
+    @medido
     def establecer_fondo_pantalla(self):
         """Establece el fondo de pantalla según el número de PC"""
         try:
-            archivo_fondo = None
-            for ext in ['.jpg', '.png', '.jpeg']:
-                ruta = self.ruta_wallpapers / f"PC-{self.numero_pc}{ext}"
-                if ruta.exists():
-                    archivo_fondo = ruta
-                    break
+            archivo_fondo = self.assets.wallpaper(self.numero_pc)
             
             if not archivo_fondo:
                 self.log(f"✗ No se encontró PC-{self.numero_pc}.jpg o PC-{self.numero_pc}.png")
                 return False
             
             # Usar ruta directa desde assets (sin copiar)
-            ruta_absoluta = str(archivo_fondo.absolute())
+            ruta_absoluta = str(self.fondo_optimizado(archivo_fondo).absolute())
             
             self.log(f"📁 Aplicando fondo desde: {archivo_fondo.name}")
             
-            # ⭐ Si somos el usuario objetivo, usar HKEY_CURRENT_USER y SystemParametersInfo
-            if self.soy_usuario_objetivo:
-                try:
-                    # Método 1: Usar SystemParametersInfo (más efectivo)
-                    import ctypes
-                    SPI_SETDESKWALLPAPER = 20
-                    SPIF_UPDATEINIFILE = 0x01
-                    SPIF_SENDCHANGE = 0x02
-                    
-                    # Aplicar el fondo de pantalla
-                    resultado = ctypes.windll.user32.SystemParametersInfoW(
-                        SPI_SETDESKWALLPAPER,
-                        0,
-                        ruta_absoluta,
-                        SPIF_UPDATEINIFILE | SPIF_SENDCHANGE
-                    )
-                    
-                    if resultado:
-                        self.log(f"✓ Fondo de pantalla aplicado (usuario actual)")
-                        self.log(f"   Ruta: {ruta_absoluta}")
-                        
-                        # También actualizar en registro para persistencia
-                        key = winreg.CreateKeyEx(
-                            winreg.HKEY_CURRENT_USER,
-                            r"Control Panel\Desktop",
-                            0, 
-                            winreg.KEY_SET_VALUE
-                        )
-                        winreg.SetValueEx(key, "Wallpaper", 0, winreg.REG_SZ, ruta_absoluta)
-                        winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, "10")
-                        winreg.SetValueEx(key, "TileWallpaper", 0, winreg.REG_SZ, "0")
-                        winreg.CloseKey(key)
-                        
-                        # Limpiar caché
-                        self.limpiar_cache_fondos()
-                        
-                        return True
-                    else:
-                        self.log(f"⚠️  SystemParametersInfo falló, intentando método alternativo...")
-                        
-                except Exception as e:
-                    self.log(f"⚠️  Error con SystemParametersInfo: {e}")
-                
-                # Método 2 (fallback): Solo registro + script VBS
-                try:
-                    key = winreg.CreateKeyEx(
-                        winreg.HKEY_CURRENT_USER,
-                        r"Control Panel\Desktop",
-                        0, 
-                        winreg.KEY_SET_VALUE
-                    )
-                    winreg.SetValueEx(key, "Wallpaper", 0, winreg.REG_SZ, ruta_absoluta)
-                    winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, "10")
-                    winreg.SetValueEx(key, "TileWallpaper", 0, winreg.REG_SZ, "0")
-                    winreg.CloseKey(key)
-                    
-                    self.limpiar_cache_fondos()
-                    
-                    # Refrescar escritorio con rundll32
-                    os.system("rundll32.exe user32.dll,UpdatePerUserSystemParameters ,1 ,True")
-                    
-                    self.log(f"✓ Fondo configurado en registro (usuario actual)")
-                    self.log(f"   Ruta: {ruta_absoluta}")
-                    self.log(f"   ℹ️  Si no se ve, cierre sesión y vuelva a entrar")
-                    
-                    return True
-                except Exception as e:
-                    self.log(f"✗ Error aplicando fondo: {e}")
-                    return False
-            
-            # Si no somos el usuario objetivo, usar el método con SID
-            if not self.sid_objetivo:
-                self.log(f"✗ No se pudo obtener el SID del usuario '{self.usuario_objetivo}'")
+            if not self.preparar_registro_usuario():
                 return False
             
-            # Asegurar que el hive esté cargado
-            if not self.asegurar_hive_cargado():
-                self.log("✗ No se pudo cargar el registro del usuario")
-                return False
+            # Registro: persistencia del fondo. El refresco y la limpieza de
+            # caché solo se hacen si el fondo cambió realmente
+            hive, ruta = self.clave_usuario(r"Control Panel\Desktop")
+            with self.escritura_registro() as lote:
+                lote.establecer(hive, ruta, "Wallpaper", REG_SZ, ruta_absoluta, tarea='fondo_pantalla')
+                lote.establecer(hive, ruta, "WallpaperStyle", REG_SZ, "10", tarea='fondo_pantalla')
+                lote.establecer(hive, ruta, "TileWallpaper", REG_SZ, "0", tarea='fondo_pantalla')
+                if self.soy_usuario_objetivo:
+                    lote.despues_de_flush(lambda: self.refrescar_fondo(ruta_absoluta), tarea='fondo_pantalla')
+                lote.despues_de_flush(self.limpiar_cache_fondos, tarea='fondo_pantalla')
             
-            # Limpiar caché de fondos antiguos
-            self.limpiar_cache_fondos()
-            
-            try:
-                # Crear/abrir la clave Control Panel\Desktop del usuario objetivo
-                key = winreg.CreateKeyEx(
-                    winreg.HKEY_USERS,
-                    f"{self.sid_objetivo}\\Control Panel\\Desktop",
-                    0, 
-                    winreg.KEY_SET_VALUE
-                )
-                winreg.SetValueEx(key, "Wallpaper", 0, winreg.REG_SZ, ruta_absoluta)
-                winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, "10")
-                winreg.SetValueEx(key, "TileWallpaper", 0, winreg.REG_SZ, "0")
-                winreg.CloseKey(key)
-                
-                self.log(f"✓ Fondo configurado para '{self.usuario_objetivo}'")
+            if self.soy_usuario_objetivo:
+                self.log(f"✓ Fondo de pantalla configurado (usuario actual)")
                 self.log(f"   Ruta: {ruta_absoluta}")
-                
-                # Crear script de inicio
-                if self.es_admin:
-                    self.crear_script_aplicar_fondo(ruta_absoluta)
-                
                 return True
-            except Exception as e:
-                self.log(f"✗ Error al escribir en registro: {e}")
-                return False
+            
+            self.log(f"✓ Fondo configurado para '{self.usuario_objetivo}'")
+            self.log(f"   Ruta: {ruta_absoluta}")
+            
+            # Crear script de inicio
+            if self.es_admin:
+                self.crear_script_aplicar_fondo(ruta_absoluta)
+            
+            return True
                 
         except Exception as e:
             self.log(f"✗ Error al establecer fondo de pantalla: {e}")
             return False
 
+    @medido
+    def refrescar_fondo(self, ruta_absoluta):
+        """Aplica el fondo en vivo con SystemParametersInfo (rundll32 como alternativa)"""
+        aplicado_en_vivo = False
+        try:
+            SPI_SETDESKWALLPAPER = 20
+            SPIF_UPDATEINIFILE = 0x01
+            SPIF_SENDCHANGE = 0x02
+            
+            aplicado_en_vivo = bool(ctypes.windll.user32.SystemParametersInfoW(
+                SPI_SETDESKWALLPAPER,
+                0,
+                ruta_absoluta,
+                SPIF_UPDATEINIFILE | SPIF_SENDCHANGE
+            ))
+            if not aplicado_en_vivo:
+                self.log(f"⚠️  SystemParametersInfo falló, intentando método alternativo...")
+        except Exception as e:
+            self.log(f"⚠️  Error con SystemParametersInfo: {e}")
+        
+        if aplicado_en_vivo:
+            self.log(f"✓ Fondo de pantalla aplicado en vivo")
+            return True
+        
+        # Refrescar escritorio con rundll32 (el registro ya está escrito)
+        os.system("rundll32.exe user32.dll,UpdatePerUserSystemParameters ,1 ,True")
+        self.log(f"   ℹ️  Si no se ve el fondo, cierre sesión y vuelva a entrar")
+        return False
+
+    @medido
     def establecer_fondo_bloqueo(self):
-        """Establece el fondo de pantalla de bloqueo según el número de PC"""
+        """Establece el fondo de pantalla de bloqueo según el número de PC (o PC-Bloqueo común)"""
         try:
-            archivo_fondo = None
-            for ext in ['.jpg', '.png', '.jpeg']:
-                ruta = self.ruta_lockscreen / f"PC-{self.numero_pc}{ext}"
-                if ruta.exists():
-                    archivo_fondo = ruta
-                    break
+            archivo_fondo = self.assets.fondo_bloqueo(self.numero_pc)
             
             if not archivo_fondo:
-                self.log(f"✗ No se encontró fondo de bloqueo para PC-{self.numero_pc}")
+                self.log(f"✗ No se encontró fondo de bloqueo para PC-{self.numero_pc} ni PC-Bloqueo")
                 return False
             
             ruta_absoluta = str(archivo_fondo.absolute())
             
             self.log(f"📁 Aplicando fondo de bloqueo desde: {archivo_fondo.name}")
             
-            # ⭐ Si somos el usuario objetivo, usar HKEY_CURRENT_USER
-            if self.soy_usuario_objetivo:
-                try:
-                    # Crear/abrir la clave del personalizador de bloqueo
-                    key = winreg.CreateKeyEx(
-                        winreg.HKEY_CURRENT_USER,
-                        r"Software\Microsoft\Windows\CurrentVersion\PersonalizationSettings",
-                        0, 
-                        winreg.KEY_SET_VALUE
-                    )
-                    winreg.SetValueEx(key, "LockScreenImagePath", 0, winreg.REG_SZ, ruta_absoluta)
-                    winreg.CloseKey(key)
-                    
-                    # También guardar en la carpeta de Windows para el fondo de bloqueo
-                    lockscreen_path = Path.home() / "AppData/Local/Microsoft/Windows/Themes"
-                    lockscreen_path.mkdir(parents=True, exist_ok=True)
-                    
-                    self.log(f"✓ Fondo de bloqueo aplicado (usuario actual)")
-                    self.log(f"   Ruta: {ruta_absoluta}")
-                    return True
-                    
-                except Exception as e:
-                    self.log(f"⚠️  Error al aplicar fondo de bloqueo: {e}")
-                    return False
-            
-            # Si no somos el usuario objetivo, usar el método con SID
-            if not self.sid_objetivo:
-                self.log(f"✗ No se pudo obtener el SID del usuario '{self.usuario_objetivo}'")
+            if not self.preparar_registro_usuario():
                 return False
             
-            # Asegurar que el hive esté cargado
-            if not self.asegurar_hive_cargado():
-                self.log("✗ No se pudo cargar el registro del usuario")
-                return False
+            # Crear/abrir la clave del personalizador de bloqueo
+            hive, ruta = self.clave_usuario(r"Software\Microsoft\Windows\CurrentVersion\PersonalizationSettings")
+            with self.escritura_registro() as lote:
+                lote.establecer(hive, ruta, "LockScreenImagePath", REG_SZ, ruta_absoluta, tarea='fondo_bloqueo')
             
-            try:
-                # Crear/abrir la clave del personalizador de bloqueo
-                key = winreg.CreateKeyEx(
-                    winreg.HKEY_USERS,
-                    f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\PersonalizationSettings",
-                    0, 
-                    winreg.KEY_SET_VALUE
-                )
-                winreg.SetValueEx(key, "LockScreenImagePath", 0, winreg.REG_SZ, ruta_absoluta)
-                winreg.CloseKey(key)
-                
+            if self.soy_usuario_objetivo:
+                # También guardar en la carpeta de Windows para el fondo de bloqueo
+                self.ruta_temas.mkdir(parents=True, exist_ok=True)
+                self.log(f"✓ Fondo de bloqueo aplicado (usuario actual)")
+            else:
                 self.log(f"✓ Fondo de bloqueo configurado para '{self.usuario_objetivo}'")
-                self.log(f"   Ruta: {ruta_absoluta}")
-                return True
-                
-            except Exception as e:
-                self.log(f"✗ Error al escribir fondo de bloqueo: {e}")
-                return False
+            self.log(f"   Ruta: {ruta_absoluta}")
+            return True
                 
         except Exception as e:
             self.log(f"✗ Error al establecer fondo de bloqueo: {e}")
             return False
         
-        
-    
-        """Bloquea las opciones de personalización para el usuario"""
+    @medido
+    def instalar_tareas_programadas(self):
+        """Instala las tareas programadas nuevas o modificadas desde los XML del centro"""
         try:
-            archivo_fondo = None
-            
-            for ext in ['.jpg', '.png', '.jpeg']:
-                ruta = self.ruta_wallpapers / f"PC-{self.numero_pc}{ext}"
-                if ruta.exists():
-                    archivo_fondo = ruta
-                    break
-            
-            if not archivo_fondo:
-                self.log(f"✗ No se puede bloquear personalización sin archivo de fondo")
-                return False
-            
-            ruta_absoluta = str(archivo_fondo.absolute())
-            
-            # ⭐ Si somos el usuario objetivo, usar HKEY_CURRENT_USER
-            if self.soy_usuario_objetivo:
-                # Crear clave de políticas del sistema
-                key = winreg.CreateKeyEx(
-                    winreg.HKEY_CURRENT_USER,
-                    r"Software\Microsoft\Windows\CurrentVersion\Policies\System",
-                    0, 
-                    winreg.KEY_SET_VALUE
-                )
-                winreg.SetValueEx(key, "Wallpaper", 0, winreg.REG_SZ, ruta_absoluta)
-                winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, "10")
-                winreg.CloseKey(key)
-                
-                # Crear clave de políticas del explorador
-                key2 = winreg.CreateKeyEx(
-                    winreg.HKEY_CURRENT_USER,
-                    r"Software\Microsoft\Windows\CurrentVersion\Policies\Explorer",
-                    0, 
-                    winreg.KEY_SET_VALUE
-                )
-                winreg.SetValueEx(key2, "NoThemesTab", 0, winreg.REG_DWORD, 1)
-                winreg.SetValueEx(key2, "NoControlPanel", 0, winreg.REG_DWORD, 0)
-                winreg.CloseKey(key2)
-                
-                self.log("✓ Personalización bloqueada (usuario actual)")
-                return True
-            
-            # Si no somos el usuario objetivo, usar el método con SID
-            if not self.sid_objetivo:
-                self.log("✗ No se pudo obtener el SID del usuario objetivo")
-                return False
-            
-            # Asegurar que el hive esté cargado
-            if not self.asegurar_hive_cargado():
-                self.log("✗ No se pudo cargar el registro del usuario")
-                return False
-                
-            # Crear clave de políticas del sistema
-            key = winreg.CreateKeyEx(
-                winreg.HKEY_USERS,
-                f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\Policies\\System",
-                0, 
-                winreg.KEY_SET_VALUE
-            )
-            winreg.SetValueEx(key, "Wallpaper", 0, winreg.REG_SZ, ruta_absoluta)
-            winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, "10")
-            winreg.CloseKey(key)
-            
-            # Crear clave de políticas del explorador
-            key2 = winreg.CreateKeyEx(
-                winreg.HKEY_USERS,
-                f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\Policies\\Explorer",
-                0, 
-                winreg.KEY_SET_VALUE
-            )
-            winreg.SetValueEx(key2, "NoThemesTab", 0, winreg.REG_DWORD, 1)
-            winreg.SetValueEx(key2, "NoControlPanel", 0, winreg.REG_DWORD, 0)
-            winreg.CloseKey(key2)
-            
-            self.log("✓ Personalización bloqueada para usuario objetivo")
-            return True
+            assets = self.assets
+            if not assets.tareasprogramadas.existe:
+                return False, "⚠️ No existe la carpeta de tareas programadas"
+
+            archivos_xml = assets.tareas()
+            if not archivos_xml:
+                return False, "⚠️ No hay archivos XML de tareas en la carpeta"
+
+            self.log(f"\n📋 Encontrados {len(archivos_xml)} archivos de tareas programadas")
+            r = self.instalador_tareas.sincronizar(archivos_xml, log=self.log)
+
+            resumen = f"{r.instaladas} instaladas, {r.sin_cambios} sin cambios"
+            if r.eliminadas:
+                resumen += f", {r.eliminadas} obsoletas eliminadas"
+            if r.errores == 0:
+                return True, f"✓ Tareas programadas: {resumen}"
+            return True, f"⚠️ Tareas programadas: {resumen}, con errores: {r.errores}"
+
         except Exception as e:
-            self.log(f"✗ Error al bloquear personalización: {e}")
-            return False
-    def instalar_tareas_programadas(self):
-            """Instala las tareas programadas desde archivos XML del centro"""
-            import subprocess
-            
-            try:
-                carpeta_tareas = BASE_PATH.parent / "assets" / self.carpeta_centro / "tareasprogramadas"
-                
-                if not carpeta_tareas.exists():
-                    return False, "⚠️ No existe la carpeta de tareas programadas"
-                
-                archivos_xml = list(carpeta_tareas.glob("*.xml"))
-                
-                if not archivos_xml:
-                    return False, "⚠️ No hay archivos XML de tareas en la carpeta"
-                
-                self.log(f"\n📋 Encontrados {len(archivos_xml)} archivos de tareas programadas")
-                
-                exitos = 0
-                errores = 0
-                
-                for xml_file in archivos_xml:
-                    nombre_tarea = xml_file.stem
-                    self.log(f"⏱️ Instalando tarea: {nombre_tarea}")
-                    
-                    # Comando para crear tarea programada
-                    cmd = f'schtasks /Create /TN "{nombre_tarea}" /XML "{xml_file}" /F'
-                    
-                    resultado = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-                    
-                    if resultado.returncode == 0:
-                        self.log(f"   ✓ Tarea '{nombre_tarea}' instalada correctamente")
-                        exitos += 1
-                    else:
-                        self.log(f"   ❌ Error instalando '{nombre_tarea}': {resultado.stderr.strip()}")
-                        errores += 1
-                
-                if errores == 0:
-                    return True, f"✓ {exitos} tareas programadas instaladas correctamente"
-                else:
-                    return True, f"⚠️ Tareas instaladas: {exitos}, Con errores: {errores}"
-                
-            except Exception as e:
-                return False, f"❌ Error al instalar tareas: {str(e)}"
-    
+            return False, f"❌ Error al instalar tareas: {str(e)}"
+
+    @medido
     def bloquear_personalizacion(self):
         """Bloquea las opciones de personalización para el usuario"""
         try:
             # ⭐ Buscar archivo directamente en assets
-            archivo_fondo = None
-            
             self.log(f"🔍 Buscando fondo en: {self.ruta_wallpapers}")
             
-            for ext in ['.jpg', '.png', '.jpeg']:
-                ruta = self.ruta_wallpapers / f"PC-{self.numero_pc}{ext}"
-                if ruta.exists():
-                    archivo_fondo = ruta
-                    self.log(f"✓ Fondo encontrado para bloqueo: {archivo_fondo.name}")
-                    break
-            
-            if not archivo_fondo:
+            archivo_fondo = self.assets.wallpaper(self.numero_pc)
+            if archivo_fondo:
+                self.log(f"✓ Fondo encontrado para bloqueo: {archivo_fondo.name}")
+            else:
                 self.log(f"✗ No se puede bloquear personalización sin archivo de fondo")
                 return False
                 
-            if not self.sid_objetivo:
-                self.log("✗ No se pudo obtener el SID del usuario objetivo")
+            if not self.preparar_registro_usuario():
                 return False
             
-            # Asegurar que el hive esté cargado
-            if not self.asegurar_hive_cargado():
-                self.log("✗ No se pudo cargar el registro del usuario")
-                return False
-                
-            # Crear clave de políticas del sistema
-            key = winreg.CreateKeyEx(
-                winreg.HKEY_USERS,
-                f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\Policies\\System",
-                0, 
-                winreg.KEY_SET_VALUE
-            )
-            ruta_absoluta = str(archivo_fondo.absolute())
+            ruta_absoluta = str(self.fondo_optimizado(archivo_fondo).absolute())
             self.log(f"📋 Aplicando política de fondo: {ruta_absoluta}")
-            winreg.SetValueEx(key, "Wallpaper", 0, winreg.REG_SZ, ruta_absoluta)
-            winreg.SetValueEx(key, "WallpaperStyle", 0, winreg.REG_SZ, "10")  # 10 = Fill
-            winreg.CloseKey(key)
             
-            # Crear clave de políticas del explorador
-            key2 = winreg.CreateKeyEx(
-                winreg.HKEY_USERS,
-                f"{self.sid_objetivo}\\Software\\Microsoft\\Windows\\CurrentVersion\\Policies\\Explorer",
-                0, 
-                winreg.KEY_SET_VALUE
-            )
-            winreg.SetValueEx(key2, "NoThemesTab", 0, winreg.REG_DWORD, 1)
-            winreg.SetValueEx(key2, "NoControlPanel", 0, winreg.REG_DWORD, 0)
-            winreg.CloseKey(key2)
+            hive, ruta_system = self.clave_usuario(r"Software\Microsoft\Windows\CurrentVersion\Policies\System")
+            _, ruta_explorer = self.clave_usuario(r"Software\Microsoft\Windows\CurrentVersion\Policies\Explorer")
+            with self.escritura_registro() as lote:
+                # Clave de políticas del sistema
+                lote.establecer(hive, ruta_system, "Wallpaper", REG_SZ, ruta_absoluta, tarea='bloquear_personalizacion')
+                lote.establecer(hive, ruta_system, "WallpaperStyle", REG_SZ, "10", tarea='bloquear_personalizacion')  # 10 = Fill
+                # Clave de políticas del explorador
+                lote.establecer(hive, ruta_explorer, "NoThemesTab", REG_DWORD, 1, tarea='bloquear_personalizacion')
+                lote.establecer(hive, ruta_explorer, "NoControlPanel", REG_DWORD, 0, tarea='bloquear_personalizacion')
             
             self.log("✓ Personalización bloqueada para usuario objetivo")
             return True
@@ -729,8 +604,13 @@ logFile.Close
             self.log(f"✗ Error al bloquear personalización: {e}")
             return False
     
+    @medido
     def reiniciar_explorer(self):
         """Reinicia el explorador de Windows para aplicar cambios"""
+        if sys.platform != "win32":
+            # Fuera de Windows no hay explorador (y ">nul" crearía un archivo llamado nul)
+            self.log("⚠️  Reinicio del explorador omitido: solo en Windows")
+            return True
         try:
             os.system("taskkill /f /im explorer.exe >nul 2>&1")
             os.system("start /B explorer.exe")
@@ -740,14 +620,13 @@ logFile.Close
             self.log(f"✗ Error al reiniciar explorador: {e}")
             return False
     
+    @medido
     def obtener_clave_windows(self):
         """Obtiene la clave de producto de Windows"""
         try:
-            import subprocess
-            resultado = subprocess.run(
-                ['powershell', '-Command', 
-                 '(Get-WmiObject -query "select * from SoftwareLicensingService").OA3xOriginalProductKey'],
-                capture_output=True, text=True, timeout=10
+            resultado = self.ejecutor.ejecutar(
+                '(Get-WmiObject -query "select * from SoftwareLicensingService").OA3xOriginalProductKey',
+                timeout=10, idempotente=True
             )
             clave = resultado.stdout.strip()
             if clave and len(clave) > 10:
@@ -756,6 +635,7 @@ logFile.Close
         except:
             return None
     
+    @medido
     def obtener_clave_office(self):
         """Obtiene la última clave de Office instalada"""
         try:
@@ -795,6 +675,7 @@ logFile.Close
         except Exception as e:
             return None
     
+    @medido
     def cambiar_zona_horaria(self):
         """Cambia la zona horaria a UTC-07:00 (Chihuahua, La Paz, Mazatlán)"""
         if not self.es_admin:
@@ -802,12 +683,17 @@ logFile.Close
             return False
         
         try:
-            import subprocess
             # Mountain Standard Time es UTC-07:00 (Chihuahua, La Paz, Mazatlán)
-            comando = 'powershell -Command "Set-TimeZone -Id \'Mountain Standard Time\'"'
-            resultado = os.system(comando)
-            if resultado == 0:
-                self.log("✓ Zona horaria configurada (UTC-07:00)")
+            # Solo se cambia si no es ya la zona actual
+            r = self.ejecutor.ejecutar(
+                "if ((Get-TimeZone).Id -ne 'Mountain Standard Time') "
+                "{ Set-TimeZone -Id 'Mountain Standard Time'; 'cambiada' }"
+            )
+            if r.returncode == 0:
+                if 'cambiada' in r.stdout:
+                    self.log("✓ Zona horaria configurada (UTC-07:00)")
+                else:
+                    self.log("✓ Zona horaria ya configurada (UTC-07:00)")
                 return True
             else:
                 self.log("✗ Error al cambiar zona horaria")
@@ -816,6 +702,7 @@ logFile.Close
             self.log(f"✗ Error al cambiar zona horaria: {e}")
             return False
     
+    @medido
     def activar_windows(self):
         if not self.es_admin:
             self.log("⚠️  Activación omitida (requiere permisos de administrador)")
@@ -835,6 +722,75 @@ logFile.Close
             self.log(f"✗ Error al activar: {e}")
             return False
     
+    def planificar_tareas(self, opciones):
+        """
+        Grafo de tareas de una configuración completa.
+        Las tareas de registro comparten el hive del usuario y se aplican
+        juntas en 'registro'; el explorador solo se reinicia después.
+        """
+        planificador = PlanificadorTareas(max_hilos=4, callback=self.log)
+        
+        # Cambiar zona horaria automáticamente (salvo en el modo multiusuario, que la hace una vez)
+        if opciones.get('zona_horaria', True):
+            planificador.agregar('zona_horaria', self.cambiar_zona_horaria, cuenta=False)
+        
+        if opciones.get('activar_windows', False):
+            planificador.agregar('activar_windows', self.activar_windows)
+        
+        # Los assets se copian al equipo antes de que el registro apunte a ellos
+        planificador.agregar('assets', self.preparar_assets, cuenta=False)
+        
+        # Los valores del perfil del centro se aplican siempre que los declare; el modo
+        # multiusuario aplica los de HKLM solo en la pasada de equipo
+        ambito_perfil = (opciones.get('registro_perfil_usuario', True), opciones.get('registro_perfil_equipo', True))
+        tareas_registro = [
+            ('tema_oscuro', self.establecer_tema_oscuro),
+            ('fondo_pantalla', self.establecer_fondo_pantalla),
+            ('fondo_bloqueo', self.establecer_fondo_bloqueo),
+            ('bloquear_personalizacion', self.bloquear_personalizacion),
+            ('registro_perfil', lambda: self.aplicar_registro_perfil(*ambito_perfil)),
+        ]
+        por_defecto = {'registro_perfil': bool(self.valores_perfil(*ambito_perfil))}
+        seleccionadas = [nombre for nombre, _ in tareas_registro
+                         if opciones.get(nombre, por_defecto.get(nombre, False))]
+        for nombre, funcion in tareas_registro:
+            if nombre in seleccionadas:
+                planificador.agregar(nombre, funcion, depende=['assets'], recursos=['hive_usuario'])
+        planificador.agregar('registro', lambda: self.aplicar_lote(self.lote),
+                             depende=seleccionadas, recursos=['hive_usuario', 'explorador'], cuenta=False)
+        
+        if opciones.get('instalar_tareas'):
+            planificador.agregar('instalar_tareas', self.instalar_y_reportar_tareas, depende=['assets'])
+        
+        if opciones.get('optimizar_arranque', False):
+            planificador.agregar('optimizar_arranque', self.optimizar_arranque)
+        
+        if opciones.get('reiniciar_explorer', False):
+            planificador.agregar('reiniciar_explorer', self.reiniciar_explorer_si_hay_cambios,
+                                 depende=['registro'], recursos=['explorador'], cuenta=False)
+        
+        if opciones.get('mostrar_keys', False):
+            planificador.agregar('clave_windows', self.obtener_clave_windows, cuenta=False)
+            planificador.agregar('clave_office', self.obtener_clave_office, cuenta=False)
+        
+        return planificador
+    
+    def instalar_y_reportar_tareas(self):
+        self.log("\n" + "="*50)
+        self.log("INSTALANDO TAREAS PROGRAMADAS")
+        self.log("="*50)
+        exito, msg = self.instalar_tareas_programadas()
+        self.log(msg)
+        return exito
+    
+    def reiniciar_explorer_si_hay_cambios(self):
+        lote = self.lote
+        if lote is not None and lote.resultados and lote.cumple():
+            self.log("✓ Sin cambios en el registro: no es necesario reiniciar el explorador")
+            return True
+        return self.reiniciar_explorer()
+    
+    @medido
     def aplicar_configuracion_completa(self, opciones):
         """Aplica las configuraciones seleccionadas"""
         self.log(f"\n{'='*50}")
@@ -845,216 +801,246 @@ logFile.Close
             self.log("⚠️  NOTA: Ejecutando sin permisos de administrador")
             self.log("   Algunas funciones estarán limitadas\n")
         
-        # Cambiar zona horaria automáticamente (sin opción de selección)
-        self.cambiar_zona_horaria()
-        
-        exitosos = 0
-        total = 0
-        
-        # Contar solo las tareas de configuración real (excluir mostrar_keys y reiniciar_explorer)
-        tareas_configuracion = ['activar_windows', 'tema_oscuro', 'fondo_pantalla', 
-                                'fondo_bloqueo', 'bloquear_personalizacion', 'optimizar_arranque',
-                                'instalar_tareas']
-        total = sum(1 for key in tareas_configuracion if opciones.get(key, False))
+        planificador = self.planificar_tareas(opciones)
+        medicion = instrumentacion.activa()
+        inicio_medicion = medicion.instantanea() if medicion else None
         
-        if opciones.get('activar_windows', False):
-            if self.activar_windows(): exitosos += 1
+        # El hive se suelta al terminar; el lote se aplica en la tarea 'registro'
+        self.lote = RegistryBatch(self.backend_registro)
+        lote = self.lote
+        try:
+            with self.hive_usuario():
+                try:
+                    resultados = planificador.ejecutar()
+                finally:
+                    # Lo que quedó sin aplicar se escribe antes de soltar el hive
+                    if lote.pendientes():
+                        self.aplicar_lote(lote)
+        finally:
+            self.lote = None
+        self.lote_aplicado = lote
         
-        if opciones.get('tema_oscuro', False):
-            if self.establecer_tema_oscuro(): exitosos += 1
-            
-        if opciones.get('fondo_pantalla', False):
-            if self.establecer_fondo_pantalla(): exitosos += 1
-            
-        if opciones.get('fondo_bloqueo', False):
-            if self.establecer_fondo_bloqueo(): exitosos += 1
-            
-        if opciones.get('bloquear_personalizacion', False):
-            if self.bloquear_personalizacion(): exitosos += 1
-
-        if opciones.get('instalar_tareas'):
-            self.log("\n" + "="*50)
-            self.log("INSTALANDO TAREAS PROGRAMADAS")
-            self.log("="*50)
-            exito, msg = self.instalar_tareas_programadas()
-            self.log(msg)
-            if exito:
-                exitosos += 1
-
-        if opciones.get('optimizar_arranque', False):
-            if self.optimizar_arranque(): exitosos += 1
+        # Una tarea de registro solo cuenta si además se escribieron sus claves
+        fallidas = lote.tareas_fallidas()
+        for tarea in fallidas:
+            if tarea in resultados:
+                planificador.resultados[tarea] = False
+        exitosos, total = planificador.exitosos()
 
         self.log(f"\n{'='*50}")
         self.log(f"Completado: {exitosos}/{total} tareas exitosas")
         self.log(f"{'='*50}\n")
 
-        if opciones.get('reiniciar_explorer', False):
-            self.reiniciar_explorer()
-        
         # Mostrar claves de producto al final si está habilitado
         if opciones.get('mostrar_keys', False):
             self.log("\n📋 Claves de Producto:")
-            clave_windows = self.obtener_clave_windows()
+            clave_windows = resultados.get('clave_windows')
             if clave_windows:
                 self.log(f"   Windows Key: {clave_windows}")
             else:
                 self.log("   Windows Key: No disponible o no activado")
             
-            clave_office = self.obtener_clave_office()
+            clave_office = resultados.get('clave_office')
             if clave_office:
                 self.log(f"   Office Key: {clave_office}")
             else:
                 self.log("   Office Key: No disponible o no activado")
         
+        if medicion:
+            self.informar_instrumentacion(medicion, inicio_medicion, planificador)
+        
         return exitosos, total
     
-    def optimizar_arranque(self):
-        """Deshabilita programas comunes de inicio para mejorar el arranque"""
-        if not self.es_admin:
-            self.log("⚠️ Optimización de arranque omitida (requiere permisos de administrador)")
-            return False
-
-        self.log("⏳ Optimizando programas de arranque...")
-
-        claves_run = [
-            (winreg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Run"),
-            (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Run")
-        ]
-
-        claves_startup_approved = [
-            (winreg.HKEY_LOCAL_MACHINE, r"Software\Microsoft\Windows\CurrentVersion\Explorer\StartupApproved\Run"),
-            (winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Windows\CurrentVersion\Explorer\StartupApproved\Run")
-        ]
-
-        patrones_bloqueados = [
-            "onedrive",
-            "teams",
-            "msedge",
-            "edge",
-            "adobe",
-            "google",
-            "java",
-            "spotify",
-            "zoom",
-            "updater"
-            "CCXProcess",
-            "discord",
-            "steam",
-            "epicgameslauncher",
-            "battlenet",
-            "spotify",
-            "apple",
-            "itunes",
-            "quicktime",
-            "dropbox",
-            "skype",
-            "microsoft 365 Copilot",
-            "mobile device",
-            "jusched"
-        ]
+    def informar_instrumentacion(self, medicion, inicio, planificador):
+        """Resumen de tiempos y procesos de la ejecución (en el log y en JSON)"""
+        resumen = medicion.resumen(desde=inicio)
+        resumen["pc"] = self.numero_pc
+        resumen["usuario"] = self.usuario_objetivo
+        resumen["tareas"] = {n: round(s, 4) for n, s in planificador.duraciones.items()}
+        self.instrumentacion = resumen
+        self.log("\n📊 Instrumentación:")
+        for linea in instrumentacion.lineas_resumen(resumen):
+            self.log(linea)
+        ruta = medicion.guardar(resumen, f"PC-{self.numero_pc}-{self.usuario_objetivo}")
+        if ruta:
+            self.log(f"   Informe: {ruta}")
+        return resumen
+    
+    def escaner_arranque(self, ambitos=None):
+        """Escáner de las ubicaciones de inicio con las reglas del perfil del centro"""
+        return EscanerArranque(Reglas.de_perfil(self.perfil), self.backend_registro, ambitos)
 
-        patrones_protegidos = [
-            "defender",
-            "security",
-            "intel",
-            "realtek",
-            "synaptics",
-            "audio",
-            "graphics",
-            "nvidia",
-            "amd"
-        ]
+    def ambitos_arranque(self):
+        """(usuario, Ambito, SID a montar o None): equipo, usuario actual y demás usuarios reales"""
+        equipo, actual = ambitos_por_defecto()
+        ambitos = [("Equipo", equipo, None), (self.usuario_actual, actual, None)]
+        for u in self.inventario.usuarios_reales():
+            if u.nombre.lower() == self.usuario_actual.lower():
+                continue
+            carpeta = carpeta_inicio(Path(u.perfil) / "AppData" / "Roaming") if u.perfil else None
+            ambitos.append((u.nombre, Ambito(HKEY_USERS, f"{u.sid}\\", carpeta), u.sid))
+        return ambitos
 
+    def optimizar_ambito(self, usuario, ambito):
+        """Aplica las reglas a un ámbito ya accesible; devuelve (ResumenArranque, entradas deshabilitadas)"""
+        escaner = self.escaner_arranque([ambito])
+        inventario = escaner.escanear()
+        eliminar, deshabilitar = cambios_propuestos(inventario)
         eliminados = 0
 
-        # 🔹 LIMPIAR Run
-        for hive, ruta in claves_run:
+        # 🔹 LIMPIAR Run (una apertura por clave; un valor que falla no detiene el resto)
+        for (hive, ruta), nombres in eliminar.items():
             try:
-                key = winreg.OpenKey(hive, ruta, 0, winreg.KEY_ALL_ACCESS)
-                valores = []
-                i = 0
-                while True:
-                    try:
-                        valores.append(winreg.EnumValue(key, i))
-                        i += 1
-                    except OSError:
-                        break
-
-                for nombre, valor, _ in valores:
-                    texto = f"{nombre} {valor}".lower()
-
-                    if (
-                        any(p in texto for p in patrones_bloqueados)
-                        and not any(p in texto for p in patrones_protegidos)
-                    ):
-                        winreg.DeleteValue(key, nombre)
-                        self.log(f"   ⛔ Inicio deshabilitado: {nombre}")
+                clave = self.backend_registro.abrir(hive, ruta)
+                try:
+                    for nombre in nombres:
+                        try:
+                            self.backend_registro.eliminar(clave, nombre)
+                        except Exception as e:
+                            self.log(f"✗ Error eliminando {nombre} ({usuario}): {e}")
+                            continue
+                        self.log(f"   ⛔ Inicio deshabilitado ({usuario}): {nombre}")
                         eliminados += 1
-
-                winreg.CloseKey(key)
-            except FileNotFoundError:
-                continue
+                finally:
+                    self.backend_registro.cerrar(clave)
             except Exception as e:
-                self.log(f"✗ Error optimizando Run: {e}")
+                self.log(f"✗ Error optimizando Run ({usuario}): {e}")
 
         # 🔹 DESHABILITAR StartupApproved (Windows 10/11)
-        for hive, ruta in claves_startup_approved:
-            try:
-                key = winreg.OpenKey(hive, ruta, 0, winreg.KEY_ALL_ACCESS)
-                valores = []
-                i = 0
-                while True:
-                    try:
-                        valores.append(winreg.EnumValue(key, i)[0])
-                        i += 1
-                    except OSError:
-                        break
+        # Lote propio: el hive del usuario debe seguir montado al escribir
+        try:
+            resultados = lote_deshabilitar(self.backend_registro, deshabilitar, tarea='optimizar_arranque').flush()
+            escritas = set()
+            for r in resultados:
+                if r.error:
+                    self.log(f"✗ Error optimizando {nombre_clave(r.hive, r.ruta)} ({usuario}): {r.error}")
+                else:
+                    escritas.add((r.hive, r.ruta))
+            # Solo se informa lo que quedó escrito
+            for entrada in deshabilitar:
+                if entrada.tipo == APROBADO and (entrada.hive, entrada.aprobacion) in escritas:
+                    self.log(f"   🚫 Startup deshabilitado ({usuario}): {entrada.nombre}")
+                    eliminados += 1
+        except Exception as e:
+            self.log(f"✗ Error optimizando StartupApproved ({usuario}): {e}")
 
-                for nombre in valores:
-                    nombre_l = nombre.lower()
+        despues = escaner.escanear().activas() if eliminados else inventario.activas()
+        return ResumenArranque(usuario, inventario.activas(), despues, None), eliminados
 
-                    if (
-                        any(p in nombre_l for p in patrones_bloqueados)
-                        and not any(p in nombre_l for p in patrones_protegidos)
-                    ):
-                        # 03 00 00 00 = deshabilitado
-                        winreg.SetValueEx(
-                            key,
-                            nombre,
-                            0,
-                            winreg.REG_BINARY,
-                            b"\x03\x00\x00\x00\x00\x00\x00\x00"
-                        )
-                        self.log(f"   🚫 Startup deshabilitado: {nombre}")
-                        eliminados += 1
+    def en_ambito_usuario(self, usuario, sid, funcion, sin_registro):
+        """funcion() con el hive del usuario montado (si sid); sin_registro si no se pudo cargar"""
+        if sid is None:
+            return funcion()
+        # Referencia propia: las tareas de registro del usuario objetivo tienen la suya
+        if not self.adquirir_hive(usuario, sid):
+            return sin_registro
+        try:
+            return funcion()
+        finally:
+            self.hives.liberar(sid, log=self.log)
 
-                winreg.CloseKey(key)
-            except FileNotFoundError:
-                continue
-            except Exception as e:
-                self.log(f"✗ Error optimizando StartupApproved: {e}")
+    def optimizar_usuario_arranque(self, usuario, ambito, sid):
+        """optimizar_ambito con el hive del usuario montado durante el análisis y la escritura"""
+        return self.en_ambito_usuario(usuario, sid, lambda: self.optimizar_ambito(usuario, ambito),
+                                      (ResumenArranque(usuario, None, None, "no se pudo cargar su registro"), 0))
+
+    @medido
+    def analizar_arranque(self, tiempos=None, max_hives=2):
+        """
+        InformeImpacto de los programas de arranque de todos los ámbitos, con
+        las diferencias que aplicaría optimizar_arranque. No modifica nada.
+        `tiempos` ({ejecutable: ms}) sustituye a los que registró Windows.
+        """
+        if tiempos is None:
+            tiempos = tiempos_arranque(self.ejecutor)
+        ambitos = self.ambitos_arranque()
+        if not self.es_admin:
+            self.log("⚠️ Sin permisos de administrador solo se analizan el equipo y el usuario actual")
+            ambitos = [a for a in ambitos if a[2] is None]
+
+        def analizar(usuario, ambito, sid):
+            def ambito_montado():
+                inventario = self.escaner_arranque([ambito]).escanear()
+                return evaluar(usuario, inventario, tiempos), diferencias(inventario, self.backend_registro)
+            return self.en_ambito_usuario(usuario, sid, ambito_montado, ([], []))
 
+        with ThreadPoolExecutor(max_workers=max(1, max_hives)) as pool:
+            resultados = list(pool.map(lambda a: analizar(*a), ambitos))
+        return InformeImpacto([e for entradas, _ in resultados for e in entradas],
+                              [c for _, cambios in resultados for c in cambios])
+
+    @medido
+    def optimizar_arranque(self, max_hives=2):
+        """
+        Deshabilita programas comunes de inicio para mejorar el arranque:
+        equipo (HKLM), usuario actual y el registro de los demás usuarios
+        reales, con `max_hives` hives de usuario cargados a la vez.
+        """
+        if not self.es_admin:
+            self.log("⚠️ Optimización de arranque omitida (requiere permisos de administrador)")
+            return False
+
+        self.log("⏳ Optimizando programas de arranque...")
+        ambitos = self.ambitos_arranque()
+        with ThreadPoolExecutor(max_workers=max(1, max_hives)) as pool:
+            resultados = list(pool.map(lambda a: self.optimizar_usuario_arranque(*a), ambitos))
+
+        self.resumen_arranque = [resumen for resumen, _ in resultados]
+        eliminados = sum(n for _, n in resultados)
+        self.log("   Programas de inicio por usuario (antes → después):")
+        for r in self.resumen_arranque:
+            self.log(f"      {r.usuario:<24} {f'✗ {r.error}' if r.error else f'{r.antes} → {r.despues}'}")
         self.log(f"✓ Optimización completada ({eliminados} entradas deshabilitadas)")
         return True
 
     
-    def __init__(self, numero_pc, carpeta_centro='CID-Centro_Computo', usuario_objetivo=None, callback=None):
+    def __init__(self, numero_pc, carpeta_centro='CID-Centro_Computo', usuario_objetivo=None, callback=None,
+                 ejecutor=None, inventario=None, resolvedor=None, backend_registro=None, hives=None,
+                 preprocesador=None, staging=None, instalador_tareas=None):
         self.numero_pc = numero_pc
         self.carpeta_centro = carpeta_centro
-        carpeta_base = BASE_PATH.parent / "assets" / carpeta_centro
-        self.ruta_wallpapers = carpeta_base / "wallpapers"
-        self.ruta_lockscreen = carpeta_base / "lockscreen"
+        self.carpeta_assets = BASE_PATH.parent / "assets" / carpeta_centro
+        self.ruta_wallpapers = self.carpeta_assets / "wallpapers"
+        self.ruta_lockscreen = self.carpeta_assets / "lockscreen"
         self.es_admin = self.verificar_admin()
         self.callback = callback
         
-        # Variables para manejo de hive
-        self.hive_cargado = False
-        self.sid_temporal = None
-        self.sid_objetivo_original = None
+        # Sesión PowerShell compartida (evita un powershell.exe por consulta)
+        self.ejecutor = ejecutor or obtener_ejecutor()
+        # Inventario de usuarios locales compartido (SIDs y perfiles sin procesos extra)
+        self.inventario = inventario or obtener_inventario(ejecutor)
+        # Resolución de SIDs: advapi32 nativo con inventario y PowerShell/WMIC de respaldo
+        self.resolvedor = resolvedor or resolvedor_por_defecto(self.inventario, self.ejecutor, callback)
+        
+        # Escrituras de registro (winreg o en memoria para pruebas) y lote activo
+        self.backend_registro = backend_registro or backend_por_defecto()
+        self.lote = None
+        self.lote_aplicado = None
+        self.resumen_arranque = []
+        # Tareas programadas: solo se instalan las nuevas o modificadas
+        self.instalador_tareas = instalador_tareas or InstaladorTareas()
+        # Resumen de la última ejecución si la instrumentación está activa
+        self.instrumentacion = None
+        
+        # Fondos pre-transcodificados (None si Pillow no está disponible)
+        self.preprocesador = preprocesador or obtener_preprocesador()
+        self._fondos_optimizados = {}
+        
+        # Perfil del centro compilado (se carga al planificar)
+        self._perfil = None
         
-        # Carpeta para almacenar fondos de pantalla
-        self.ruta_pictures = Path.home() / "Fondos"
-        self.ruta_pictures.mkdir(parents=True, exist_ok=True)
+        # Copia local de los assets cuando vienen de USB/red (False para desactivarla)
+        self.staging = obtener_sincronizador() if staging is None else staging
+        
+        # Hives de usuario con conteo de referencias (compartido entre configuradores)
+        self.hives = hives or obtener_gestor_hives()
+        self.hives_montados = set()
+        self._lock_hives = threading.Lock()
+        
+        # Carpeta para almacenar fondos de pantalla (se crea al usarla)
+        self._ruta_pictures = Path.home() / "Fondos"
+        # Carpeta de temas del usuario actual (la de Windows guarda ahí el fondo de bloqueo)
+        self.ruta_temas = Path.home() / "AppData/Local/Microsoft/Windows/Themes"
 
         # Usuario objetivo y su SID
         self.usuario_objetivo = usuario_objetivo or getpass.getuser()
@@ -1063,168 +1049,57 @@ logFile.Close
         self.usuario_actual = getpass.getuser()
         self.soy_usuario_objetivo = (self.usuario_actual.lower() == self.usuario_objetivo.lower())
         
+        # El SID se resuelve la primera vez que una tarea lo necesita (sid_objetivo)
+        self._sid_objetivo = None
+        self._sid_pendiente = not self.soy_usuario_objetivo
+        self._lock_sid = threading.Lock()
+        
         if self.soy_usuario_objetivo:
             self.log(f"✓ Ejecutando como usuario objetivo: '{self.usuario_objetivo}'")
             self.log(f"   Se aplicarán cambios directamente (sin cargar hive)")
-            # Para el usuario actual, usar HKEY_CURRENT_USER directamente
-            self.sid_objetivo = None  # No necesitamos SID
-        else:
-            self.log(f"🔍 Obteniendo SID para usuario: '{self.usuario_objetivo}'")
-            self.sid_objetivo = self.obtener_sid_usuario(self.usuario_objetivo)
-            
-            if not self.sid_objetivo:
-                self.log(f"⚠️  ADVERTENCIA: No se pudo obtener el SID de '{self.usuario_objetivo}'")
+    
+    @property
+    def sid_objetivo(self):
+        """SID del usuario objetivo (None si somos él o no se encontró)"""
+        if self._sid_pendiente:
+            with self._lock_sid:
+                if self._sid_pendiente:
+                    self.log(f"🔍 Obteniendo SID para usuario: '{self.usuario_objetivo}'")
+                    self._sid_objetivo = self.obtener_sid_usuario(self.usuario_objetivo)
+                    self._sid_pendiente = False
+                    if not self._sid_objetivo:
+                        self.log(f"⚠️  ADVERTENCIA: No se pudo obtener el SID de '{self.usuario_objetivo}'")
+        return self._sid_objetivo
+    
+    @sid_objetivo.setter
+    def sid_objetivo(self, sid):
+        self._sid_objetivo = sid
+        self._sid_pendiente = False
+    
+    @property
+    def ruta_pictures(self):
+        """Carpeta ~/Fondos; se crea la primera vez que se usa"""
+        self._ruta_pictures.mkdir(parents=True, exist_ok=True)
+        return self._ruta_pictures
 
     def cargar_registro_usuario(self, nombre_usuario):
-        """Carga el hive de registro del usuario si no está cargado"""
-        try:
-            # Obtener la ruta del perfil del usuario
-            cmd = [
-                "powershell",
-                "-NoProfile",
-                "-Command",
-                f"(Get-LocalUser -Name '{nombre_usuario}').SID.Value"
-            ]
-            r = subprocess.run(cmd, capture_output=True, text=True)
-            sid = r.stdout.strip()
-            
-            if not sid or not sid.startswith('S-1-5-'):
-                return False
-            
-            # Verificar si ya está cargado en HKEY_USERS
-            try:
-                test_key = winreg.OpenKey(
-                    winreg.HKEY_USERS,
-                    f"{sid}",
-                    0,
-                    winreg.KEY_READ
-                )
-                winreg.CloseKey(test_key)
-                self.log(f"✓ Registro del usuario '{nombre_usuario}' ya está cargado")
-                return True
-            except FileNotFoundError:
-                # El registro no está cargado, intentar cargarlo
-                self.log(f"⏳ Cargando registro del usuario '{nombre_usuario}'...")
-                
-                # Obtener ruta del perfil
-                cmd_profile = [
-                    "powershell",
-                    "-NoProfile",
-                    "-Command",
-                    f"(Get-ItemProperty 'HKLM:\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\ProfileList\\{sid}').ProfileImagePath"
-                ]
-                r = subprocess.run(cmd_profile, capture_output=True, text=True)
-                profile_path = r.stdout.strip()
-                
-                if profile_path:
-                    ntuser_path = f"{profile_path}\\NTUSER.DAT"
-                    # Cargar el hive
-                    os.system(f'reg load "HKU\\{sid}" "{ntuser_path}"')
-                    self.log(f"✓ Registro cargado para '{nombre_usuario}'")
-                    return True
-            
-            return False
-            
-        except Exception as e:
-            self.log(f"✗ Error cargando registro: {e}")
+        """Carga el hive de registro de otro usuario bajo HKU\\<SID>"""
+        sid = self.obtener_sid_usuario(nombre_usuario) or ""
+        if not sid.startswith('S-1-5-'):
             return False
+        return self.montar_hive(nombre_usuario, sid)
         
     def cargar_hive_usuario(self, nombre_usuario, sid):
         """Carga el hive de registro del usuario si no está cargado"""
-        try:
-            # Verificar si ya está cargado
-            try:
-                test_key = winreg.OpenKey(
-                    winreg.HKEY_USERS,
-                    f"{sid}",
-                    0,
-                    winreg.KEY_READ
-                )
-                winreg.CloseKey(test_key)
-                self.log(f"✓ Registro de '{nombre_usuario}' ya está cargado")
-                return True
-            except FileNotFoundError:
-                pass  # No está cargado, continuar
-            
-            self.log(f"⏳ Cargando registro de '{nombre_usuario}'...")
-            
-            # Intentar varias rutas posibles para el perfil
-            posibles_rutas = [
-                f"C:\\Users\\{nombre_usuario}",
-                f"C:\\Users\\{nombre_usuario}.{os.environ.get('COMPUTERNAME', '')}",
-            ]
-            
-            # También intentar obtener desde el registro
-            try:
-                cmd_profile = [
-                    "powershell",
-                    "-NoProfile",
-                    "-Command",
-                    f"(Get-ItemProperty 'HKLM:\\SOFTWARE\\Microsoft\\Windows NT\\CurrentVersion\\ProfileList\\{sid}' -ErrorAction SilentlyContinue).ProfileImagePath"
-                ]
-                r = subprocess.run(cmd_profile, capture_output=True, text=True)
-                if r.stdout.strip():
-                    posibles_rutas.insert(0, r.stdout.strip())
-            except:
-                pass
-            
-            ntuser_path = None
-            for ruta in posibles_rutas:
-                test_path = Path(ruta) / "NTUSER.DAT"
-                if test_path.exists():
-                    ntuser_path = str(test_path)
-                    self.log(f"✓ Encontrado NTUSER.DAT en: {ntuser_path}")
-                    break
-            
-            if not ntuser_path:
-                self.log(f"✗ No se encontró NTUSER.DAT en ninguna ubicación")
-                self.log(f"  Rutas buscadas: {posibles_rutas}")
-                return False
-            
-            # Cargar el hive con reg load
-            temp_key = f"TempUser_{sid.split('-')[-1]}"  # Usar último segmento del SID
-            cmd_load = f'reg load "HKU\\{temp_key}" "{ntuser_path}"'
-            
-            self.log(f"⏳ Ejecutando: {cmd_load}")
-            resultado = os.system(cmd_load + " >nul 2>&1")
-            
-            if resultado == 0:
-                self.log(f"✓ Registro cargado temporalmente como '{temp_key}'")
-                self.sid_temporal = temp_key
-                self.sid_objetivo_original = self.sid_objetivo
-                self.sid_objetivo = temp_key
-                self.hive_cargado = True
-                return True
-            else:
-                self.log(f"✗ Error al cargar registro (código {resultado})")
-                return False
-                
-        except Exception as e:
-            self.log(f"✗ Error al cargar hive: {e}")
-            import traceback
-            self.log(traceback.format_exc())
-            return False
+        return self.montar_hive(nombre_usuario, sid)
 
     def descargar_hive_usuario(self):
-        """Descarga el hive temporal del registro"""
-        if not hasattr(self, 'hive_cargado') or not self.hive_cargado:
-            return
-        
-        try:
-            self.log(f"⏳ Descargando registro temporal...")
-            cmd_unload = f'reg unload "HKU\\{self.sid_temporal}"'
-            resultado = os.system(cmd_unload)
-            
-            if resultado == 0:
-                self.log(f"✓ Registro descargado correctamente")
-                # Restaurar SID original
-                self.sid_objetivo = self.sid_objetivo_original
-                self.hive_cargado = False
-            else:
-                self.log(f"⚠️  Error al descargar registro (código {resultado})")
-                
-        except Exception as e:
-            self.log(f"⚠️  Error al descargar hive: {e}")
+        """Suelta todos los hives montados por este configurador"""
+        with self._lock_hives:
+            sids = list(self.hives_montados)
+            self.hives_montados.clear()
+        for sid in sids:
+            self.hives.liberar(sid, log=self.log)
 
     def limpiar_fondos_anteriores(self):
         """
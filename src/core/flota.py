@@ -0,0 +1,167 @@
+"""
+Coordinador de la flota
+Configura todos los equipos de un laboratorio a la vez: reparte los números
+de PC según una lista de equipos y envía a cada agente (agente.py) sus
+opciones y la ubicación de los assets, con un máximo de equipos en curso.
+
+Lista de equipos (texto, una línea por equipo; # para comentarios):
+    LAB-01            -> PC siguiente libre, puerto por defecto
+    LAB-02,7          -> PC-7
+    10.0.0.15:9000,8  -> PC-8 en el puerto 9000
+
+o JSON: [{"host": "LAB-01", "pc": 1, "puerto": 8750}, ...]
+"""
+
+import asyncio
+import json
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from .agente import PUERTO_DEFECTO, ErrorAgente, solicitar, token_por_defecto
+
+Equipo = namedtuple("Equipo", ["host", "puerto", "pc"])
+ResultadoEquipo = namedtuple("ResultadoEquipo", ["equipo", "exitosos", "total", "error", "segundos"])
+
+
+def asignar_numeros(entradas, primero=1):
+    """Equipos a partir de (host, puerto, pc o None): los sin número toman el siguiente libre"""
+    usados = {pc for _, _, pc in entradas if pc is not None}
+    if len(usados) < sum(1 for _, _, pc in entradas if pc is not None):
+        raise ValueError("Hay números de PC repetidos en la lista de equipos")
+    equipos = []
+    siguiente = primero
+    for host, puerto, pc in entradas:
+        if pc is None:
+            while siguiente in usados:
+                siguiente += 1
+            pc = siguiente
+            usados.add(pc)
+        equipos.append(Equipo(host, puerto or PUERTO_DEFECTO, pc))
+    return equipos
+
+
+def leer_lista_equipos(ruta, primero=1):
+    """Lista de equipos de un archivo de texto o JSON"""
+    texto = Path(ruta).read_text(encoding="utf-8-sig")
+    if texto.lstrip().startswith("["):
+        entradas = [(e["host"], e.get("puerto"), e.get("pc")) for e in json.loads(texto)]
+        return asignar_numeros(entradas, primero)
+
+    entradas = []
+    for numero, linea in enumerate(texto.splitlines(), 1):
+        linea = linea.split("#", 1)[0].strip()
+        if not linea:
+            continue
+        direccion, _, pc = (p.strip() for p in linea.partition(","))
+        host, _, puerto = direccion.rpartition(":") if ":" in direccion else (direccion, "", "")
+        try:
+            entradas.append((host, int(puerto) if puerto else None, int(pc) if pc else None))
+        except ValueError:
+            raise ValueError(f"Línea {numero} no válida: {linea}") from None
+    return asignar_numeros(entradas, primero)
+
+
+class InformeFlota:
+    """Resultado por equipo, en el orden de la lista"""
+
+    def __init__(self, resultados, segundos):
+        self.resultados = resultados
+        self.segundos = segundos
+
+    def totales(self):
+        """(equipos correctos, equipos)"""
+        correctos = sum(1 for r in self.resultados if not r.error and r.exitosos == r.total)
+        return correctos, len(self.resultados)
+
+    def lineas(self):
+        lineas = []
+        for r in self.resultados:
+            estado = f"{r.exitosos}/{r.total}" if not r.error else f"✗ {r.error}"
+            lineas.append(f"   PC-{r.equipo.pc:<4} {r.equipo.host:<24} {estado:<20} {r.segundos:.1f} s")
+        return lineas
+
+
+class CoordinadorFlota:
+    """
+    Envía el trabajo de cada equipo a su agente con `limite` equipos en
+    curso a la vez. El log de cada agente llega al callback con el prefijo
+    [PC-n]; `al_progreso(progreso)` recibe los contadores de equipos cada
+    vez que uno cambia de estado.
+    """
+
+    def __init__(self, equipos, carpeta_centro='CID-Centro_Computo', opciones=None, assets=None,
+                 token=None, limite=8, callback=None, al_progreso=None, timeout_conexion=10):
+        self.equipos = list(equipos)
+        self.carpeta_centro = carpeta_centro
+        self.opciones = opciones or {}
+        self.assets = str(assets) if assets else None
+        self.token = token or token_por_defecto()
+        self.limite = max(1, limite)
+        self.callback = callback
+        self.al_progreso = al_progreso
+        self.timeout_conexion = timeout_conexion
+        self.estados = {}
+
+    def log(self, mensaje):
+        if self.callback:
+            self.callback(mensaje)
+
+    def progreso(self):
+        cuenta = {"total": len(self.equipos), "pendientes": 0, "en_curso": 0, "correctos": 0, "con_errores": 0}
+        for estado in self.estados.values():
+            cuenta[estado] += 1
+        return cuenta
+
+    def _cambiar_estado(self, equipo, estado):
+        self.estados[equipo.pc] = estado
+        if self.al_progreso:
+            self.al_progreso(self.progreso())
+
+    def trabajo(self, equipo):
+        return {"tipo": "configurar", "token": self.token, "pc": equipo.pc, "centro": self.carpeta_centro,
+                "opciones": self.opciones, "assets": self.assets}
+
+    async def configurar_equipo(self, equipo, semaforo):
+        async with semaforo:
+            self._cambiar_estado(equipo, "en_curso")
+            inicio = time.perf_counter()
+            exitosos, total, error = 0, 0, None
+            prefijo = f"[PC-{equipo.pc}] "
+            try:
+                exitosos, total = await solicitar(equipo.host, equipo.puerto, self.trabajo(equipo),
+                                                  lambda m: self.log(prefijo + m.lstrip("\n")),
+                                                  self.timeout_conexion)
+            except ErrorAgente as e:
+                error = str(e)
+
+            resultado = ResultadoEquipo(equipo, exitosos, total, error, round(time.perf_counter() - inicio, 3))
+            correcto = not error and exitosos == total
+            self._cambiar_estado(equipo, "correctos" if correcto else "con_errores")
+            p = self.progreso()
+            self.log(f"{'✅' if correcto else '❌'} {prefijo.strip()} {error or f'{exitosos}/{total} tareas'} · "
+                     f"{p['correctos'] + p['con_errores']}/{p['total']} equipos terminados")
+            return resultado
+
+    async def ejecutar(self):
+        """Configura todos los equipos y devuelve un InformeFlota"""
+        inicio = time.perf_counter()
+        semaforo = asyncio.Semaphore(self.limite)
+        for equipo in self.equipos:
+            self.estados[equipo.pc] = "pendientes"
+        self.log(f"🖧 Configurando {len(self.equipos)} equipo(s), {min(self.limite, len(self.equipos))} a la vez")
+        resultados = await asyncio.gather(*(self.configurar_equipo(e, semaforo) for e in self.equipos))
+        informe = InformeFlota(list(resultados), round(time.perf_counter() - inicio, 3))
+
+        correctos, total = informe.totales()
+        self.log(f"\n{'='*50}")
+        self.log("Resumen por equipo:")
+        for linea in informe.lineas():
+            self.log(linea)
+        self.log(f"Completado: {correctos}/{total} equipos sin errores en {informe.segundos:.1f} s")
+        self.log(f"{'='*50}\n")
+        return informe
+
+    def aplicar(self):
+        """Versión bloqueante de ejecutar() (CLI, hilo de la interfaz)"""
+        return asyncio.run(self.ejecutar())
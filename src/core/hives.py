@@ -0,0 +1,221 @@
+"""
+Carga y descarga de hives de usuario (NTUSER.DAT) en HKEY_USERS
+GestorHives cuenta referencias por SID: el hive se carga con la primera
+referencia, se comparte entre tareas y usuarios y se descarga al soltar
+la última (o al salir del programa, aunque sea por un error).
+"""
+
+import atexit
+import gc
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+from .instrumentacion import esperar, registrar
+from .powershell import CREATE_NO_WINDOW
+
+
+class BackendHives:
+    """Interfaz sobre reg.exe: cargado() sondea, cargar()/descargar() devuelven (ok, mensaje)"""
+
+    def cargado(self, sid):
+        raise NotImplementedError
+
+    def cargar(self, sid, ntuser):
+        raise NotImplementedError
+
+    def descargar(self, sid):
+        raise NotImplementedError
+
+
+class BackendReg(BackendHives):
+    """reg load / reg unload reales, siempre bajo HKU\\<SID>"""
+
+    def cargado(self, sid):
+        try:
+            clave = winreg.OpenKey(winreg.HKEY_USERS, sid, 0, winreg.KEY_READ)
+        except FileNotFoundError:
+            return False
+        winreg.CloseKey(clave)
+        return True
+
+    def _reg(self, *argumentos):
+        r = subprocess.run(["reg", *argumentos], capture_output=True, text=True,
+                           creationflags=CREATE_NO_WINDOW)
+        return r.returncode == 0, (r.stderr or r.stdout).strip()
+
+    def cargar(self, sid, ntuser):
+        return self._reg("load", f"HKU\\{sid}", str(ntuser))
+
+    def descargar(self, sid):
+        ok, mensaje = self._reg("unload", f"HKU\\{sid}")
+        if not ok:
+            # Suele fallar si quedan handles abiertos: liberarlos y reintentar una vez
+            registrar("reintentos")
+            gc.collect()
+            esperar(0.5)
+            ok, mensaje = self._reg("unload", f"HKU\\{sid}")
+        return ok, mensaje
+
+
+class BackendRegFalso(BackendHives):
+    """
+    Sustituto de reg.exe para pruebas: lleva la cuenta de sondeos, cargas
+    y descargas. `cargados` son los hives ya presentes (sesión iniciada).
+    """
+
+    def __init__(self, cargados=(), fallar=(), latencia=0.0):
+        self.cargados = set(cargados)
+        self.fallar = set(fallar)
+        self.latencia = latencia
+        self.sondeos = 0
+        self.cargas = 0
+        self.descargas = 0
+        self._lock = threading.Lock()
+
+    def cargado(self, sid):
+        with self._lock:
+            self.sondeos += 1
+            return sid in self.cargados
+
+    def cargar(self, sid, ntuser):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            if sid in self.fallar:
+                return False, "ERROR: El proceso no tiene acceso al archivo."
+            if sid in self.cargados:
+                return False, "ERROR: La clave ya está en uso."
+            self.cargas += 1
+            self.cargados.add(sid)
+            return True, "La operación se completó correctamente."
+
+    def descargar(self, sid):
+        with self._lock:
+            if sid not in self.cargados:
+                return False, "ERROR: El sistema no puede encontrar la clave."
+            self.descargas += 1
+            self.cargados.discard(sid)
+            return True, "La operación se completó correctamente."
+
+
+class _Montaje:
+    """Estado de un SID: referencias activas y si el hive lo cargamos nosotros"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.referencias = 0
+        self.propio = False
+
+
+class GestorHives:
+    """
+    Gestor de hives con conteo de referencias.
+    Un hive ya cargado por Windows (usuario con sesión iniciada) se usa
+    sin tocarlo; solo se descargan los que cargó este gestor.
+    """
+
+    def __init__(self, backend=None, callback=None):
+        self.backend = backend or BackendReg()
+        self.callback = callback
+        self._montajes = {}
+        self._lock = threading.Lock()
+
+    def log(self, mensaje):
+        if self.callback:
+            self.callback(mensaje)
+
+    def _montaje(self, sid):
+        with self._lock:
+            return self._montajes.setdefault(sid, _Montaje())
+
+    def referencias(self, sid):
+        montaje = self._montajes.get(sid)
+        return montaje.referencias if montaje else 0
+
+    def adquirir(self, sid, ntuser, log=None):
+        """
+        Suma una referencia al hive del SID, cargándolo si hace falta.
+        `ntuser` es la ruta de NTUSER.DAT o una función que la devuelve
+        (solo se evalúa si hay que cargar). Devuelve True si quedó montado.
+        """
+        log = log or self.log
+        montaje = self._montaje(sid)
+        with montaje.lock:
+            if montaje.referencias == 0:
+                if self.backend.cargado(sid):
+                    montaje.propio = False
+                else:
+                    ruta = ntuser() if callable(ntuser) else ntuser
+                    if not ruta:
+                        log(f"✗ No se encontró NTUSER.DAT para {sid}")
+                        return False
+                    log(f"⏳ Cargando registro {sid}...")
+                    ok, mensaje = self.backend.cargar(sid, ruta)
+                    if not ok:
+                        log(f"✗ Error al cargar registro: {mensaje}")
+                        return False
+                    log("✓ Registro cargado correctamente")
+                    montaje.propio = True
+            montaje.referencias += 1
+            return True
+
+    def liberar(self, sid, log=None):
+        """Resta una referencia; con la última se descarga el hive si es propio"""
+        montaje = self._montajes.get(sid)
+        if not montaje:
+            return
+        with montaje.lock:
+            if montaje.referencias == 0:
+                return
+            montaje.referencias -= 1
+            if montaje.referencias == 0 and montaje.propio:
+                self._descargar(sid, montaje, log or self.log)
+
+    def _descargar(self, sid, montaje, log):
+        ok, mensaje = self.backend.descargar(sid)
+        if ok:
+            montaje.propio = False
+            log(f"✓ Registro {sid} descargado")
+        else:
+            log(f"⚠️  No se pudo descargar {sid}: {mensaje}")
+
+    @contextmanager
+    def montar(self, sid, ntuser, log=None):
+        """with gestor.montar(sid, ruta) as ok: ... (libera al salir, incluso con error)"""
+        ok = self.adquirir(sid, ntuser, log)
+        try:
+            yield ok
+        finally:
+            if ok:
+                self.liberar(sid, log)
+
+    def liberar_todo(self):
+        """Descarga todos los hives propios sin importar sus referencias"""
+        with self._lock:
+            montajes = list(self._montajes.items())
+        for sid, montaje in montajes:
+            with montaje.lock:
+                montaje.referencias = 0
+                if montaje.propio:
+                    self._descargar(sid, montaje, self.log)
+
+
+_gestor_compartido = None
+_lock_compartido = threading.Lock()
+
+
+def obtener_gestor_hives():
+    """Gestor compartido por todos los ConfiguradorPC del proceso"""
+    global _gestor_compartido
+    with _lock_compartido:
+        if _gestor_compartido is None:
+            _gestor_compartido = GestorHives()
+            atexit.register(_gestor_compartido.liberar_todo)
+        return _gestor_compartido
@@ -0,0 +1,197 @@
+"""
+Informe de impacto de los programas de arranque
+Resuelve el ejecutable de cada entrada de inicio, estima su coste en el
+arranque (tamaño de la imagen, si es un actualizador y lo que Windows
+midió en arranques anteriores) y las ordena de mayor a menor coste.
+Con las reglas del perfil muestra, sin aplicar nada, lo que eliminaría
+la optimización, para ajustar las listas con datos de todo un laboratorio.
+
+Coste estimado (puntos):
+    1 por MB de la imagen + 25 si es un actualizador + 1 por cada 100 ms medidos
+"""
+
+import csv
+import json
+import os
+import re
+import socket
+import struct
+from collections import namedtuple
+from pathlib import Path, PureWindowsPath
+
+from .arranque import APROBADO, CARPETA, cambios_propuestos
+from .registro import nombre_clave
+
+PUNTOS_MB = 1.0
+PUNTOS_ACTUALIZADOR = 25.0
+PUNTOS_100_MS = 1.0
+
+PATRON_ACTUALIZADOR = re.compile(r"updat|upgrad")
+# Ruta de un ejecutable sin comillas: lo más corto que termine en una extensión ejecutable
+PATRON_EJECUTABLE = re.compile(r"^(.+?\.(?:exe|com|bat|cmd|lnk|vbs|ps1))(?=\s|,|$)", re.IGNORECASE)
+
+# Eventos 101 de Diagnostics-Performance: aplicaciones que retrasaron el arranque
+SCRIPT_TIEMPOS = r"""
+$eventos = Get-WinEvent -FilterHashtable @{LogName='Microsoft-Windows-Diagnostics-Performance/Operational'; Id=101} -MaxEvents 500 -ErrorAction SilentlyContinue
+$tiempos = @($eventos | ForEach-Object {
+    $datos = @{}
+    ([xml]$_.ToXml()).Event.EventData.Data | ForEach-Object { $datos[$_.Name] = $_.'#text' }
+    [PSCustomObject]@{ archivo = $datos['FileName']; ms = [int]$datos['TotalTime'] }
+})
+ConvertTo-Json -InputObject $tiempos -Compress
+"""
+
+CAMPOS = ("equipo", "usuario", "tipo", "ubicacion", "nombre", "comando", "ejecutable", "existe", "mb",
+          "actualizador", "tiempo_ms", "costo", "estado", "regla", "deshabilitada", "accion")
+EntradaImpacto = namedtuple("EntradaImpacto", CAMPOS)
+
+
+def expandir(texto, entorno=None):
+    """Expande %VARIABLE% (REG_EXPAND_SZ) con el entorno indicado o el del proceso"""
+    entorno = os.environ if entorno is None else entorno
+    claves = {k.lower(): v for k, v in entorno.items()}
+    return re.sub(r"%([^%]+)%", lambda m: claves.get(m.group(1).lower(), m.group(0)), texto)
+
+
+def destino_acceso(ruta):
+    """Ruta local a la que apunta un acceso directo .lnk (LinkInfo.LocalBasePath) o None"""
+    try:
+        datos = Path(ruta).read_bytes()
+        if len(datos) < 0x4C or struct.unpack_from("<I", datos, 0)[0] != 0x4C:
+            return None
+        banderas = struct.unpack_from("<I", datos, 0x14)[0]
+        posicion = 0x4C
+        if banderas & 0x01:  # HasLinkTargetIDList
+            posicion += 2 + struct.unpack_from("<H", datos, posicion)[0]
+        if not banderas & 0x02:  # HasLinkInfo
+            return None
+        info_banderas, _, ruta_local = struct.unpack_from("<III", datos, posicion + 8)
+        if not info_banderas & 0x01:  # VolumeIDAndLocalBasePath
+            return None
+        inicio = posicion + ruta_local
+        return datos[inicio:datos.index(b"\0", inicio)].decode("mbcs" if os.name == "nt" else "latin-1")
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+def resolver_ejecutable(comando, entorno=None):
+    """Ejecutable de una línea de comandos de Run (o de un archivo de la carpeta Inicio)"""
+    comando = expandir(comando.strip(), entorno)
+    if comando.startswith('"'):
+        ejecutable, _, argumentos = comando[1:].partition('"')
+    else:
+        m = PATRON_EJECUTABLE.match(comando)
+        ejecutable = m.group(1) if m else comando.split(" ", 1)[0]
+        argumentos = comando[len(ejecutable):]
+    # rundll32 solo carga la DLL: el coste es el de la DLL
+    if PureWindowsPath(ejecutable).name.lower() == "rundll32.exe" and argumentos.strip():
+        ejecutable = argumentos.strip().strip('"').split(",", 1)[0]
+    if ejecutable.lower().endswith(".lnk"):
+        ejecutable = destino_acceso(ejecutable) or ejecutable
+    return ejecutable
+
+
+def tiempos_arranque(ejecutor):
+    """{nombre del ejecutable en minúsculas: ms promedio} de los arranques registrados por Windows"""
+    try:
+        r = ejecutor.ejecutar(SCRIPT_TIEMPOS, timeout=60, idempotente=True)
+        eventos = json.loads(r.stdout) if r.returncode == 0 and r.stdout.strip() else []
+    except Exception:
+        return {}
+    medidas = {}
+    for evento in eventos if isinstance(eventos, list) else [eventos]:
+        if evento.get("archivo"):
+            medidas.setdefault(PureWindowsPath(evento["archivo"]).name.lower(), []).append(evento.get("ms") or 0)
+    return {archivo: sum(ms) / len(ms) for archivo, ms in medidas.items()}
+
+
+def leer_tiempos(ruta):
+    """Tiempos de otros equipos o arranques: JSON {ejecutable: ms}"""
+    datos = json.loads(Path(ruta).read_text(encoding="utf-8-sig"))
+    if not isinstance(datos, dict):
+        raise ValueError("se esperaba un objeto {ejecutable: ms}")
+    return {PureWindowsPath(k).name.lower(): float(v) for k, v in datos.items()}
+
+
+def costo(mb, actualizador, tiempo_ms):
+    puntos = mb * PUNTOS_MB + tiempo_ms / 100 * PUNTOS_100_MS
+    return round(puntos + (PUNTOS_ACTUALIZADOR if actualizador else 0), 1)
+
+
+def evaluar(usuario, inventario, tiempos=None, equipo=None, entorno=None):
+    """EntradaImpacto de cada entrada de un inventario de arranque, con la acción que propone la optimización"""
+    tiempos = tiempos or {}
+    equipo = equipo or os.environ.get("COMPUTERNAME") or socket.gethostname()
+    eliminar, deshabilitar = cambios_propuestos(inventario)
+    eliminadas = {(h, r, n) for (h, r), nombres in eliminar.items() for n in nombres}
+    deshabilitadas = {(e.hive, e.ruta, e.nombre) for e in deshabilitar if e.tipo == APROBADO}
+
+    entradas = []
+    for e in inventario:
+        clave = (e.hive, e.ruta, e.nombre)
+        if e.tipo == CARPETA:
+            ejecutable = (destino_acceso(e.comando) if e.nombre.lower().endswith(".lnk") else None) or e.comando
+        else:
+            ejecutable = resolver_ejecutable(e.comando, entorno) if e.comando else ""
+        try:
+            mb = round(os.stat(ejecutable).st_size / 2**20, 2) if ejecutable else 0.0
+            existe = True
+        except OSError:
+            mb, existe = 0.0, False
+        actualizador = bool(PATRON_ACTUALIZADOR.search(f"{e.nombre} {ejecutable}".lower()))
+        tiempo = round(tiempos.get(PureWindowsPath(ejecutable).name.lower(), 0) if ejecutable else 0)
+        accion = "eliminar" if clave in eliminadas else "deshabilitar" if clave in deshabilitadas else ""
+        ubicacion = e.ruta if e.tipo == CARPETA else nombre_clave(e.hive, e.ruta)
+        entradas.append(EntradaImpacto(equipo, usuario, e.tipo, ubicacion, e.nombre, e.comando, ejecutable,
+                                       existe, mb, actualizador, tiempo, costo(mb, actualizador, tiempo),
+                                       e.estado, e.regla, e.deshabilitada, accion))
+    return entradas
+
+
+class InformeImpacto:
+    """Entradas ordenadas por coste y las diferencias que aplicaría la optimización"""
+
+    def __init__(self, entradas, cambios=()):
+        self.entradas = sorted(entradas, key=lambda e: (-e.costo, e.usuario, e.nombre.lower()))
+        self.cambios = list(cambios)
+
+    def a_dict(self):
+        return {"entradas": [e._asdict() for e in self.entradas],
+                "cambios": [{"clave": nombre_clave(c.hive, c.ruta), "nombre": c.nombre,
+                             "actual": _texto(c.actual), "propuesto": _texto(c.deseado)} for c in self.cambios]}
+
+    def guardar_json(self, ruta):
+        Path(ruta).write_text(json.dumps(self.a_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def guardar_csv(self, ruta):
+        """Una fila por entrada; los CSV de varios equipos se pueden concatenar"""
+        with open(ruta, "w", newline="", encoding="utf-8-sig") as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(CAMPOS)
+            escritor.writerows(self.entradas)
+
+    def lineas(self, limite=None):
+        lineas = [f"   {'Costo':>6}  {'Usuario':<16} {'Programa':<28} {'MB':>7} {'ms':>6}  Acción"]
+        for e in self.entradas[:limite]:
+            marca = " ⟳" if e.actualizador else ""
+            accion = e.accion or ("(deshabilitada)" if e.deshabilitada else e.estado)
+            lineas.append(f"   {e.costo:>6.1f}  {e.usuario[:16]:<16} {(e.nombre + marca)[:28]:<28} "
+                          f"{e.mb:>7.1f} {e.tiempo_ms:>6}  {accion}")
+        return lineas
+
+    def diff(self):
+        """Cambios propuestos como un diff: - valor eliminado, ~ valor modificado, + valor nuevo"""
+        lineas = []
+        for c in self.cambios:
+            clave = f"{nombre_clave(c.hive, c.ruta)}\\{c.nombre}"
+            if c.deseado is None:
+                lineas.append(f"- {clave} = {_texto(c.actual)}")
+            elif c.actual is None:
+                lineas.append(f"+ {clave} = {_texto(c.deseado)}")
+            else:
+                lineas.append(f"~ {clave}: {_texto(c.actual)} -> {_texto(c.deseado)}")
+        return lineas
+
+
+def _texto(valor):
+    return valor.hex(" ") if isinstance(valor, bytes) else valor
@@ -0,0 +1,222 @@
+"""
+Instrumentación de operaciones
+Mide el tiempo de cada operación de ConfiguradorPC y GestorUsuarios y le
+atribuye los procesos lanzados, las aperturas/escrituras de registro, los
+reintentos y las esperas que ocurren mientras se ejecuta (en su hilo).
+Procesos, registro y esperas se cuentan con audit hooks (sys.addaudithook),
+así que también se ven las llamadas directas a subprocess o winreg
+(time.sleep solo desde Python 3.13; antes, las esperas van por esperar()).
+
+Desactivada (lo normal) cada operación solo comprueba una variable global.
+Se activa con activar() o con la variable de entorno CLA_INSTRUMENTAR=1.
+"""
+
+import copy
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .archivos import directorio_datos
+
+CONTADORES = ("llamadas", "segundos", "subprocesos", "registro_aperturas",
+              "registro_escrituras", "reintentos", "esperas", "segundos_espera")
+
+# Operación a la que se atribuye lo que ocurre fuera de cualquier operación medida
+SIN_OPERACION = "(sin operación)"
+
+# Evento de auditoría -> contador
+EVENTOS = {
+    "subprocess.Popen": "subprocesos",
+    "os.system": "subprocesos",
+    "os.startfile": "subprocesos",
+    "winreg.OpenKey": "registro_aperturas",
+    "winreg.CreateKey": "registro_aperturas",
+    "winreg.SetValue": "registro_escrituras",
+    "winreg.DeleteValue": "registro_escrituras",
+    "winreg.DeleteKey": "registro_escrituras",
+}
+
+# time.sleep solo genera evento de auditoría desde Python 3.13; antes se usa esperar()
+SLEEP_AUDITADO = sys.version_info >= (3, 13)
+
+_activa = None
+_hook_instalado = False
+_lock_activacion = threading.Lock()
+_local = threading.local()
+
+
+def directorio_informes():
+    """%LOCALAPPDATA%\\CLA-WinConfig\\instrumentacion o ~/.cache fuera de Windows"""
+    return directorio_datos("instrumentacion")
+
+
+class Instrumentacion:
+    """Contadores por operación; se puede usar desde varios hilos"""
+
+    def __init__(self):
+        self.operaciones = {}
+        self.inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _medicion(self, operacion):
+        medicion = self.operaciones.get(operacion)
+        if medicion is None:
+            medicion = self.operaciones[operacion] = dict.fromkeys(CONTADORES, 0)
+        return medicion
+
+    def sumar(self, operacion, contador, cantidad=1):
+        with self._lock:
+            self._medicion(operacion)[contador] += cantidad
+
+    def instantanea(self):
+        """Copia de los contadores, para resumir después solo lo ocurrido desde ahora"""
+        with self._lock:
+            return {"operaciones": copy.deepcopy(self.operaciones), "momento": time.perf_counter()}
+
+    def resumen(self, desde=None):
+        """Dict serializable: totales y operaciones ordenadas por tiempo"""
+        base = desde["operaciones"] if desde else {}
+        with self._lock:
+            operaciones = {}
+            for nombre, medicion in self.operaciones.items():
+                anterior = base.get(nombre, {})
+                delta = {c: medicion[c] - anterior.get(c, 0) for c in CONTADORES}
+                if any(delta.values()):
+                    operaciones[nombre] = delta
+        totales = {c: sum(m[c] for m in operaciones.values()) for c in CONTADORES if c not in ("llamadas", "segundos")}
+        momento = desde["momento"] if desde else self.inicio
+        for medicion in operaciones.values():
+            medicion["segundos"] = round(medicion["segundos"], 4)
+            medicion["segundos_espera"] = round(medicion["segundos_espera"], 4)
+        totales["segundos_espera"] = round(totales["segundos_espera"], 4)
+        return {
+            "segundos": round(time.perf_counter() - momento, 4),
+            "totales": totales,
+            "operaciones": dict(sorted(operaciones.items(), key=lambda o: -o[1]["segundos"])),
+        }
+
+    def guardar(self, resumen, nombre="configuracion"):
+        """Escribe el resumen como JSON y devuelve la ruta (None si no se pudo)"""
+        carpeta = directorio_informes()
+        try:
+            carpeta.mkdir(parents=True, exist_ok=True)
+            ruta = carpeta / f"{nombre}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json"
+            ruta.write_text(json.dumps(resumen, indent=2, ensure_ascii=False), encoding="utf-8")
+            return ruta
+        except OSError:
+            return None
+
+
+def _pila():
+    pila = getattr(_local, "pila", None)
+    if pila is None:
+        pila = _local.pila = []
+    return pila
+
+
+def _operacion_actual():
+    pila = getattr(_local, "pila", None)
+    return pila[-1] if pila else SIN_OPERACION
+
+
+def _hook(evento, argumentos):
+    instrumentacion = _activa
+    if instrumentacion is None:
+        return
+    contador = EVENTOS.get(evento)
+    if contador:
+        instrumentacion.sumar(_operacion_actual(), contador)
+    elif evento == "time.sleep":
+        operacion = _operacion_actual()
+        instrumentacion.sumar(operacion, "esperas")
+        instrumentacion.sumar(operacion, "segundos_espera", argumentos[0] or 0)
+
+
+def activar(instrumentacion=None):
+    """Empieza a medir y devuelve la Instrumentacion activa"""
+    global _activa, _hook_instalado
+    with _lock_activacion:
+        if not _hook_instalado:
+            # Los audit hooks no se pueden quitar: se instala uno solo y se apaga con _activa
+            sys.addaudithook(_hook)
+            _hook_instalado = True
+        _activa = instrumentacion or _activa or Instrumentacion()
+        return _activa
+
+
+def desactivar():
+    global _activa
+    _activa = None
+
+
+def activa():
+    """Instrumentacion activa o None"""
+    return _activa
+
+
+def registrar(contador, cantidad=1):
+    """Suma a la operación en curso (p. ej. registrar('reintentos'))"""
+    instrumentacion = _activa
+    if instrumentacion is not None:
+        instrumentacion.sumar(_operacion_actual(), contador, cantidad)
+
+
+def esperar(segundos):
+    """time.sleep que se cuenta como espera también en Python < 3.13"""
+    if not SLEEP_AUDITADO:
+        registrar("esperas")
+        registrar("segundos_espera", segundos)
+    time.sleep(segundos)
+
+
+@contextmanager
+def operacion(nombre):
+    """Mide un bloque como la operación `nombre`"""
+    instrumentacion = _activa
+    if instrumentacion is None:
+        yield
+        return
+    pila = _pila()
+    pila.append(nombre)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        pila.pop()
+        instrumentacion.sumar(nombre, "llamadas")
+        instrumentacion.sumar(nombre, "segundos", time.perf_counter() - inicio)
+
+
+def medido(funcion):
+    """Decorador: mide cada llamada como la operación Clase.metodo"""
+    nombre = funcion.__qualname__
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if _activa is None:
+            return funcion(*args, **kwargs)
+        with operacion(nombre):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+def lineas_resumen(resumen, maximo=5):
+    """Líneas legibles del resumen para el log"""
+    t = resumen["totales"]
+    lineas = [
+        f"⏱️  {resumen['segundos']:.2f} s · {t['subprocesos']} procesos · "
+        f"registro {t['registro_aperturas']} aperturas/{t['registro_escrituras']} escrituras · "
+        f"{t['reintentos']} reintentos · {t['esperas']} esperas ({t['segundos_espera']:.1f} s)"
+    ]
+    for nombre, m in list(resumen["operaciones"].items())[:maximo]:
+        lineas.append(f"   {nombre:<48} {m['segundos']:>7.2f} s  x{m['llamadas']}  procesos: {m['subprocesos']}")
+    return lineas
+
+
+if os.environ.get("CLA_INSTRUMENTAR"):
+    activar()
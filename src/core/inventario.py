@@ -0,0 +1,178 @@
+"""
+Inventario de usuarios locales de Windows
+Una sola consulta obtiene usuarios, SIDs, estado, grupos y rutas de perfil;
+las búsquedas posteriores son accesos a diccionario.
+"""
+
+import json
+import threading
+from collections import namedtuple
+
+from .powershell import obtener_ejecutor
+
+UsuarioLocal = namedtuple(
+    "UsuarioLocal",
+    ["nombre", "nombre_completo", "sid", "habilitado", "grupos", "perfil"]
+)
+
+# Cuentas que Windows crea por defecto y que nunca son usuarios reales del centro
+CUENTAS_SISTEMA = {"defaultaccount", "wdagutilityaccount", "guest", "invitado"}
+
+SCRIPT_INVENTARIO = r"""
+$perfiles = @{}
+Get-ChildItem 'HKLM:\SOFTWARE\Microsoft\Windows NT\CurrentVersion\ProfileList' -ErrorAction SilentlyContinue | ForEach-Object {
+    $perfiles[$_.PSChildName] = (Get-ItemProperty $_.PSPath -ErrorAction SilentlyContinue).ProfileImagePath
+}
+$grupos = @{}
+Get-LocalGroup | ForEach-Object {
+    $grupo = $_.Name
+    Get-LocalGroupMember -Group $_ -ErrorAction SilentlyContinue | ForEach-Object {
+        $sid = $_.SID.Value
+        if (-not $grupos.ContainsKey($sid)) { $grupos[$sid] = @() }
+        $grupos[$sid] += $grupo
+    }
+}
+$usuarios = @(Get-LocalUser | ForEach-Object {
+    $sid = $_.SID.Value
+    [PSCustomObject]@{
+        nombre = $_.Name
+        nombre_completo = $_.FullName
+        sid = $sid
+        habilitado = [bool]$_.Enabled
+        grupos = @(if ($grupos.ContainsKey($sid)) { $grupos[$sid] } else { @() })
+        perfil = $perfiles[$sid]
+    }
+})
+ConvertTo-Json -InputObject $usuarios -Compress -Depth 3
+"""
+
+
+class InventarioUsuarios:
+    """
+    Índice en memoria de los usuarios locales.
+    Se carga en la primera consulta y se invalida explícitamente tras
+    operaciones que modifican cuentas (crear usuario, renombrar, deshabilitar).
+    """
+
+    def __init__(self, ejecutor=None):
+        self.ejecutor = ejecutor or obtener_ejecutor()
+        self._lock = threading.Lock()
+        self._por_nombre = None
+        self._por_sid = None
+        self._intentado = False
+        self.cargas = 0
+
+    def _cargar(self):
+        r = self.ejecutor.ejecutar(SCRIPT_INVENTARIO, timeout=60, idempotente=True)
+        self.cargas += 1
+        if r.returncode != 0 or not r.stdout.strip():
+            return False
+
+        try:
+            datos = json.loads(r.stdout)
+        except ValueError:
+            return False
+        if isinstance(datos, dict):
+            datos = [datos]
+
+        por_nombre = {}
+        por_sid = {}
+        for d in datos:
+            usuario = UsuarioLocal(
+                nombre=d.get("nombre") or "",
+                nombre_completo=d.get("nombre_completo") or "",
+                sid=d.get("sid") or "",
+                habilitado=bool(d.get("habilitado")),
+                grupos=tuple(d.get("grupos") or ()),
+                perfil=d.get("perfil") or None
+            )
+            por_nombre[usuario.nombre.lower()] = usuario
+            if usuario.sid:
+                por_sid[usuario.sid] = usuario
+
+        self._por_nombre = por_nombre
+        self._por_sid = por_sid
+        return True
+
+    def _asegurar(self):
+        with self._lock:
+            # Un fallo también se recuerda hasta invalidar(): no se reintenta en cada consulta
+            if self._por_nombre is None and not self._intentado:
+                self._intentado = True
+                try:
+                    self._cargar()
+                except Exception:
+                    pass
+            return self._por_nombre is not None
+
+    @property
+    def disponible(self):
+        """True si el inventario se pudo obtener"""
+        return self._asegurar()
+
+    def invalidar(self):
+        """Descarta el índice; la siguiente consulta vuelve a enumerar"""
+        with self._lock:
+            self._por_nombre = None
+            self._por_sid = None
+            self._intentado = False
+
+    def usuarios(self):
+        if not self._asegurar():
+            return []
+        return list(self._por_nombre.values())
+
+    def obtener(self, nombre_usuario):
+        if not self._asegurar():
+            return None
+        return self._por_nombre.get(nombre_usuario.lower())
+
+    def existe(self, nombre_usuario):
+        """True/False según el inventario, None si no está disponible"""
+        if not self._asegurar():
+            return None
+        return nombre_usuario.lower() in self._por_nombre
+
+    def sid_de(self, nombre_usuario):
+        usuario = self.obtener(nombre_usuario)
+        return usuario.sid if usuario else None
+
+    def por_sid(self, sid):
+        if not self._asegurar():
+            return None
+        return self._por_sid.get(sid)
+
+    def perfil_de_sid(self, sid):
+        usuario = self.por_sid(sid)
+        return usuario.perfil if usuario else None
+
+    def admin_integrado(self):
+        """Cuenta de administrador integrado (SID terminado en -500)"""
+        return next((u for u in self.usuarios() if u.sid.endswith("-500")), None)
+
+    def usuarios_reales(self):
+        """Usuarios habilitados que no son cuentas del sistema ni el admin integrado"""
+        return [
+            u for u in self.usuarios()
+            if u.habilitado
+            and u.nombre.lower() not in CUENTAS_SISTEMA
+            and not u.sid.endswith("-500")
+        ]
+
+
+_inventario_compartido = None
+_lock_compartido = threading.Lock()
+
+
+def obtener_inventario(ejecutor=None):
+    """
+    Devuelve el inventario compartido por ConfiguradorPC y GestorUsuarios.
+    Con un ejecutor propio (p. ej. en pruebas) se crea uno independiente.
+    """
+    global _inventario_compartido
+    if ejecutor is not None:
+        return InventarioUsuarios(ejecutor)
+    with _lock_compartido:
+        if _inventario_compartido is None:
+            _inventario_compartido = InventarioUsuarios()
+        return _inventario_compartido
@@ -0,0 +1,130 @@
+"""
+Configuración de varios usuarios en una sola ejecución
+Las tareas de equipo (activación, arranque, tareas programadas, zona
+horaria) se hacen una vez; las de usuario se repiten por cada cuenta,
+con un número acotado de hives cargados a la vez.
+"""
+
+import getpass
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .configurador import ConfiguradorPC
+from .hives import obtener_gestor_hives
+from .inventario import obtener_inventario
+from .powershell import obtener_ejecutor
+from .registro import backend_por_defecto
+
+# Tareas que afectan a todo el equipo y las que se aplican por usuario
+TAREAS_EQUIPO = ['activar_windows', 'optimizar_arranque', 'instalar_tareas', 'mostrar_keys']
+TAREAS_USUARIO = ['tema_oscuro', 'fondo_pantalla', 'fondo_bloqueo', 'bloquear_personalizacion']
+
+InformeUsuario = namedtuple("InformeUsuario", ["usuario", "exitosos", "total", "cambios", "error"])
+
+
+class InformeLote:
+    """Resultado consolidado: tareas de equipo y una línea por usuario"""
+
+    def __init__(self, equipo, usuarios):
+        self.equipo = equipo
+        self.usuarios = usuarios
+
+    def totales(self):
+        """(exitosos, total) sumando equipo y usuarios, como aplicar_configuracion_completa"""
+        exitosos = self.equipo[0] + sum(u.exitosos for u in self.usuarios)
+        total = self.equipo[1] + sum(u.total for u in self.usuarios)
+        return exitosos, total
+
+    def lineas(self):
+        lineas = [f"   {'Equipo':<24} {self.equipo[0]}/{self.equipo[1]}"]
+        for u in self.usuarios:
+            estado = f"{u.exitosos}/{u.total}" if not u.error else f"✗ {u.error}"
+            lineas.append(f"   {u.usuario:<24} {estado}")
+        return lineas
+
+
+class ConfiguradorMultiusuario:
+    """
+    Aplica la configuración a una lista de usuarios (o a todos los usuarios
+    reales del equipo si no se indica ninguno). Ejecutor, inventario,
+    backend de registro y gestor de hives se comparten entre configuradores.
+    """
+
+    def __init__(self, numero_pc, usuarios=None, carpeta_centro='CID-Centro_Computo', callback=None,
+                 max_hives=2, ejecutor=None, inventario=None, backend_registro=None, hives=None):
+        self.numero_pc = numero_pc
+        self.carpeta_centro = carpeta_centro
+        self.callback = callback
+        self.max_hives = max_hives
+        self.ejecutor = ejecutor or obtener_ejecutor()
+        self.inventario = inventario or obtener_inventario(ejecutor)
+        self.backend_registro = backend_registro or backend_por_defecto()
+        self.hives = hives or obtener_gestor_hives()
+        self.usuarios = list(usuarios) if usuarios else None
+
+    def log(self, mensaje):
+        if self.callback:
+            self.callback(mensaje)
+
+    def usuarios_objetivo(self):
+        """Usuarios indicados o, si no hay, todos los usuarios reales del inventario"""
+        if self.usuarios:
+            return self.usuarios
+        return [u.nombre for u in self.inventario.usuarios_reales()]
+
+    def crear_configurador(self, usuario_objetivo=None, callback=None):
+        return ConfiguradorPC(
+            self.numero_pc, carpeta_centro=self.carpeta_centro,
+            usuario_objetivo=usuario_objetivo, callback=callback or self.callback,
+            ejecutor=self.ejecutor, inventario=self.inventario,
+            backend_registro=self.backend_registro, hives=self.hives
+        )
+
+    def configurar_usuario(self, usuario, opciones_usuario):
+        prefijo = f"[{usuario}] "
+        seleccionadas = sum(1 for k in TAREAS_USUARIO if opciones_usuario.get(k, False))
+        try:
+            configurador = self.crear_configurador(usuario, lambda m: self.log(prefijo + m.lstrip("\n")))
+            if not configurador.soy_usuario_objetivo and not configurador.sid_objetivo:
+                return InformeUsuario(usuario, 0, seleccionadas, False, "no se encontró el SID")
+            exitosos, total = configurador.aplicar_configuracion_completa(opciones_usuario)
+            cambios = not configurador.lote_aplicado.cumple()
+            return InformeUsuario(usuario, exitosos, total, cambios, None)
+        except Exception as e:
+            self.log(f"{prefijo}❌ Error inesperado: {e}")
+            return InformeUsuario(usuario, 0, seleccionadas, False, str(e))
+
+    def aplicar(self, opciones):
+        """Configura el equipo una vez y después cada usuario; devuelve un InformeLote"""
+        usuarios = self.usuarios_objetivo()
+        self.log(f"👥 Configurando {len(usuarios)} usuario(s): {', '.join(usuarios)}")
+
+        # Tareas de equipo (y zona horaria) una sola vez, como el usuario actual
+        opciones_equipo = {k: opciones.get(k, False) for k in TAREAS_EQUIPO}
+        # Los valores HKLM del perfil del centro van aquí; los de HKCU, en cada usuario
+        opciones_equipo['registro_perfil_usuario'] = False
+        equipo = self.crear_configurador().aplicar_configuracion_completa(opciones_equipo)
+
+        # Tareas de usuario: sin zona horaria ni reinicio del explorador por usuario
+        opciones_usuario = {k: opciones.get(k, False) for k in TAREAS_USUARIO}
+        opciones_usuario['zona_horaria'] = False
+        opciones_usuario['registro_perfil_equipo'] = False
+        with ThreadPoolExecutor(max_workers=max(1, self.max_hives)) as pool:
+            informes = list(pool.map(lambda u: self.configurar_usuario(u, opciones_usuario), usuarios))
+
+        informe = InformeLote(equipo, informes)
+        exitosos, total = informe.totales()
+        self.log(f"\n{'='*50}")
+        self.log("Resumen por usuario:")
+        for linea in informe.lineas():
+            self.log(linea)
+        self.log(f"Completado: {exitosos}/{total} tareas exitosas")
+        self.log(f"{'='*50}\n")
+
+        # El explorador se reinicia una sola vez, al final, si el usuario actual cambió algo
+        if opciones.get('reiniciar_explorer', False):
+            actual = getpass.getuser().lower()
+            if any(u.usuario.lower() == actual and u.cambios for u in informes):
+                self.crear_configurador().reiniciar_explorer()
+
+        return informe
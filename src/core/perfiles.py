@@ -0,0 +1,374 @@
+"""
+Perfiles de centro
+Cada centro puede declarar en assets/<centro>/perfil.json (o perfil.toml)
+su nombre, las tareas que se marcan por defecto, valores de registro
+propios, las reglas de programas de arranque y sus cuentas:
+
+    {
+        "nombre": "CID-Centro de Cómputo",
+        "tareas": ["tema_oscuro", "fondo_pantalla", "fondo_bloqueo"],
+        "registro": [
+            {"clave": "HKCU\\\\Software\\\\...\\\\Explorer\\\\Advanced", "nombre": "HideFileExt",
+             "tipo": "REG_DWORD", "valor": 0}
+        ],
+        "arranque": {"bloquear": ["onedrive", "teams"], "proteger": ["defender"]},
+        "usuarios": {"administrador": "Administrador CC", "estandar": ["Alumno"]}
+    }
+
+Todas las secciones son opcionales; las que faltan toman PERFIL_DEFECTO.
+El perfil se valida y se compila una vez en un PlanPerfil que se guarda en
+disco con el hash del archivo como clave: las ejecuciones siguientes (y las
+demás del mismo proceso, sin releer el archivo) usan el plan ya compilado.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: solo perfil.json
+    tomllib = None
+
+from .registro import (HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, REG_BINARY, REG_DWORD, REG_EXPAND_SZ,
+                       REG_MULTI_SZ, REG_QWORD, REG_SZ)
+from .archivos import directorio_datos, hash_archivo
+
+ARCHIVOS_PERFIL = ("perfil.json", "perfil.toml")
+
+# Versión del formato compilado: cambiarla invalida los planes guardados
+VERSION_PLAN = 1
+
+# Claves de `opciones` que un perfil puede marcar por defecto
+TAREAS = ('activar_windows', 'tema_oscuro', 'fondo_pantalla', 'fondo_bloqueo', 'bloquear_personalizacion',
+          'optimizar_arranque', 'instalar_tareas', 'reiniciar_explorer', 'mostrar_keys', 'zona_horaria')
+
+HIVES = {"HKCU": HKEY_CURRENT_USER, "HKEY_CURRENT_USER": HKEY_CURRENT_USER,
+         "HKLM": HKEY_LOCAL_MACHINE, "HKEY_LOCAL_MACHINE": HKEY_LOCAL_MACHINE}
+
+# Tipo -> (constante, tipos de Python admitidos para el valor)
+TIPOS = {
+    "REG_SZ": (REG_SZ, (str,)),
+    "REG_EXPAND_SZ": (REG_EXPAND_SZ, (str,)),
+    "REG_DWORD": (REG_DWORD, (int,)),
+    "REG_QWORD": (REG_QWORD, (int,)),
+    "REG_BINARY": (REG_BINARY, (str,)),      # hexadecimal: "03000000"
+    "REG_MULTI_SZ": (REG_MULTI_SZ, (list,)),
+}
+
+PERFIL_DEFECTO = {
+    "tareas": [],
+    "registro": [],
+    "arranque": {
+        "bloquear": [
+            "onedrive",
+            "teams",
+            "msedge",
+            "edge",
+            "adobe",
+            "google",
+            "java",
+            "spotify",
+            "zoom",
+            "updater",
+            "CCXProcess",
+            "discord",
+            "steam",
+            "epicgameslauncher",
+            "battlenet",
+            "spotify",
+            "apple",
+            "itunes",
+            "quicktime",
+            "dropbox",
+            "skype",
+            "microsoft 365 Copilot",
+            "mobile device",
+            "jusched"
+        ],
+        "proteger": [
+            "defender",
+            "security",
+            "intel",
+            "realtek",
+            "synaptics",
+            "audio",
+            "graphics",
+            "nvidia",
+            "amd"
+        ],
+    },
+    "usuarios": {"administrador": None, "estandar": []},
+}
+
+# Los planes guardados se compilaron con estos valores por defecto: si cambian, se recompilan
+HUELLA_DEFECTO = hashlib.sha256(json.dumps(PERFIL_DEFECTO, sort_keys=True).encode()).hexdigest()[:16]
+
+# usuario=True: la clave es del usuario objetivo (HKCU o su hive en HKU\<SID>)
+ValorRegistro = namedtuple("ValorRegistro", ["usuario", "hive", "ruta", "nombre", "tipo", "valor"])
+
+PlanPerfil = namedtuple("PlanPerfil", ["nombre", "origen", "hash", "tareas", "registro", "bloquear",
+                                       "proteger", "administrador", "estandar"])
+
+
+class ErrorPerfil(ValueError):
+    """Perfil con errores; `errores` tiene uno por línea"""
+
+    def __init__(self, ruta, errores):
+        self.ruta = ruta
+        self.errores = errores
+        super().__init__(f"{ruta}: " + "; ".join(errores))
+
+
+def directorio_planes():
+    """%LOCALAPPDATA%\\CLA-WinConfig\\perfiles o ~/.cache fuera de Windows"""
+    return directorio_datos("perfiles")
+
+
+def archivo_perfil(carpeta_centro):
+    """perfil.json o perfil.toml de la carpeta del centro (None si no tiene)"""
+    for nombre in ARCHIVOS_PERFIL:
+        ruta = Path(carpeta_centro) / nombre
+        if ruta.is_file() and (nombre.endswith(".json") or tomllib):
+            return ruta
+    return None
+
+
+def leer_perfil(ruta):
+    ruta = Path(ruta)
+    try:
+        if ruta.suffix == ".toml":
+            with open(ruta, "rb") as f:
+                return tomllib.load(f)
+        return json.loads(ruta.read_text(encoding="utf-8-sig"))
+    except ValueError as e:  # también TOMLDecodeError y UnicodeDecodeError
+        raise ErrorPerfil(ruta, [f"formato no válido: {e}"]) from None
+
+
+def _lista_de_textos(valor, campo, errores):
+    if not isinstance(valor, list) or not all(isinstance(v, str) and v for v in valor):
+        errores.append(f"'{campo}' debe ser una lista de textos")
+        return []
+    return valor
+
+
+def validar(datos):
+    """Lista de errores del perfil (vacía si es válido)"""
+    if not isinstance(datos, dict):
+        return ["el perfil debe ser un objeto"]
+    errores = []
+    conocidas = {"nombre", "tareas", "registro", "arranque", "usuarios"}
+    for campo in sorted(set(datos) - conocidas):
+        errores.append(f"sección desconocida '{campo}'")
+
+    if "nombre" in datos and not (isinstance(datos["nombre"], str) and datos["nombre"].strip()):
+        errores.append("'nombre' debe ser un texto")
+    for tarea in _lista_de_textos(datos.get("tareas", []), "tareas", errores):
+        if tarea not in TAREAS:
+            errores.append(f"tarea desconocida '{tarea}'")
+
+    registro = datos.get("registro", [])
+    if not isinstance(registro, list):
+        errores.append("'registro' debe ser una lista")
+        registro = []
+    for i, valor in enumerate(registro, 1):
+        if not isinstance(valor, dict):
+            errores.append(f"registro[{i}]: debe ser un objeto")
+            continue
+        faltan = [c for c in ("clave", "nombre", "tipo", "valor") if c not in valor]
+        if faltan:
+            errores.append(f"registro[{i}]: falta {', '.join(faltan)}")
+            continue
+        hive = str(valor["clave"]).partition("\\")[0].upper()
+        if not isinstance(valor["clave"], str) or hive not in HIVES or "\\" not in valor["clave"]:
+            errores.append(f"registro[{i}]: la clave debe empezar por HKCU\\ o HKLM\\")
+        if not isinstance(valor["nombre"], str):
+            errores.append(f"registro[{i}]: 'nombre' debe ser un texto")
+        if not isinstance(valor["tipo"], str) or valor["tipo"] not in TIPOS:
+            errores.append(f"registro[{i}]: tipo '{valor['tipo']}' no admitido")
+        elif not isinstance(valor["valor"], TIPOS[valor["tipo"]][1]) or isinstance(valor["valor"], bool):
+            errores.append(f"registro[{i}]: valor no válido para {valor['tipo']}")
+        elif valor["tipo"] == "REG_BINARY":
+            try:
+                bytes.fromhex(valor["valor"])
+            except ValueError:
+                errores.append(f"registro[{i}]: REG_BINARY debe estar en hexadecimal")
+
+    arranque = datos.get("arranque", {})
+    if not isinstance(arranque, dict):
+        errores.append("'arranque' debe ser un objeto")
+    else:
+        for campo in ("bloquear", "proteger"):
+            if campo in arranque:
+                _lista_de_textos(arranque[campo], f"arranque.{campo}", errores)
+
+    usuarios = datos.get("usuarios", {})
+    if not isinstance(usuarios, dict):
+        errores.append("'usuarios' debe ser un objeto")
+    else:
+        if usuarios.get("administrador") is not None and not isinstance(usuarios["administrador"], str):
+            errores.append("'usuarios.administrador' debe ser un texto")
+        if "estandar" in usuarios:
+            _lista_de_textos(usuarios["estandar"], "usuarios.estandar", errores)
+    return errores
+
+
+def _unicos(patrones):
+    """Patrones en minúsculas, sin repetidos y en su orden"""
+    return tuple(dict.fromkeys(p.lower() for p in patrones))
+
+
+def compilar(datos, origen=None, hash_perfil=None):
+    """PlanPerfil a partir de un perfil ya validado"""
+    arranque = {**PERFIL_DEFECTO["arranque"], **datos.get("arranque", {})}
+    usuarios = {**PERFIL_DEFECTO["usuarios"], **datos.get("usuarios", {})}
+    registro = []
+    for valor in datos.get("registro", []):
+        hive, _, ruta = valor["clave"].partition("\\")
+        hive = HIVES[hive.upper()]
+        tipo = TIPOS[valor["tipo"]][0]
+        dato = bytes.fromhex(valor["valor"]) if tipo == REG_BINARY else valor["valor"]
+        registro.append(ValorRegistro(hive == HKEY_CURRENT_USER, hive, ruta.strip("\\"), valor["nombre"],
+                                      tipo, dato))
+    return PlanPerfil(
+        nombre=datos.get("nombre"),
+        origen=str(origen) if origen else None,
+        hash=hash_perfil,
+        tareas=tuple(datos.get("tareas", ())),
+        registro=tuple(registro),
+        bloquear=_unicos(arranque["bloquear"]),
+        proteger=_unicos(arranque["proteger"]),
+        administrador=usuarios["administrador"],
+        estandar=tuple(usuarios["estandar"]),
+    )
+
+
+def _a_json(plan):
+    datos = plan._asdict()
+    datos["registro"] = [v._replace(valor=v.valor.hex() if v.tipo == REG_BINARY else v.valor)._asdict()
+                         for v in plan.registro]
+    return {"version": VERSION_PLAN, "defecto": HUELLA_DEFECTO, "plan": datos}
+
+
+def _desde_json(datos):
+    plan = datos["plan"]
+    registro = []
+    for v in plan["registro"]:
+        valor = ValorRegistro(**v)
+        registro.append(valor._replace(valor=bytes.fromhex(valor.valor)) if valor.tipo == REG_BINARY else valor)
+    return PlanPerfil(**{**plan, "registro": tuple(registro), "tareas": tuple(plan["tareas"]),
+                         "bloquear": tuple(plan["bloquear"]), "proteger": tuple(plan["proteger"]),
+                         "estandar": tuple(plan["estandar"])})
+
+
+class CachePlanes:
+    """
+    Planes compilados. En memoria por ruta (mientras no cambien fecha ni
+    tamaño del archivo no se vuelve a leer) y en disco por hash del perfil.
+    """
+
+    def __init__(self, carpeta=None):
+        self.carpeta = Path(carpeta) if carpeta else directorio_planes()
+        self.compilaciones = 0
+        self._memoria = {}
+        self._defecto = None
+        self._lock = threading.Lock()
+
+    def defecto(self):
+        with self._lock:
+            if self._defecto is None:
+                self._defecto = compilar(PERFIL_DEFECTO)
+            return self._defecto
+
+    def plan(self, carpeta_centro):
+        """PlanPerfil del centro (el de PERFIL_DEFECTO si no tiene perfil); ErrorPerfil si no es válido"""
+        ruta = archivo_perfil(carpeta_centro)
+        if ruta is None:
+            return self.defecto()
+        estado = os.stat(ruta)
+        clave = os.path.normcase(os.path.abspath(ruta))
+        firma = (estado.st_mtime_ns, estado.st_size)
+        with self._lock:
+            guardado = self._memoria.get(clave)
+            if guardado and guardado[0] == firma:
+                return guardado[1]
+
+        hash_perfil = hash_archivo(ruta)
+        plan = self._cargar(hash_perfil)
+        if plan is None:
+            datos = leer_perfil(ruta)
+            errores = validar(datos)
+            if errores:
+                raise ErrorPerfil(ruta, errores)
+            plan = compilar(datos, ruta, hash_perfil)
+            self.compilaciones += 1
+            self._guardar(plan)
+        plan = plan._replace(origen=str(ruta))
+        with self._lock:
+            self._memoria[clave] = (firma, plan)
+        return plan
+
+    def _ruta(self, hash_perfil):
+        return self.carpeta / f"{hash_perfil}.json"
+
+    def _cargar(self, hash_perfil):
+        try:
+            datos = json.loads(self._ruta(hash_perfil).read_text(encoding="utf-8"))
+            if datos.get("version") == VERSION_PLAN and datos.get("defecto") == HUELLA_DEFECTO:
+                return _desde_json(datos)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _guardar(self, plan):
+        try:
+            self.carpeta.mkdir(parents=True, exist_ok=True)
+            temporal = self._ruta(plan.hash).with_suffix(f".{os.getpid()}.tmp")
+            temporal.write_text(json.dumps(_a_json(plan), ensure_ascii=False), encoding="utf-8")
+            os.replace(temporal, self._ruta(plan.hash))
+        except OSError:
+            pass
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def obtener_cache_planes():
+    """Caché de planes compartida por todo el proceso"""
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CachePlanes()
+        return _cache
+
+
+def plan_centro(carpeta_centro):
+    return obtener_cache_planes().plan(carpeta_centro)
+
+
+def centros(carpeta_assets):
+    """
+    Centros disponibles: nombre visible -> carpeta. Los de CENTROS más las
+    carpetas con perfil; el "nombre" del perfil sustituye al predefinido.
+    """
+    from .assets import CENTROS
+
+    por_carpeta = {carpeta: nombre for nombre, carpeta in CENTROS.items()}
+    try:
+        carpetas = sorted(e.name for e in os.scandir(carpeta_assets) if e.is_dir())
+    except OSError:
+        carpetas = []
+    for carpeta in carpetas:
+        if archivo_perfil(Path(carpeta_assets) / carpeta) is None:
+            continue
+        try:
+            nombre = plan_centro(Path(carpeta_assets) / carpeta).nombre
+        except (ErrorPerfil, OSError):
+            nombre = None
+        por_carpeta[carpeta] = nombre or por_carpeta.get(carpeta, carpeta)
+    return {nombre: carpeta for carpeta, nombre in por_carpeta.items()}
@@ -0,0 +1,111 @@
+"""
+Planificador de tareas con dependencias
+Cada tarea declara de qué otras depende y qué recursos comparte (el hive
+del usuario, el explorador...). Las tareas independientes se ejecutan en
+paralelo en un pool de hilos; dos tareas con un recurso en común nunca
+coinciden en el tiempo.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Tarea:
+    """Unidad de trabajo: funcion() devuelve True/False (o cualquier resultado)"""
+
+    def __init__(self, nombre, funcion, depende=(), recursos=(), cuenta=True):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.depende = tuple(depende)
+        self.recursos = frozenset(recursos)
+        # Si cuenta para el total de tareas exitosas
+        self.cuenta = cuenta
+
+
+class PlanificadorTareas:
+    """
+    Ejecuta un grafo de tareas respetando dependencias y recursos.
+    Las dependencias solo ordenan: una tarea se ejecuta aunque la que
+    la precede haya fallado. Dependencias a tareas no agregadas se ignoran.
+    """
+
+    def __init__(self, max_hilos=4, callback=None):
+        self.max_hilos = max_hilos
+        self.callback = callback
+        self.tareas = {}
+        self.resultados = {}
+        self.duraciones = {}
+
+    def log(self, mensaje):
+        if self.callback:
+            self.callback(mensaje)
+
+    def agregar(self, nombre, funcion, depende=(), recursos=(), cuenta=True):
+        if nombre in self.tareas:
+            raise ValueError(f"Tarea duplicada: {nombre}")
+        self.tareas[nombre] = Tarea(nombre, funcion, depende, recursos, cuenta)
+        return self.tareas[nombre]
+
+    def exitosos(self):
+        """(exitosos, total) de las tareas que cuentan"""
+        contadas = [t for t in self.tareas.values() if t.cuenta]
+        return sum(1 for t in contadas if self.resultados.get(t.nombre) is True), len(contadas)
+
+    def _correr(self, tarea):
+        inicio = time.perf_counter()
+        try:
+            return tarea.funcion()
+        except Exception as e:
+            self.log(f"✗ Error en la tarea {tarea.nombre}: {e}")
+            return False
+        finally:
+            self.duraciones[tarea.nombre] = time.perf_counter() - inicio
+
+    def ejecutar(self):
+        """Ejecuta todas las tareas y devuelve {nombre: resultado}"""
+        pendientes = dict(self.tareas)
+        dependencias = {
+            nombre: {d for d in t.depende if d in self.tareas}
+            for nombre, t in self.tareas.items()
+        }
+        completadas = set()
+        ocupados = set()
+        activas = 0
+        cond = threading.Condition()
+
+        def terminar(tarea, futuro):
+            nonlocal activas
+            with cond:
+                try:
+                    self.resultados[tarea.nombre] = futuro.result()
+                except Exception:
+                    self.resultados[tarea.nombre] = False
+                completadas.add(tarea.nombre)
+                ocupados.difference_update(tarea.recursos)
+                activas -= 1
+                cond.notify_all()
+
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as pool:
+            with cond:
+                while pendientes:
+                    lanzadas = 0
+                    for nombre, tarea in list(pendientes.items()):
+                        if activas >= self.max_hilos:
+                            break
+                        if not dependencias[nombre] <= completadas or tarea.recursos & ocupados:
+                            continue
+                        del pendientes[nombre]
+                        ocupados.update(tarea.recursos)
+                        activas += 1
+                        lanzadas += 1
+                        futuro = pool.submit(self._correr, tarea)
+                        futuro.add_done_callback(lambda f, t=tarea: terminar(t, f))
+                    if not lanzadas:
+                        if not activas:
+                            raise ValueError(f"Dependencias cíclicas entre: {', '.join(pendientes)}")
+                        cond.wait()
+                while activas:
+                    cond.wait()
+
+        return dict(self.resultados)
@@ -0,0 +1,340 @@
+"""
+Ejecución de comandos PowerShell mediante sesiones persistentes
+Evita pagar el arranque en frío de powershell.exe en cada consulta
+"""
+
+import atexit
+import base64
+import itertools
+import json
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from .instrumentacion import registrar
+
+# Prefijo que delimita las respuestas del host dentro de stdout.
+# Cualquier otra línea (Write-Host, avisos de módulos...) se descarta.
+MARCA_RESPUESTA = "<<CLA-PS>>"
+
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+# Bucle que corre dentro de powershell.exe: lee peticiones JSON por stdin,
+# ejecuta el script recibido y responde una línea JSON enmarcada por stdout.
+SCRIPT_HOST = r"""
+$utf8 = New-Object System.Text.UTF8Encoding $false
+[Console]::InputEncoding = $utf8
+[Console]::OutputEncoding = $utf8
+$ProgressPreference = 'SilentlyContinue'
+while ($true) {
+    $linea = [Console]::In.ReadLine()
+    if ($linea -eq $null) { break }
+    if (-not $linea.Trim()) { continue }
+    $peticion = $linea | ConvertFrom-Json
+    $codigo = 0
+    $salida = ''
+    $errores = ''
+    try {
+        $script = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($peticion.script))
+        $global:LASTEXITCODE = 0
+        $res = @(& ([ScriptBlock]::Create($script)) 2>&1)
+        $err = @($res | Where-Object { $_ -is [System.Management.Automation.ErrorRecord] })
+        $out = @($res | Where-Object { $_ -isnot [System.Management.Automation.ErrorRecord] })
+        $salida = ($out | Out-String).Trim()
+        $errores = ($err | Out-String).Trim()
+        if ($err.Count -gt 0 -or $global:LASTEXITCODE) { $codigo = 1 }
+    } catch {
+        $codigo = 1
+        $errores = $_.Exception.Message
+    }
+    $respuesta = @{ id = $peticion.id; codigo = $codigo; stdout = $salida; stderr = $errores } | ConvertTo-Json -Compress
+    [Console]::Out.WriteLine('<<CLA-PS>>' + $respuesta)
+    [Console]::Out.Flush()
+}
+"""
+
+
+def comando_powershell():
+    """Devuelve el comando que arranca el host PowerShell persistente"""
+    codificado = base64.b64encode(SCRIPT_HOST.encode("utf-16-le")).decode("ascii")
+    return [
+        "powershell",
+        "-NoProfile",
+        "-NoLogo",
+        "-NonInteractive",
+        "-ExecutionPolicy", "Bypass",
+        "-EncodedCommand", codificado
+    ]
+
+
+def comando_shell_simulado(ruta_guion):
+    """
+    Devuelve el comando del shell simulado (ver shell_simulado.py).
+    Habla el mismo protocolo que el host real y permite probar en Linux.
+    """
+    return [sys.executable, str(Path(__file__).with_name("shell_simulado.py")), str(ruta_guion)]
+
+
+class ErrorSesion(Exception):
+    """
+    La sesión PowerShell murió o respondió algo inválido.
+    `enviado` indica si el script llegó a la sesión (pudo ejecutarse, entero o en parte).
+    """
+
+    def __init__(self, mensaje, enviado=False):
+        super().__init__(mensaje)
+        self.enviado = enviado
+
+
+class EjecutorPowerShell:
+    """
+    Interfaz común para ejecutar scripts PowerShell.
+    ejecutar() devuelve un subprocess.CompletedProcess (returncode, stdout, stderr)
+    para que los llamadores no dependan de la implementación.
+    `idempotente=True` marca los scripts que solo consultan: pueden repetirse
+    si la sesión se cae a mitad de ejecución.
+    """
+
+    def ejecutar(self, script, timeout=None, idempotente=False):
+        raise NotImplementedError
+
+    def cerrar(self):
+        pass
+
+
+class EjecutorProcesoUnico(EjecutorPowerShell):
+    """Lanza un powershell.exe nuevo por comando (comportamiento clásico)"""
+
+    def ejecutar(self, script, timeout=None, idempotente=False):
+        cmd = ["powershell", "-NoProfile", "-Command", script]
+        return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                              creationflags=CREATE_NO_WINDOW)
+
+
+class SesionPowerShell:
+    """Un proceso PowerShell vivo que atiende peticiones de una en una"""
+
+    def __init__(self, comando=None):
+        self.comando = comando or comando_powershell()
+        self.proceso = None
+        self._lineas = None
+        self._eof = threading.Event()
+        self._ids = itertools.count(1)
+
+    def iniciar(self):
+        self.proceso = subprocess.Popen(
+            self.comando,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            creationflags=CREATE_NO_WINDOW
+        )
+        # Hilo lector: permite esperar respuestas con timeout sin bloquear
+        self._lineas = queue.Queue()
+        self._eof = threading.Event()
+        lector = threading.Thread(target=self._leer_salida, args=(self.proceso, self._lineas, self._eof))
+        lector.daemon = True
+        lector.start()
+
+    @staticmethod
+    def _leer_salida(proceso, lineas, eof):
+        for linea in proceso.stdout:
+            lineas.put(linea)
+        eof.set()
+        lineas.put(None)  # EOF: el proceso terminó
+
+    def viva(self):
+        return (self.proceso is not None
+                and not self._eof.is_set()
+                and self.proceso.poll() is None)
+
+    def ejecutar(self, script, timeout=None):
+        if not self.viva():
+            raise ErrorSesion("La sesión PowerShell no está activa")
+
+        id_peticion = next(self._ids)
+        peticion = {
+            "id": id_peticion,
+            "script": base64.b64encode(script.encode("utf-8")).decode("ascii")
+        }
+        try:
+            self.proceso.stdin.write(json.dumps(peticion) + "\n")
+            self.proceso.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise ErrorSesion(f"No se pudo escribir en la sesión: {e}")
+
+        while True:
+            try:
+                linea = self._lineas.get(timeout=timeout)
+            except queue.Empty:
+                # La sesión queda en estado desconocido: se descarta
+                self.cerrar()
+                raise subprocess.TimeoutExpired(script, timeout)
+
+            if linea is None:
+                raise ErrorSesion("La sesión PowerShell terminó inesperadamente", enviado=True)
+            if not linea.startswith(MARCA_RESPUESTA):
+                continue
+
+            try:
+                respuesta = json.loads(linea[len(MARCA_RESPUESTA):])
+            except ValueError:
+                raise ErrorSesion(f"Respuesta no válida: {linea.strip()}", enviado=True)
+            if respuesta.get("id") != id_peticion:
+                continue
+
+            return subprocess.CompletedProcess(
+                script,
+                int(respuesta.get("codigo", 1)),
+                respuesta.get("stdout") or "",
+                respuesta.get("stderr") or ""
+            )
+
+    def verificar(self, timeout=10):
+        """Chequeo de salud: la sesión debe contestar un eco"""
+        try:
+            r = self.ejecutar("'pong'", timeout=timeout)
+            return r.returncode == 0 and r.stdout.strip() == "pong"
+        except (ErrorSesion, subprocess.TimeoutExpired):
+            return False
+
+    def cerrar(self):
+        if self.proceso is None:
+            return
+        try:
+            self.proceso.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.proceso.wait(timeout=2)
+        except Exception:
+            self.proceso.kill()
+        self.proceso = None
+
+
+class PoolPowerShell(EjecutorPowerShell):
+    """
+    Pool de sesiones PowerShell persistentes.
+    Las sesiones se crean bajo demanda, se verifican antes de reutilizarse
+    tras un fallo y se reinician si el proceso muere. Solo se reintenta el
+    script si no llegó a la sesión o si es idempotente.
+    """
+
+    def __init__(self, tamano=2, comando=None, timeout_defecto=60):
+        self.tamano = tamano
+        self.comando = comando
+        self.timeout_defecto = timeout_defecto
+        self.reinicios = 0
+        self._libres = queue.LifoQueue()
+        self._creadas = 0
+        self._lock = threading.Lock()
+        self._sesiones = []
+        self._cerrado = False
+
+    def _nueva_sesion(self):
+        sesion = SesionPowerShell(self.comando)
+        sesion.iniciar()
+        with self._lock:
+            self._sesiones.append(sesion)
+        return sesion
+
+    def _tomar(self):
+        with self._lock:
+            if self._cerrado:
+                raise ErrorSesion("El pool de PowerShell está cerrado")
+            puede_crear = self._libres.empty() and self._creadas < self.tamano
+            if puede_crear:
+                self._creadas += 1
+        if puede_crear:
+            try:
+                return self._nueva_sesion()
+            except Exception:
+                with self._lock:
+                    self._creadas -= 1
+                raise
+        return self._libres.get()
+
+    def _devolver(self, sesion):
+        self._libres.put(sesion)
+
+    def _reiniciar(self, sesion):
+        sesion.cerrar()
+        with self._lock:
+            if sesion in self._sesiones:
+                self._sesiones.remove(sesion)
+            self.reinicios += 1
+        return self._nueva_sesion()
+
+    def ejecutar(self, script, timeout=None, idempotente=False):
+        timeout = timeout or self.timeout_defecto
+        sesion = self._tomar()
+        try:
+            if not sesion.viva():
+                sesion = self._reiniciar(sesion)
+            try:
+                return sesion.ejecutar(script, timeout=timeout)
+            except ErrorSesion as e:
+                sesion = self._reiniciar(sesion)
+                # Un script que cambia el estado no se repite si llegó a la sesión:
+                # pudo aplicarse antes de la caída
+                if e.enviado and not idempotente:
+                    raise
+                registrar("reintentos")
+                return sesion.ejecutar(script, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            sesion = self._reiniciar(sesion)
+            raise
+        finally:
+            self._devolver(sesion)
+
+    def verificar(self):
+        """Verifica todas las sesiones libres y reinicia las que no respondan"""
+        sanas = 0
+        pendientes = []
+        while True:
+            try:
+                pendientes.append(self._libres.get_nowait())
+            except queue.Empty:
+                break
+        for sesion in pendientes:
+            if not sesion.verificar():
+                sesion = self._reiniciar(sesion)
+            else:
+                sanas += 1
+            self._devolver(sesion)
+        return sanas
+
+    def cerrar(self):
+        with self._lock:
+            self._cerrado = True
+            sesiones = list(self._sesiones)
+            self._sesiones.clear()
+        for sesion in sesiones:
+            sesion.cerrar()
+
+
+_ejecutor_compartido = None
+_lock_compartido = threading.Lock()
+
+
+def obtener_ejecutor():
+    """
+    Devuelve el ejecutor compartido por ConfiguradorPC y GestorUsuarios.
+    Si no hay powershell.exe disponible se usa el modo de proceso único.
+    """
+    global _ejecutor_compartido
+    with _lock_compartido:
+        if _ejecutor_compartido is None:
+            if shutil.which("powershell"):
+                _ejecutor_compartido = PoolPowerShell()
+            else:
+                _ejecutor_compartido = EjecutorProcesoUnico()
+            atexit.register(_ejecutor_compartido.cerrar)
+        return _ejecutor_compartido
@@ -0,0 +1,339 @@
+"""
+Escritura agrupada en el registro de Windows
+RegistryBatch junta las escrituras por clave (hive, ruta), abre cada clave
+una sola vez y aplica todos sus valores de golpe al hacer flush().
+Los valores encolados describen el estado deseado: antes de escribir se
+leen los actuales y solo se aplica la diferencia.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+try:
+    import winreg
+except ImportError:
+    # Fuera de Windows solo está disponible el backend en memoria
+    winreg = None
+
+from .instrumentacion import registrar
+
+# Constantes de hive y tipos (mismos valores que winreg, también fuera de Windows)
+HKEY_CURRENT_USER = getattr(winreg, "HKEY_CURRENT_USER", 0x80000001)
+HKEY_LOCAL_MACHINE = getattr(winreg, "HKEY_LOCAL_MACHINE", 0x80000002)
+HKEY_USERS = getattr(winreg, "HKEY_USERS", 0x80000003)
+
+REG_SZ = getattr(winreg, "REG_SZ", 1)
+REG_EXPAND_SZ = getattr(winreg, "REG_EXPAND_SZ", 2)
+REG_BINARY = getattr(winreg, "REG_BINARY", 3)
+REG_DWORD = getattr(winreg, "REG_DWORD", 4)
+REG_MULTI_SZ = getattr(winreg, "REG_MULTI_SZ", 7)
+REG_QWORD = getattr(winreg, "REG_QWORD", 11)
+
+NOMBRES_HIVE = {
+    HKEY_CURRENT_USER: "HKCU",
+    HKEY_LOCAL_MACHINE: "HKLM",
+    HKEY_USERS: "HKU",
+}
+
+ResultadoClave = namedtuple("ResultadoClave", ["hive", "ruta", "escritos", "error", "tareas", "sin_cambios"])
+# Diferencia entre el valor actual (None si no existe) y el deseado
+Diferencia = namedtuple("Diferencia", ["hive", "ruta", "nombre", "actual", "deseado"])
+
+
+def nombre_clave(hive, ruta):
+    """Texto legible de una clave: HKU\\S-1-5-...\\Control Panel\\Desktop"""
+    return f"{NOMBRES_HIVE.get(hive, hive)}\\{ruta}"
+
+
+class BackendRegistro:
+    """Interfaz mínima sobre el registro; cuenta lecturas, aperturas y escrituras"""
+
+    def __init__(self):
+        self.lecturas = 0
+        self.aperturas = 0
+        self.escrituras = 0
+
+    def leer(self, hive, ruta, nombres):
+        """{nombre: (tipo, valor)} de los valores existentes; {} si la clave no existe"""
+        raise NotImplementedError
+
+    def enumerar(self, hive, ruta):
+        """{nombre: (tipo, valor)} de todos los valores de la clave; {} si no existe"""
+        raise NotImplementedError
+
+    def abrir(self, hive, ruta):
+        raise NotImplementedError
+
+    def escribir(self, clave, nombre, tipo, valor):
+        raise NotImplementedError
+
+    def eliminar(self, clave, nombre):
+        raise NotImplementedError
+
+    def cerrar(self, clave):
+        pass
+
+
+class BackendWinreg(BackendRegistro):
+    """Registro real mediante winreg"""
+
+    def leer(self, hive, ruta, nombres):
+        try:
+            clave = winreg.OpenKey(hive, ruta, 0, winreg.KEY_READ)
+        except FileNotFoundError:
+            return {}
+        self.lecturas += 1
+        actuales = {}
+        try:
+            for nombre in nombres:
+                try:
+                    valor, tipo = winreg.QueryValueEx(clave, nombre)
+                except FileNotFoundError:
+                    continue
+                actuales[nombre] = (tipo, valor)
+        finally:
+            winreg.CloseKey(clave)
+        return actuales
+
+    def enumerar(self, hive, ruta):
+        try:
+            clave = winreg.OpenKey(hive, ruta, 0, winreg.KEY_READ)
+        except FileNotFoundError:
+            return {}
+        self.lecturas += 1
+        valores = {}
+        try:
+            i = 0
+            while True:
+                try:
+                    nombre, valor, tipo = winreg.EnumValue(clave, i)
+                except OSError:
+                    break
+                valores[nombre] = (tipo, valor)
+                i += 1
+        finally:
+            winreg.CloseKey(clave)
+        return valores
+
+    def abrir(self, hive, ruta):
+        clave = winreg.CreateKeyEx(hive, ruta, 0, winreg.KEY_SET_VALUE)
+        self.aperturas += 1
+        return clave
+
+    def escribir(self, clave, nombre, tipo, valor):
+        winreg.SetValueEx(clave, nombre, 0, tipo, valor)
+        self.escrituras += 1
+
+    def eliminar(self, clave, nombre):
+        winreg.DeleteValue(clave, nombre)
+        self.escrituras += 1
+
+    def cerrar(self, clave):
+        winreg.CloseKey(clave)
+
+
+class BackendMemoria(BackendRegistro):
+    """
+    Registro simulado en memoria para pruebas fuera de Windows.
+    Las rutas no distinguen mayúsculas, igual que en Windows.
+    """
+
+    def __init__(self, latencia=0.0, claves_con_error=()):
+        super().__init__()
+        self.latencia = latencia
+        self.claves_con_error = {(h, r.lower()) for h, r in claves_con_error}
+        self.datos = {}
+        self._lock = threading.Lock()
+
+    def leer(self, hive, ruta, nombres):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.lecturas += 1
+            valores = self.datos.get((hive, ruta.lower()), {})
+            return {n: (valores[n][1], valores[n][0]) for n in nombres if n in valores}
+
+    def enumerar(self, hive, ruta):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.lecturas += 1
+            valores = self.datos.get((hive, ruta.lower()), {})
+            return {n: (tipo, valor) for n, (valor, tipo) in valores.items()}
+
+    def abrir(self, hive, ruta):
+        if self.latencia:
+            time.sleep(self.latencia)
+        clave = (hive, ruta.lower())
+        if clave in self.claves_con_error:
+            raise PermissionError(f"Acceso denegado: {nombre_clave(hive, ruta)}")
+        with self._lock:
+            self.aperturas += 1
+            self.datos.setdefault(clave, {})
+        # Lo que en el registro real cuentan los eventos de auditoría de winreg
+        registrar("registro_aperturas")
+        return clave
+
+    def escribir(self, clave, nombre, tipo, valor):
+        with self._lock:
+            self.datos[clave][nombre] = (valor, tipo)
+            self.escrituras += 1
+        registrar("registro_escrituras")
+
+    def eliminar(self, clave, nombre):
+        with self._lock:
+            if nombre not in self.datos.get(clave, {}):
+                raise FileNotFoundError(f"No existe el valor {nombre}")
+            del self.datos[clave][nombre]
+            self.escrituras += 1
+        registrar("registro_escrituras")
+
+    def valor(self, hive, ruta, nombre):
+        """Valor almacenado (o None) para inspección en pruebas"""
+        dato = self.datos.get((hive, ruta.lower()), {}).get(nombre)
+        return dato[0] if dato else None
+
+
+def backend_por_defecto():
+    return BackendWinreg() if winreg else BackendMemoria()
+
+
+class RegistryBatch:
+    """
+    Lote de escrituras en el registro.
+    establecer() solo encola; flush() lee cada clave una vez, abre para
+    escritura solo las que difieren y devuelve un ResultadoClave por clave.
+    Si el mismo valor se encola dos veces, prevalece la última escritura.
+    Con diferencial=False se escribe todo sin comparar.
+    """
+
+    def __init__(self, backend=None, diferencial=True):
+        self.backend = backend or backend_por_defecto()
+        self.diferencial = diferencial
+        self._claves = {}
+        self._tareas = {}
+        self._posteriores = []
+        self._lock = threading.Lock()
+        self.resultados = []
+
+    def establecer(self, hive, ruta, nombre, tipo, valor, tarea=None):
+        clave = (hive, ruta)
+        with self._lock:
+            self._claves.setdefault(clave, {})[nombre] = (tipo, valor)
+            if tarea:
+                self._tareas.setdefault(clave, set()).add(tarea)
+
+    def despues_de_flush(self, funcion, tarea=None):
+        """
+        Registra una acción a ejecutar cuando se hayan escrito los valores.
+        Con `tarea` solo se ejecuta si esa tarea cambió algo en el registro.
+        """
+        with self._lock:
+            self._posteriores.append((funcion, tarea))
+
+    def pendientes(self):
+        """Número de valores encolados"""
+        with self._lock:
+            return sum(len(v) for v in self._claves.values())
+
+    def _cambios(self, hive, ruta, valores):
+        """Valores que difieren del registro actual (todos si no se puede leer)"""
+        if not self.diferencial:
+            return dict(valores), {}
+        try:
+            actuales = self.backend.leer(hive, ruta, list(valores))
+        except Exception:
+            return dict(valores), {}
+        cambios = {n: v for n, v in valores.items() if actuales.get(n) != v}
+        return cambios, actuales
+
+    def delta(self):
+        """Diferencias pendientes sin escribir nada (simulación)"""
+        with self._lock:
+            claves = {k: dict(v) for k, v in self._claves.items()}
+        diferencias = []
+        for (hive, ruta), valores in claves.items():
+            cambios, actuales = self._cambios(hive, ruta, valores)
+            for nombre, (tipo, valor) in cambios.items():
+                actual = actuales.get(nombre)
+                diferencias.append(Diferencia(hive, ruta, nombre, actual[1] if actual else None, valor))
+        return diferencias
+
+    def flush(self, lanzar=False):
+        """
+        Aplica las escrituras pendientes que difieran del estado actual.
+        Con lanzar=True el primer error se propaga como OSError.
+        """
+        with self._lock:
+            claves, self._claves = self._claves, {}
+            tareas, self._tareas = self._tareas, {}
+            posteriores, self._posteriores = self._posteriores, []
+
+        resultados = []
+        for (hive, ruta), valores in claves.items():
+            escritos = 0
+            error = None
+            cambios, _ = self._cambios(hive, ruta, valores)
+            if cambios:
+                try:
+                    handle = self.backend.abrir(hive, ruta)
+                    try:
+                        for nombre, (tipo, valor) in cambios.items():
+                            self.backend.escribir(handle, nombre, tipo, valor)
+                            escritos += 1
+                    finally:
+                        self.backend.cerrar(handle)
+                except Exception as e:
+                    error = str(e)
+            resultados.append(ResultadoClave(hive, ruta, escritos, error,
+                                             frozenset(tareas.get((hive, ruta), ())),
+                                             len(valores) - len(cambios)))
+
+        self.resultados.extend(resultados)
+
+        modificadas = set()
+        for r in resultados:
+            if r.escritos and not r.error:
+                modificadas |= r.tareas
+        for funcion, tarea in posteriores:
+            if tarea and tarea not in modificadas:
+                continue
+            try:
+                funcion()
+            except Exception:
+                pass
+
+        if lanzar:
+            fallo = next((r for r in resultados if r.error), None)
+            if fallo:
+                raise OSError(f"{nombre_clave(fallo.hive, fallo.ruta)}: {fallo.error}")
+        return resultados
+
+    def tareas_fallidas(self):
+        """Tareas con al menos una clave que no se pudo escribir"""
+        fallidas = set()
+        for r in self.resultados:
+            if r.error:
+                fallidas |= r.tareas
+        return fallidas
+
+    def tareas_modificadas(self):
+        """Tareas que escribieron al menos un valor"""
+        modificadas = set()
+        for r in self.resultados:
+            if r.escritos:
+                modificadas |= r.tareas
+        return modificadas
+
+    def cumple(self):
+        """True si el registro ya estaba en el estado deseado (nada escrito ni fallido)"""
+        return all(not r.escritos and not r.error for r in self.resultados)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush(lanzar=True)
+        return False
@@ -0,0 +1,250 @@
+"""
+Resolución de nombres de cuenta a SID
+Backends intercambiables: API nativa (advapi32), inventario en memoria,
+PowerShell/WMIC como último recurso y uno falso para pruebas.
+
+Micro-benchmark de los backends disponibles:
+    python -m core.resolvedor_sid Alumno Administrador
+"""
+
+import ctypes
+import os
+import sys
+import time
+
+# Códigos de error de Win32 relevantes
+ERROR_INSUFFICIENT_BUFFER = 122
+ERROR_NONE_MAPPED = 1332
+
+# SID_NAME_USE: solo nos interesan cuentas de usuario
+SID_TYPE_USER = 1
+
+
+class BackendSID:
+    """Interfaz de los backends: resolver() devuelve el SID o None si no existe"""
+
+    nombre = "base"
+    # Un backend autoritativo que responde "no existe" detiene la búsqueda
+    autoritativo = False
+
+    def disponible(self):
+        return True
+
+    def resolver(self, nombre_usuario):
+        raise NotImplementedError
+
+
+class BackendAdvapi32(BackendSID):
+    """LookupAccountNameW + ConvertSidToStringSidW vía ctypes (microsegundos)"""
+
+    nombre = "advapi32"
+    autoritativo = True
+
+    def __init__(self):
+        self._advapi32 = None
+        self._kernel32 = None
+        if sys.platform == "win32":
+            import ctypes.wintypes  # noqa: F401 (solo se usa en Windows)
+            try:
+                self._advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+                self._kernel32 = ctypes.WinDLL("kernel32")
+            except OSError:
+                self._advapi32 = None
+
+    def disponible(self):
+        return self._advapi32 is not None
+
+    def _lookup(self, cuenta):
+        wintypes = ctypes.wintypes
+        tam_sid = wintypes.DWORD(0)
+        tam_dominio = wintypes.DWORD(0)
+        tipo = wintypes.DWORD(0)
+
+        # Primera llamada: obtener tamaños de búfer
+        self._advapi32.LookupAccountNameW(
+            None, cuenta, None, ctypes.byref(tam_sid),
+            None, ctypes.byref(tam_dominio), ctypes.byref(tipo)
+        )
+        error = ctypes.get_last_error()
+        if error == ERROR_NONE_MAPPED:
+            return None
+        if error != ERROR_INSUFFICIENT_BUFFER:
+            raise ctypes.WinError(error)
+
+        sid = ctypes.create_string_buffer(tam_sid.value)
+        dominio = ctypes.create_unicode_buffer(tam_dominio.value)
+        if not self._advapi32.LookupAccountNameW(
+            None, cuenta, sid, ctypes.byref(tam_sid),
+            dominio, ctypes.byref(tam_dominio), ctypes.byref(tipo)
+        ):
+            raise ctypes.WinError(ctypes.get_last_error())
+        if tipo.value != SID_TYPE_USER:
+            return None
+
+        texto = ctypes.c_wchar_p()
+        if not self._advapi32.ConvertSidToStringSidW(sid, ctypes.byref(texto)):
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            return texto.value
+        finally:
+            self._kernel32.LocalFree(texto)
+
+    def resolver(self, nombre_usuario):
+        # Calificar con el nombre del equipo para no resolver una cuenta de dominio homónima
+        equipo = os.environ.get("COMPUTERNAME")
+        if equipo and "\\" not in nombre_usuario:
+            sid = self._lookup(f"{equipo}\\{nombre_usuario}")
+            if sid:
+                return sid
+        return self._lookup(nombre_usuario)
+
+
+class BackendInventario(BackendSID):
+    """Consulta el InventarioUsuarios compartido (refresca una vez si no encuentra)"""
+
+    nombre = "inventario"
+    autoritativo = True
+
+    def __init__(self, inventario):
+        self.inventario = inventario
+
+    def disponible(self):
+        return self.inventario.disponible
+
+    def resolver(self, nombre_usuario):
+        sid = self.inventario.sid_de(nombre_usuario)
+        if not sid:
+            # Puede haberse creado después de la enumeración
+            self.inventario.invalidar()
+            sid = self.inventario.sid_de(nombre_usuario)
+        return sid or None
+
+
+class BackendSubproceso(BackendSID):
+    """Método clásico: Get-LocalUser por PowerShell y WMIC como alternativa"""
+
+    nombre = "subproceso"
+
+    def __init__(self, ejecutor):
+        self.ejecutor = ejecutor
+
+    def resolver(self, nombre_usuario):
+        import subprocess
+
+        r = self.ejecutor.ejecutar(
+            f"(Get-LocalUser -Name '{nombre_usuario}').SID.Value",
+            timeout=10, idempotente=True
+        )
+        sid = r.stdout.strip()
+        if sid.startswith("S-1-5-"):
+            return sid
+
+        cmd_wmic = f'wmic useraccount where name="{nombre_usuario}" get sid'
+        r_wmic = subprocess.run(cmd_wmic, shell=True, capture_output=True, text=True, timeout=10)
+        lineas = r_wmic.stdout.strip().split("\n")
+        if len(lineas) > 1 and lineas[1].strip().startswith("S-1-5-"):
+            return lineas[1].strip()
+        return None
+
+
+class BackendFalso(BackendSID):
+    """Tabla nombre -> SID en memoria, con latencia opcional para pruebas"""
+
+    nombre = "falso"
+
+    def __init__(self, tabla=None, latencia=0.0):
+        self.tabla = {k.lower(): v for k, v in (tabla or {}).items()}
+        self.latencia = latencia
+        self.consultas = 0
+
+    def resolver(self, nombre_usuario):
+        self.consultas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        return self.tabla.get(nombre_usuario.lower())
+
+
+class ResolvedorSID:
+    """
+    Recorre los backends en orden hasta obtener un SID.
+    Si un backend autoritativo responde "no existe" la búsqueda termina;
+    uno que falla con excepción pasa al siguiente y el error se informa.
+    """
+
+    def __init__(self, backends, callback=None):
+        self.backends = list(backends)
+        self.callback = callback
+
+    def log(self, mensaje):
+        if self.callback:
+            self.callback(mensaje)
+
+    def resolver(self, nombre_usuario):
+        """Devuelve (sid, nombre_backend) o (None, None)"""
+        for backend in self.backends:
+            try:
+                if not backend.disponible():
+                    continue
+                sid = backend.resolver(nombre_usuario)
+            except Exception as e:
+                self.log(f"⚠️  Error resolviendo SID con {backend.nombre}: {e}")
+                continue
+            if sid:
+                return sid, backend.nombre
+            if backend.autoritativo:
+                break
+        return None, None
+
+
+def resolvedor_por_defecto(inventario, ejecutor, callback=None):
+    """API nativa primero; inventario y subprocesos como respaldo"""
+    return ResolvedorSID(
+        [BackendAdvapi32(), BackendInventario(inventario), BackendSubproceso(ejecutor)],
+        callback=callback
+    )
+
+
+def medir_backends(backends, nombres, repeticiones=100):
+    """
+    Micro-benchmark: tiempo medio por resolución de cada backend disponible.
+    Devuelve {nombre_backend: segundos_por_resolucion}.
+    """
+    resultados = {}
+    for backend in backends:
+        if not backend.disponible():
+            continue
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            for nombre in nombres:
+                backend.resolver(nombre)
+        total = time.perf_counter() - inicio
+        resultados[backend.nombre] = total / (repeticiones * len(nombres))
+    return resultados
+
+
+def main(argv=None):
+    from .inventario import InventarioUsuarios
+    from .powershell import obtener_ejecutor
+
+    nombres = (argv if argv is not None else sys.argv[1:]) or [os.environ.get("USERNAME", "Administrador")]
+    ejecutor = obtener_ejecutor()
+
+    inventario = InventarioUsuarios(ejecutor)
+    inventario.disponible  # la enumeración inicial no entra en la medición
+
+    backends = [BackendAdvapi32(), BackendInventario(inventario)]
+    rapidos = medir_backends(backends, nombres, repeticiones=1000)
+    # Los subprocesos se miden con pocas repeticiones
+    try:
+        lentos = medir_backends([BackendSubproceso(ejecutor)], nombres, repeticiones=3)
+    except Exception as e:
+        print(f"⚠️  Backend de subproceso no disponible: {e}")
+        lentos = {}
+
+    print(f"Resolución de SID ({', '.join(nombres)}):")
+    for nombre, segundos in {**rapidos, **lentos}.items():
+        print(f"   {nombre:<12} {segundos * 1e6:>12.1f} µs/resolución")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Shell PowerShell simulado para pruebas fuera de Windows
+Habla el mismo protocolo enmarcado que el host de powershell.py.
+
+Uso: python shell_simulado.py guion.json
+
+El guion es un JSON con la forma:
+    {
+        "respuestas": [
+            {"contiene": "Get-LocalUser", "stdout": "S-1-5-21-1-1001", "codigo": 0}
+        ],
+        "por_defecto": {"stdout": "", "stderr": "", "codigo": 0},
+        "ruido": true,
+        "registro": "/tmp/scripts.log"
+    }
+
+- "contiene": la primera respuesta cuyo texto aparezca en el script gana
+- "ruido": escribe una línea sin marca antes de cada respuesta
+- "registro": añade cada script recibido (una línea JSON) a ese archivo
+- Un script que contenga "__caer__" termina el proceso sin responder
+"""
+
+import base64
+import json
+import sys
+
+MARCA_RESPUESTA = "<<CLA-PS>>"
+
+
+def main():
+    with open(sys.argv[1], encoding="utf-8") as f:
+        guion = json.load(f)
+
+    respuestas = guion.get("respuestas", [])
+    por_defecto = guion.get("por_defecto", {})
+
+    for linea in sys.stdin:
+        if not linea.strip():
+            continue
+        peticion = json.loads(linea)
+        script = base64.b64decode(peticion["script"]).decode("utf-8")
+
+        if guion.get("registro"):
+            with open(guion["registro"], "a", encoding="utf-8") as f:
+                f.write(json.dumps(script) + "\n")
+
+        if "__caer__" in script:
+            sys.exit(3)
+
+        if script.strip() == "'pong'":
+            respuesta = {"stdout": "pong"}
+        else:
+            respuesta = next((r for r in respuestas if r.get("contiene", "") in script), por_defecto)
+
+        if guion.get("ruido"):
+            sys.stdout.write("AVISO: salida sin enmarcar\n")
+
+        sys.stdout.write(MARCA_RESPUESTA + json.dumps({
+            "id": peticion["id"],
+            "codigo": respuesta.get("codigo", 0),
+            "stdout": respuesta.get("stdout", ""),
+            "stderr": respuesta.get("stderr", "")
+        }) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Copia local de los assets del centro (staging)
+Sincroniza wallpapers, lockscreen y tareasprogramadas desde la USB (o una
+unidad de red) a una carpeta del equipo, para que el registro no apunte a
+un medio extraíble. Solo se copia lo que cambió (tamaño, mtime y hash) y
+cada archivo se sustituye de forma atómica.
+"""
+
+import errno
+import json
+import os
+import shutil
+import sys
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from .archivos import directorio_datos, hash_archivo
+
+SUBCARPETAS = ("wallpapers", "lockscreen", "tareasprogramadas")
+
+# Tipos de unidad de GetDriveTypeW que conviene copiar al disco local
+DRIVE_REMOVABLE = 2
+DRIVE_REMOTE = 4
+DRIVE_CDROM = 5
+
+ResultadoSync = namedtuple("ResultadoSync", ["destino", "copiados", "omitidos", "eliminados", "bytes"])
+
+
+def directorio_staging():
+    """ProgramData (legible por todos los usuarios) o ~/.cache fuera de Windows"""
+    return directorio_datos("assets", maquina=True)
+
+
+def es_medio_externo(ruta):
+    """True si la ruta está en una USB, CD o unidad de red (solo Windows)"""
+    if sys.platform != "win32":
+        return False
+    try:
+        import ctypes
+        raiz = os.path.splitdrive(os.path.abspath(ruta))[0] + "\\"
+        return ctypes.windll.kernel32.GetDriveTypeW(raiz) in (DRIVE_REMOVABLE, DRIVE_REMOTE, DRIVE_CDROM)
+    except Exception:
+        return False
+
+
+def copiar_archivo(origen, destino):
+    """
+    Copia sin pasar los datos por Python: copy_file_range o sendfile donde
+    existan (Linux) y shutil.copyfile en Windows, que usa la copia del sistema.
+    """
+    with open(origen, "rb") as fo, open(destino, "wb") as fd:
+        restante = os.fstat(fo.fileno()).st_size
+        for llamada in ("copy_file_range", "sendfile"):
+            funcion = getattr(os, llamada, None)
+            if funcion is None:
+                continue
+            try:
+                while restante > 0:
+                    if llamada == "copy_file_range":
+                        copiados = funcion(fo.fileno(), fd.fileno(), restante)
+                    else:
+                        copiados = funcion(fd.fileno(), fo.fileno(), None, restante)
+                    if copiados == 0:
+                        break
+                    restante -= copiados
+                return
+            except OSError as e:
+                # Entre sistemas de archivos distintos o no soportado: probar el siguiente
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF):
+                    raise
+                fo.seek(0)
+                fd.seek(0)
+                fd.truncate()
+                restante = os.fstat(fo.fileno()).st_size
+    shutil.copyfile(origen, destino)
+
+
+class SincronizadorAssets:
+    """
+    Mantiene <destino>/<centro>/{wallpapers,lockscreen,tareasprogramadas}
+    al día con el origen. El manifiesto guarda tamaño y mtime del origen y
+    el hash de la copia: si tamaño y mtime coinciden no se lee el origen.
+    """
+
+    def __init__(self, destino=None, solo_externos=True):
+        self.destino = Path(destino) if destino else directorio_staging()
+        self.solo_externos = solo_externos
+        self._lock = threading.Lock()
+
+    def necesita_staging(self, carpeta_origen):
+        carpeta = Path(carpeta_origen).resolve()
+        try:
+            carpeta.relative_to(self.destino.resolve())
+            return False  # ya es la copia local
+        except ValueError:
+            pass
+        return not self.solo_externos or es_medio_externo(carpeta)
+
+    def _ruta_manifiesto(self, carpeta_local):
+        return carpeta_local / ".manifiesto.json"
+
+    def _leer_manifiesto(self, carpeta_local):
+        try:
+            return json.loads(self._ruta_manifiesto(carpeta_local).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _sincronizar_archivo(self, origen, local, entrada):
+        """Devuelve (entrada_manifiesto, bytes_copiados)"""
+        info = os.stat(origen)
+        if (entrada and local.exists()
+                and entrada["tamano"] == info.st_size and entrada["mtime"] == info.st_mtime_ns):
+            return entrada, 0
+
+        # Tamaño o fecha distintos: comparar contenido antes de copiar
+        if entrada and local.exists() and entrada["tamano"] == info.st_size:
+            digest = hash_archivo(origen)
+            if digest == entrada["hash"]:
+                return {"tamano": info.st_size, "mtime": info.st_mtime_ns, "hash": digest}, 0
+
+        temporal = local.with_name(f".{local.name}.tmp")
+        try:
+            copiar_archivo(origen, temporal)
+            if os.path.getsize(temporal) != info.st_size:
+                raise OSError(f"Copia incompleta de {origen}")
+            digest = hash_archivo(temporal)
+            os.replace(temporal, local)
+        finally:
+            if temporal.exists():
+                temporal.unlink()
+        return {"tamano": info.st_size, "mtime": info.st_mtime_ns, "hash": digest}, info.st_size
+
+    def sincronizar(self, carpeta_origen, nombre_centro=None):
+        """Copia los assets que cambiaron y devuelve un ResultadoSync"""
+        carpeta_origen = Path(carpeta_origen)
+        carpeta_local = self.destino / (nombre_centro or carpeta_origen.name)
+        copiados = omitidos = eliminados = total_bytes = 0
+
+        with self._lock:
+            manifiesto = self._leer_manifiesto(carpeta_local)
+            nuevo = {}
+            for sub in SUBCARPETAS:
+                origen_sub = carpeta_origen / sub
+                local_sub = carpeta_local / sub
+                if not origen_sub.is_dir():
+                    continue
+                local_sub.mkdir(parents=True, exist_ok=True)
+                presentes = set()
+                with os.scandir(origen_sub) as entradas:
+                    for e in entradas:
+                        if not e.is_file():
+                            continue
+                        clave = f"{sub}/{e.name}"
+                        presentes.add(e.name)
+                        entrada, copiado = self._sincronizar_archivo(e.path, local_sub / e.name, manifiesto.get(clave))
+                        nuevo[clave] = entrada
+                        if copiado:
+                            copiados += 1
+                            total_bytes += copiado
+                        else:
+                            omitidos += 1
+                # Lo que ya no está en el origen sobra en la copia local
+                with os.scandir(local_sub) as entradas:
+                    for e in entradas:
+                        if e.is_file() and e.name not in presentes and not e.name.startswith("."):
+                            os.unlink(e.path)
+                            eliminados += 1
+
+            if nuevo != manifiesto:
+                carpeta_local.mkdir(parents=True, exist_ok=True)
+                temporal = self._ruta_manifiesto(carpeta_local).with_suffix(".tmp")
+                temporal.write_text(json.dumps(nuevo, indent=1), encoding="utf-8")
+                os.replace(temporal, self._ruta_manifiesto(carpeta_local))
+
+        return ResultadoSync(carpeta_local, copiados, omitidos, eliminados, total_bytes)
+
+
+_sincronizador_compartido = None
+
+
+def obtener_sincronizador():
+    global _sincronizador_compartido
+    if _sincronizador_compartido is None:
+        _sincronizador_compartido = SincronizadorAssets()
+    return _sincronizador_compartido
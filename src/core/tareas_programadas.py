@@ -0,0 +1,175 @@
+"""
+Instalación incremental de tareas programadas
+Cada XML de assets/<centro>/tareasprogramadas se instala como la tarea de
+su mismo nombre. Un registro en disco guarda el hash del XML con el que se
+instaló cada tarea: solo se instalan las nuevas o modificadas (varias a la
+vez) y se eliminan las que instalamos antes y ya no están en la carpeta.
+Si nada cambió no se lanza ningún schtasks. Los XML se validan antes con el
+catálogo (catalogo_tareas.py): uno con errores no llega a schtasks.
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .archivos import directorio_datos
+from .catalogo_tareas import obtener_catalogo_tareas
+from .powershell import CREATE_NO_WINDOW
+
+ResumenTareas = namedtuple("ResumenTareas", ["instaladas", "sin_cambios", "eliminadas", "errores"])
+
+
+def archivo_registro_tareas():
+    """%PROGRAMDATA%\\CLA-WinConfig\\tareas.json (las tareas son del equipo) o ~/.cache fuera de Windows"""
+    return directorio_datos("tareas.json", maquina=True)
+
+
+class BackendTareas:
+    """Interfaz sobre schtasks: crear()/eliminar() devuelven (ok, mensaje)"""
+
+    def crear(self, nombre, xml):
+        raise NotImplementedError
+
+    def eliminar(self, nombre):
+        raise NotImplementedError
+
+
+class BackendSchtasks(BackendTareas):
+    """schtasks.exe real; `invocaciones` cuenta los procesos lanzados"""
+
+    def __init__(self):
+        self.invocaciones = 0
+        self._lock = threading.Lock()
+
+    def _schtasks(self, *argumentos):
+        with self._lock:
+            self.invocaciones += 1
+        try:
+            r = subprocess.run(["schtasks", *argumentos], capture_output=True, text=True,
+                               creationflags=CREATE_NO_WINDOW)
+        except OSError as e:
+            return False, str(e)
+        return r.returncode == 0, (r.stderr or r.stdout).strip()
+
+    def crear(self, nombre, xml):
+        return self._schtasks("/Create", "/TN", nombre, "/XML", str(xml), "/F")
+
+    def eliminar(self, nombre):
+        return self._schtasks("/Delete", "/TN", nombre, "/F")
+
+
+class BackendTareasFalso(BackendTareas):
+    """Sustituto de schtasks para pruebas: tareas instaladas en memoria y sus invocaciones"""
+
+    def __init__(self, fallar=(), latencia=0.0):
+        self.tareas = {}
+        self.fallar = set(fallar)
+        self.latencia = latencia
+        self.invocaciones = 0
+        self._lock = threading.Lock()
+
+    def crear(self, nombre, xml):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.invocaciones += 1
+            if nombre in self.fallar:
+                return False, "ERROR: Acceso denegado."
+            self.tareas[nombre] = Path(xml).read_bytes()
+            return True, f'CORRECTO: se creó correctamente la tarea programada "{nombre}".'
+
+    def eliminar(self, nombre):
+        with self._lock:
+            self.invocaciones += 1
+            if self.tareas.pop(nombre, None) is None:
+                return False, "ERROR: El sistema no puede encontrar el archivo especificado."
+            return True, f'CORRECTO: se eliminó la tarea programada "{nombre}".'
+
+
+class InstaladorTareas:
+    """
+    Sincroniza las tareas del equipo con una carpeta de XML. El registro
+    solo conoce las tareas instaladas por este programa: las demás tareas
+    del equipo nunca se tocan.
+    """
+
+    def __init__(self, backend=None, registro=None, limite=4, catalogo=None):
+        self.backend = backend or BackendSchtasks()
+        self.registro = Path(registro) if registro else archivo_registro_tareas()
+        self.catalogo = catalogo or obtener_catalogo_tareas()
+        self.limite = max(1, limite)
+        self._lock = threading.Lock()
+
+    def instaladas(self):
+        """{nombre: hash del XML con el que se instaló}"""
+        try:
+            datos = json.loads(self.registro.read_text(encoding="utf-8"))
+            return {n: h for n, h in datos.get("tareas", {}).items() if isinstance(h, str)}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _guardar(self, instaladas):
+        try:
+            self.registro.parent.mkdir(parents=True, exist_ok=True)
+            temporal = self.registro.with_suffix(f".{os.getpid()}.tmp")
+            temporal.write_text(json.dumps({"tareas": instaladas}, indent=2), encoding="utf-8")
+            os.replace(temporal, self.registro)
+        except OSError:
+            pass
+
+    def sincronizar(self, archivos_xml, log=None):
+        """Instala las tareas nuevas o modificadas y elimina las obsoletas; devuelve un ResumenTareas"""
+        log = log or (lambda mensaje: None)
+        with self._lock:
+            anteriores = self.instaladas()
+            deseadas = {t.nombre: t for t in self.catalogo.tareas(archivos_xml)}
+            cambiadas = [t for t in deseadas.values() if anteriores.get(t.nombre) != t.hash]
+            obsoletas = [n for n in anteriores if n not in deseadas]
+            actuales = {n: h for n, h in anteriores.items() if n in deseadas}
+            sin_cambios = len(deseadas) - len(cambiadas)
+
+            # Validación previa: un XML con errores no se instala (la versión anterior, si hay, se conserva)
+            invalidas = [t for t in cambiadas if t.errores]
+            for tarea in invalidas:
+                log(f"   ❌ Tarea '{tarea.nombre}' no válida: {'; '.join(tarea.errores)}")
+            cambiadas = [t for t in cambiadas if not t.errores]
+            errores = len(invalidas)
+            for tarea in cambiadas:
+                for advertencia in tarea.advertencias:
+                    log(f"   ⚠️ Tarea '{tarea.nombre}': {advertencia}")
+
+            with ThreadPoolExecutor(max_workers=self.limite) as pool:
+                resultados = list(pool.map(lambda t: self.backend.crear(t.nombre, t.archivo), cambiadas))
+
+            instaladas = 0
+            for tarea, (ok, msg) in zip(cambiadas, resultados):
+                nombre = tarea.nombre
+                if ok:
+                    actuales[nombre] = tarea.hash
+                    instaladas += 1
+                    log(f"   ✓ Tarea '{nombre}' instalada correctamente")
+                else:
+                    # Sin registrar: se vuelve a intentar en la próxima ejecución
+                    actuales.pop(nombre, None)
+                    log(f"   ❌ Error instalando '{nombre}': {msg}")
+                    errores += 1
+
+            eliminadas = 0
+            for nombre in obsoletas:
+                ok, msg = self.backend.eliminar(nombre)
+                if ok or "no puede encontrar" in msg.lower() or "cannot find" in msg.lower():
+                    log(f"   🗑️ Tarea obsoleta eliminada: {nombre}")
+                    eliminadas += 1
+                else:
+                    actuales[nombre] = anteriores[nombre]
+                    log(f"   ❌ Error eliminando '{nombre}': {msg}")
+                    errores += 1
+
+            if cambiadas or obsoletas:
+                self._guardar(actuales)
+            return ResumenTareas(instaladas, sin_cambios, eliminadas, errores)
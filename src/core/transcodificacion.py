@@ -0,0 +1,210 @@
+"""
+Pre-transcodificación de fondos de pantalla
+Convierte los PC-N.* del centro a JPEG con la resolución y calidad
+indicadas y los guarda en una caché local direccionada por contenido
+(hash del original + parámetros). Así Windows no tiene que generar
+TranscodedWallpaper al iniciar sesión y no se vuelve a leer la USB.
+
+Requiere Pillow; sin él se usan los archivos originales.
+
+Precalentar la caché de un centro:
+    python -m core.transcodificacion CID-Centro_Computo
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from .archivos import directorio_datos, hash_archivo
+
+# Pillow (y el pool de procesos) se importan al convertir, no al arrancar
+PILLOW = importlib.util.find_spec("PIL") is not None
+
+ParametrosFondo = namedtuple("ParametrosFondo", ["ancho", "alto", "calidad"])
+PARAMETROS_DEFECTO = ParametrosFondo(1920, 1080, 90)
+
+# Versión del procedimiento: cambiarla invalida todas las entradas
+VERSION_CACHE = 1
+
+
+def directorio_cache():
+    """
+    Carpeta de la caché. En Windows va a ProgramData porque el fondo
+    también lo leen otros usuarios del equipo.
+    """
+    return directorio_datos("fondos", maquina=True)
+
+
+def convertir_con_pillow(origen, destino, parametros):
+    """Recorta/escala a la resolución pedida (como el estilo Rellenar) y guarda JPEG"""
+    from PIL import Image, ImageOps
+
+    with Image.open(origen) as imagen:
+        imagen = ImageOps.exif_transpose(imagen).convert("RGB")
+        imagen = ImageOps.fit(imagen, (parametros.ancho, parametros.alto), Image.LANCZOS)
+        imagen.save(destino, "JPEG", quality=parametros.calidad, optimize=True, progressive=True)
+
+
+def _transcodificar(origen, destino, parametros, convertir):
+    """Trabajo de un proceso: convierte a un temporal y lo renombra de forma atómica"""
+    temporal = Path(f"{destino}.{os.getpid()}.tmp")
+    try:
+        convertir(origen, temporal, parametros)
+        os.replace(temporal, destino)
+    finally:
+        if temporal.exists():
+            temporal.unlink()
+    return str(destino)
+
+
+class PreprocesadorFondos:
+    """
+    Caché de fondos optimizados.
+    El manifiesto guarda ruta+tamaño+mtime -> hash, así una ejecución
+    repetida solo hace stat() sobre la USB en lugar de releer la imagen.
+    """
+
+    def __init__(self, cache=None, parametros=PARAMETROS_DEFECTO, max_procesos=None, convertir=None):
+        self.cache = Path(cache) if cache else directorio_cache()
+        self.parametros = parametros
+        self.max_procesos = max_procesos or os.cpu_count() or 1
+        self.convertir = convertir or (convertir_con_pillow if PILLOW else None)
+        self.conversiones = 0
+        self._lock = threading.Lock()
+        self._manifiesto = None
+
+    def disponible(self):
+        return self.convertir is not None
+
+    @property
+    def _ruta_manifiesto(self):
+        return self.cache / "manifiesto.json"
+
+    def _cargar_manifiesto(self):
+        if self._manifiesto is None:
+            try:
+                self._manifiesto = json.loads(self._ruta_manifiesto.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._manifiesto = {}
+        return self._manifiesto
+
+    def _guardar_manifiesto(self):
+        self.cache.mkdir(parents=True, exist_ok=True)
+        temporal = self._ruta_manifiesto.with_suffix(".tmp")
+        temporal.write_text(json.dumps(self._manifiesto, indent=1), encoding="utf-8")
+        os.replace(temporal, self._ruta_manifiesto)
+
+    def _hash_origen(self, origen):
+        """Hash del original, reutilizando el del manifiesto si tamaño y mtime no cambiaron"""
+        info = os.stat(origen)
+        clave = os.path.normcase(os.path.abspath(origen))
+        with self._lock:
+            entrada = self._cargar_manifiesto().get(clave)
+        if entrada and entrada["tamano"] == info.st_size and entrada["mtime"] == info.st_mtime_ns:
+            return entrada["hash"]
+        digest = hash_archivo(origen)
+        with self._lock:
+            self._cargar_manifiesto()[clave] = {"tamano": info.st_size, "mtime": info.st_mtime_ns, "hash": digest}
+        return digest
+
+    def destino(self, origen):
+        """Ruta en caché: hash del contenido + parámetros"""
+        p = self.parametros
+        clave = f"{self._hash_origen(origen)}-{p.ancho}x{p.alto}-q{p.calidad}-v{VERSION_CACHE}"
+        return self.cache / f"{hashlib.sha256(clave.encode()).hexdigest()[:32]}.jpg"
+
+    def optimizar(self, origen):
+        """Ruta del fondo optimizado (se genera si no está en caché) o None si no se puede"""
+        resultado = self.preparar([origen]).get(str(origen))
+        return Path(resultado) if resultado else None
+
+    def preparar(self, origenes):
+        """
+        Genera en paralelo (un proceso por núcleo) los fondos que falten.
+        Devuelve {origen: ruta_optimizada o None}.
+        """
+        if not self.disponible():
+            return {str(o): None for o in origenes}
+        self.cache.mkdir(parents=True, exist_ok=True)
+
+        resultados = {}
+        pendientes = {}
+        for origen in origenes:
+            try:
+                destino = self.destino(origen)
+            except OSError:
+                resultados[str(origen)] = None
+                continue
+            if destino.exists():
+                resultados[str(origen)] = destino
+            else:
+                pendientes[str(origen)] = destino
+
+        if len(pendientes) == 1 or self.max_procesos == 1:
+            for origen, destino in pendientes.items():
+                resultados[origen] = self._convertir_uno(origen, destino)
+        elif pendientes:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(self.max_procesos, len(pendientes))) as pool:
+                futuros = {
+                    origen: pool.submit(_transcodificar, origen, destino, self.parametros, self.convertir)
+                    for origen, destino in pendientes.items()
+                }
+                for origen, futuro in futuros.items():
+                    try:
+                        resultados[origen] = Path(futuro.result())
+                        self.conversiones += 1
+                    except Exception:
+                        resultados[origen] = None
+
+        with self._lock:
+            self._guardar_manifiesto()
+        return resultados
+
+    def _convertir_uno(self, origen, destino):
+        try:
+            _transcodificar(origen, destino, self.parametros, self.convertir)
+        except Exception:
+            return None
+        self.conversiones += 1
+        return destino
+
+
+_preprocesador_compartido = None
+
+
+def obtener_preprocesador():
+    """Preprocesador compartido, o None si Pillow no está instalado"""
+    global _preprocesador_compartido
+    if not PILLOW:
+        return None
+    if _preprocesador_compartido is None:
+        _preprocesador_compartido = PreprocesadorFondos()
+    return _preprocesador_compartido
+
+
+def main(argv=None):
+    from .assets import AssetIndex
+    from .configurador import BASE_PATH
+
+    centros = argv if argv is not None else sys.argv[1:]
+    preprocesador = obtener_preprocesador()
+    if preprocesador is None:
+        print("⚠️  Pillow no está instalado: pip install pillow")
+        return 1
+    for centro in centros:
+        assets = AssetIndex(BASE_PATH.parent / "assets" / centro)
+        origenes = [assets.wallpaper(n) for n in assets.wallpapers.numeros_pc()]
+        resultados = preprocesador.preparar(origenes)
+        listos = sum(1 for r in resultados.values() if r)
+        print(f"✓ {centro}: {listos}/{len(origenes)} fondos en {preprocesador.cache}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,13 +8,21 @@ import getpass
 import subprocess
 from pathlib import Path
 
+from .inventario import obtener_inventario
+from .instrumentacion import medido
+from .powershell import obtener_ejecutor
+
 
 class GestorUsuarios:
     """Gestor de creación y configuración de usuarios locales en Windows"""
 
-    def __init__(self, callback=None):
+    def __init__(self, callback=None, ejecutor=None, inventario=None):
         self.callback = callback
         self.es_admin = self.verificar_admin()
+        # Sesión PowerShell compartida (evita un powershell.exe por consulta)
+        self.ejecutor = ejecutor or obtener_ejecutor()
+        # Inventario de usuarios locales (una enumeración para todas las consultas)
+        self.inventario = inventario or obtener_inventario(ejecutor)
 
     # =========================
     # UTILIDADES
@@ -30,7 +38,13 @@ class GestorUsuarios:
         except Exception:
             return False
 
+    @medido
     def usuario_existe(self, nombre_usuario):
+        existe = self.inventario.existe(nombre_usuario)
+        if existe is not None:
+            return existe
+
+        # Inventario no disponible: consulta directa
         cmd = f'net user "{nombre_usuario}"'
         r = subprocess.run(cmd, shell=True, capture_output=True, text=True)
         return r.returncode == 0
@@ -39,33 +53,29 @@ class GestorUsuarios:
     # ADMINISTRADOR INTEGRADO
     # =========================
 
+    @medido
     def obtener_admin_integrado(self):
         """
         Obtiene el administrador integrado (SID termina en -500)
         """
-        cmd = [
-            "powershell",
-            "-NoProfile",
-            "-Command",
-            """
+        if self.inventario.disponible:
+            admin = self.inventario.admin_integrado()
+            return admin.nombre if admin else None
+
+        r = self.ejecutor.ejecutar("""
             Get-LocalUser |
             Where-Object { $_.SID.Value.EndsWith('-500') } |
             Select-Object -ExpandProperty Name
-            """
-        ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
+            """, idempotente=True)
         nombre = r.stdout.strip()
         return nombre if nombre else None
 
+    @medido
     def deshabilitar_admin_integrado(self):
         """
         Deshabilita el administrador integrado de Windows (SID-500)
         """
-        cmd = [
-            "powershell",
-            "-NoProfile",
-            "-Command",
-            """
+        r = self.ejecutor.ejecutar("""
             $u = Get-LocalUser | Where-Object { $_.SID.Value.EndsWith('-500') }
             if ($u -and $u.Enabled) {
                 Disable-LocalUser -Name $u.Name
@@ -73,15 +83,15 @@ class GestorUsuarios:
             } else {
                 Write-Output "Administrador integrado ya estaba deshabilitado"
             }
-            """
-        ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
+            """)
+        self.inventario.invalidar()
         return True, r.stdout.strip()
 
     # =========================
     # CREACIÓN DE USUARIOS
     # =========================
 
+    @medido
     def crear_usuario(self, nombre_usuario, contraseña="", es_admin=False):
         if not self.es_admin:
             return False, "❌ Se requieren permisos de administrador"
@@ -95,6 +105,7 @@ class GestorUsuarios:
             cmd = f'net user "{nombre_usuario}" /add /active:yes'
 
         r = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+        self.inventario.invalidar()
 
         if r.returncode != 0:
             return False, r.stderr.strip()
@@ -102,6 +113,7 @@ class GestorUsuarios:
         if es_admin:
             cmd_admin = f'net localgroup Administrators "{nombre_usuario}" /add'
             subprocess.run(cmd_admin, shell=True, capture_output=True)
+            self.inventario.invalidar()
 
             return True, f"✔ Administrador '{nombre_usuario}' creado"
 
@@ -111,22 +123,17 @@ class GestorUsuarios:
     # UAC
     # =========================
 
+    @medido
     def configurar_uac(self):
         """
         Configura UAC para que usuarios estándar soliciten credenciales
         """
-        cmd = [
-            "powershell",
-            "-NoProfile",
-            "-Command",
-            """
+        r = self.ejecutor.ejecutar("""
             Set-ItemProperty `
             -Path 'HKLM:\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Policies\\System' `
             -Name ConsentPromptBehaviorUser `
             -Value 1
-            """
-        ]
-        r = subprocess.run(cmd, capture_output=True, text=True)
+            """)
 
         if r.returncode != 0:
             return False, "❌ Error al configurar UAC"
@@ -137,6 +144,7 @@ class GestorUsuarios:
     # FLUJO PRINCIPAL
     # =========================
     
+    @medido
     def cambiar_nombre_visible(self, nombre_cuenta, nombre_visible):
         """
         Cambia solo el nombre visible (FullName) del usuario.
@@ -151,20 +159,17 @@ class GestorUsuarios:
         if not nombre_visible or not nombre_visible.strip():
             return False, "❌ El nombre visible no puede estar vacío"
 
-        cmd = [
-            "powershell",
-            "-NoProfile",
-            "-Command",
+        r = self.ejecutor.ejecutar(
             f'Set-LocalUser -Name "{nombre_cuenta}" -FullName "{nombre_visible}"'
-        ]
-
-        r = subprocess.run(cmd, capture_output=True, text=True)
+        )
+        self.inventario.invalidar()
 
         if r.returncode != 0:
             return False, r.stderr.strip() or "❌ Error al cambiar nombre visible"
 
         return True, f"✔ Nombre visible cambiado a '{nombre_visible}'"
 
+    @medido
     def cambiar_password(self, nombre_cuenta, nueva_password):
         """
         Cambia la contraseña del usuario indicado
@@ -178,23 +183,17 @@ class GestorUsuarios:
         if not nueva_password:
             return False, "❌ La contraseña no puede estar vacía"
 
-        cmd = [
-            "powershell",
-            "-NoProfile",
-            "-Command",
-            f'''
+        r = self.ejecutor.ejecutar(f'''
             $pwd = ConvertTo-SecureString "{nueva_password}" -AsPlainText -Force
             Set-LocalUser -Name "{nombre_cuenta}" -Password $pwd
-            '''
-        ]
-
-        r = subprocess.run(cmd, capture_output=True, text=True)
+            ''')
 
         if r.returncode != 0:
             return False, r.stderr.strip() or "❌ Error al cambiar contraseña"
 
         return True, "✔ Contraseña del administrador actualizada"
     
+    @medido
     def configurar_centro_computo(
         self,
         nombre_visible_admin,
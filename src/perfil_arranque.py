@@ -0,0 +1,114 @@
+"""
+Perfil de arranque
+    python start.py --perfil-arranque          (o CLA_PERFIL_ARRANQUE=1)
+
+Mide cuánto tarda cada módulo en importarse (tiempo propio y acumulado,
+como `python -X importtime`, también dentro del .exe) y marca los hitos del
+arranque hasta el primer pintado de la ventana. Al terminar imprime el
+resumen en stderr y guarda el informe JSON junto a los de instrumentación.
+"""
+
+import json
+import sys
+import time
+from importlib.abc import MetaPathFinder
+
+
+class _CargadorMedido:
+    """Envuelve el loader de un módulo para medir su exec_module"""
+
+    def __init__(self, cargador, perfil, nombre):
+        self._cargador = cargador
+        self._perfil = perfil
+        self._nombre = nombre
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargador, atributo)
+
+    def create_module(self, spec):
+        return self._cargador.create_module(spec)
+
+    def exec_module(self, modulo):
+        pila = self._perfil._pila
+        pila.append(0.0)
+        inicio = time.perf_counter()
+        try:
+            self._cargador.exec_module(modulo)
+        finally:
+            total = time.perf_counter() - inicio
+            hijos = pila.pop()
+            if pila:
+                pila[-1] += total
+            self._perfil.importaciones[self._nombre] = (total - hijos, total)
+
+
+class _BuscadorMedido(MetaPathFinder):
+    def __init__(self, perfil):
+        self.perfil = perfil
+
+    def find_spec(self, nombre, ruta, objetivo=None):
+        for buscador in sys.meta_path:
+            if buscador is self or not hasattr(buscador, "find_spec"):
+                continue
+            spec = buscador.find_spec(nombre, ruta, objetivo)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _CargadorMedido(spec.loader, self.perfil, nombre)
+        return spec
+
+
+class PerfilArranque:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.importaciones = {}  # módulo -> (propio, acumulado) en segundos
+        self.hitos = []
+        self._pila = []
+        self._buscador = _BuscadorMedido(self)
+
+    def instalar(self):
+        sys.meta_path.insert(0, self._buscador)
+        return self
+
+    def hito(self, nombre):
+        self.hitos.append((nombre, time.perf_counter() - self.inicio))
+
+    def informe(self):
+        modulos = sorted(self.importaciones.items(), key=lambda m: -m[1][1])
+        return {
+            "hitos": {nombre: round(t, 4) for nombre, t in self.hitos},
+            "importaciones": {
+                nombre: {"propio_ms": round(propio * 1000, 2), "acumulado_ms": round(total * 1000, 2)}
+                for nombre, (propio, total) in modulos
+            },
+        }
+
+    def terminar(self, hito_final, maximo=20):
+        """Marca el último hito, deja de medir, imprime el resumen y guarda el JSON"""
+        self.hito(hito_final)
+        if self._buscador in sys.meta_path:
+            sys.meta_path.remove(self._buscador)
+        informe = self.informe()
+
+        salida = sys.stderr or sys.stdout
+        if salida:
+            print("Perfil de arranque", file=salida)
+            for nombre, t in informe["hitos"].items():
+                print(f"   {t * 1000:>9.1f} ms  {nombre}", file=salida)
+            print(f"   {'propio':>9}  {'acumulado':>10}  módulo", file=salida)
+            for nombre, m in list(informe["importaciones"].items())[:maximo]:
+                print(f"   {m['propio_ms']:>7.1f} ms  {m['acumulado_ms']:>8.1f} ms  {nombre}", file=salida)
+
+        from core.instrumentacion import directorio_informes
+        try:
+            carpeta = directorio_informes()
+            carpeta.mkdir(parents=True, exist_ok=True)
+            ruta = carpeta / f"arranque-{time.strftime('%Y%m%d-%H%M%S')}.json"
+            ruta.write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding="utf-8")
+            if salida:
+                print(f"   Informe: {ruta}", file=salida)
+        except OSError:
+            pass
+        return informe
@@ -1,41 +1,82 @@
 """
 Configurador de PCs - Aplicación principal
-Punto de entrada para el configurador automático de PCs
+Punto de entrada para el configurador automático de PCs.
+Con --cli se ejecuta la línea de comandos (cli.py) sin cargar tkinter.
+Con --perfil-arranque se mide el arranque hasta el primer pintado.
 """
 import os
 import sys
+
+# Antes de cualquier otra importación para que también se midan
+if "--perfil-arranque" in sys.argv or os.environ.get("CLA_PERFIL_ARRANQUE"):
+    from perfil_arranque import PerfilArranque
+    PERFIL = PerfilArranque().instalar()
+else:
+    PERFIL = None
+
 import ctypes
-import tkinter as tk
-from tkinter import messagebox
+import multiprocessing
+
 
-# Importar módulos de la aplicación
-from core import ConfiguradorPC
-from ui import InterfazConfiguradorPC
+def hito(nombre):
+    if PERFIL:
+        PERFIL.hito(nombre)
 
 
 def solicitar_permisos_admin():
-    """Solicita permisos de administrador al iniciar"""
+    """
+    Solicita permisos de administrador al iniciar. Si hay un agente
+    residente abierto (ya elevado) no se re-ejecuta: devuelve sus datos
+    para que la interfaz le envíe las configuraciones.
+    """
     try:
         if not ctypes.windll.shell32.IsUserAnAdmin():
+            from core.agente import agente_residente
+            residente = agente_residente()
+            if residente:
+                return residente
             # Re-ejecutar el script con permisos de administrador
             ctypes.windll.shell32.ShellExecuteW(
                 None, "runas", sys.executable, f'"{os.path.abspath(__file__)}"', None, 0
             )
             sys.exit()
     except Exception as e:
+        from tkinter import messagebox
         messagebox.showerror("Error", f"No se pudieron obtener permisos de administrador:\n{e}")
         sys.exit()
 
 
 def main():
     """Función principal de la aplicación"""
+    import tkinter as tk
+
+    # Importar módulos de la aplicación
+    from core import ConfiguradorPC
+    from ui import InterfazConfiguradorPC
+
+    hito("importaciones")
+
     # Solicitar permisos de administrador al inicio
-    solicitar_permisos_admin()
+    residente = solicitar_permisos_admin()
     
     root = tk.Tk()
-    app = InterfazConfiguradorPC(root, ConfiguradorPC)
+    hito("ventana creada")
+    app = InterfazConfiguradorPC(root, ConfiguradorPC, residente=residente)
+    hito("interfaz construida")
+    if PERFIL:
+        # La primera tarea ociosa del bucle corre después de dibujar la ventana
+        root.after_idle(lambda: PERFIL.terminar("primer pintado"))
     root.mainloop()
 
 
 if __name__ == "__main__":
+    # Necesario para los procesos de transcodificación en el .exe
+    multiprocessing.freeze_support()
+    argumentos = [a for a in sys.argv[1:] if a != "--perfil-arranque"]
+    if "--cli" in argumentos:
+        from cli import main as main_cli
+        codigo = main_cli([a for a in argumentos if a != "--cli"])
+        if PERFIL:
+            PERFIL.terminar("cli terminada")
+        sys.exit(codigo)
     main()
@@ -0,0 +1,130 @@
+"""
+Historial del registro de actividad
+Las últimas N líneas viven en un buffer circular (lo que muestra la
+interfaz); todas se escriben además en un archivo de la sesión, del que
+se leen las anteriores bajo demanda. Así la memoria no crece aunque la
+herramienta quede abierta todo el día.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from core.archivos import directorio_datos
+
+CAPACIDAD_DEFECTO = 2000
+
+# Cada cuántas líneas se guarda el desplazamiento en el archivo
+INTERVALO_MARCAS = 256
+
+# Archivos de sesión que se conservan en la carpeta de logs
+SESIONES_CONSERVADAS = 20
+
+
+def directorio_logs():
+    """%LOCALAPPDATA%\\CLA-WinConfig\\logs o ~/.cache fuera de Windows"""
+    return directorio_datos("logs")
+
+
+def _limpiar_sesiones_viejas(carpeta, conservar=SESIONES_CONSERVADAS):
+    try:
+        sesiones = sorted(carpeta.glob("sesion-*.log"), key=lambda r: r.name)
+        for ruta in sesiones[:-conservar]:
+            ruta.unlink()
+    except OSError:
+        pass
+
+
+class HistorialLog:
+    """
+    Buffer de las últimas `capacidad` líneas más el archivo de la sesión.
+    Las líneas se numeran desde 0 en el orden en que llegan.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_DEFECTO, archivo=None):
+        self.capacidad = capacidad
+        self.recientes = deque(maxlen=capacidad)
+        self.total = 0
+        self._marcas = []  # desplazamiento en bytes de las líneas 0, 256, 512...
+        self._lock = threading.Lock()
+        self._archivo = None
+
+        if archivo is None:
+            carpeta = directorio_logs()
+            try:
+                carpeta.mkdir(parents=True, exist_ok=True)
+                _limpiar_sesiones_viejas(carpeta, SESIONES_CONSERVADAS - 1)
+                archivo = carpeta / f"sesion-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.log"
+            except OSError:
+                archivo = None
+        self.ruta = Path(archivo) if archivo else None
+        if self.ruta:
+            try:
+                self._archivo = open(self.ruta, "w+b")
+            except OSError:
+                self.ruta = None
+
+    def agregar(self, mensajes):
+        """Agrega mensajes (pueden traer saltos de línea) y devuelve las líneas resultantes"""
+        lineas = []
+        for mensaje in mensajes:
+            lineas.extend(str(mensaje).split("\n"))
+        with self._lock:
+            if self._archivo:
+                try:
+                    self._archivo.seek(0, os.SEEK_END)
+                    posicion = self._archivo.tell()
+                    for i, linea in enumerate(lineas):
+                        if (self.total + i) % INTERVALO_MARCAS == 0:
+                            self._marcas.append(posicion)
+                        datos = (linea + "\n").encode("utf-8")
+                        self._archivo.write(datos)
+                        posicion += len(datos)
+                except OSError:
+                    self._archivo = None
+            self.recientes.extend(lineas)
+            self.total += len(lineas)
+        return lineas
+
+    @property
+    def primera_reciente(self):
+        """Número de la línea más antigua que sigue en memoria"""
+        return self.total - len(self.recientes)
+
+    def ultimas(self, desde=0):
+        """Líneas en memoria a partir del número `desde`"""
+        with self._lock:
+            omitir = max(0, desde - self.primera_reciente)
+            return list(self.recientes)[omitir:]
+
+    def anteriores(self, hasta, cantidad):
+        """Hasta `cantidad` líneas justo antes de la línea `hasta`, leídas del archivo"""
+        inicio = max(0, hasta - cantidad)
+        if inicio >= hasta:
+            return []
+        with self._lock:
+            if not self._archivo:
+                # Sin archivo solo queda lo que hay en memoria
+                primera = self.primera_reciente
+                recientes = list(self.recientes)
+                return recientes[max(0, inicio - primera):max(0, hasta - primera)]
+            marca = min(inicio // INTERVALO_MARCAS, len(self._marcas) - 1)
+            self._archivo.flush()
+            self._archivo.seek(self._marcas[marca])
+            numero = marca * INTERVALO_MARCAS
+            lineas = []
+            for datos in self._archivo:
+                if numero >= hasta:
+                    break
+                if numero >= inicio:
+                    lineas.append(datos.decode("utf-8", "replace").rstrip("\n"))
+                numero += 1
+            return lineas
+
+    def cerrar(self):
+        with self._lock:
+            if self._archivo:
+                self._archivo.close()
+                self._archivo = None
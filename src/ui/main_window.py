@@ -4,6 +4,7 @@ import sys
 import ctypes
 import tkinter as tk
 from tkinter import ttk, messagebox
+import queue
 import threading
 import webbrowser
 from pathlib import Path
@@ -13,8 +14,9 @@ import time
 from .styles import (configurar_estilos, COLOR_LIGHT, COLOR_TEXT, COLOR_BOLD_BLUE, 
                      COLOR_BLUE, COLOR_CARD_BG, COLOR_CARD_BORDER, COLOR_ACCENT, COLOR_DARK_BLUE)
 
-# Importar módulo de usuarios
-from core import GestorUsuarios
+# Solo lo necesario para el primer pintado; el resto del núcleo se importa al usarlo
+from core.assets import CENTROS, AssetIndex
+from .historial_log import HistorialLog
 
 # Detectar BASE_PATH
 if getattr(sys, 'frozen', False):
@@ -22,21 +24,23 @@ if getattr(sys, 'frozen', False):
 else:
     BASE_PATH = Path(__file__).parent.parent
 
+# Refresco del log: cada cuánto se vacía la cola (ms) y máximo de mensajes por ciclo
+LOG_PERIODO_MS = 50
+LOG_MAX_POR_CICLO = 500
+# Líneas que conserva el widget del log y cuántas se cargan con "Anteriores"
+LOG_MAX_LINEAS = 2000
+LOG_PAGINA = 500
+
 
 class InterfazConfiguradorPC:
     # Mapeo de centros a carpetas
-    CENTROS_CARPETAS = {
-        'CID-Centro de Cómputo': 'CID-Centro_Computo',
-        'UD2-Laboratorio de Software': 'UD2-Laboratorio_Software',
-        'UD2-Laboratorio de Finanzas': 'UD2-Laboratorio_Finanzas',
-        'UD2-Laboratorio de Redes': 'UD2-Laboratorio_Redes',
-        'UD1-Centro de Cómputo': 'UD1-Centro_Computo',
-        'UD1-Aula de Cómputo': 'UD1-Aula_Computo'
-    }
+    CENTROS_CARPETAS = CENTROS
     
-    def __init__(self, root, ConfiguradorPC):
+    def __init__(self, root, ConfiguradorPC, residente=None):
         self.root = root
         self.ConfiguradorPC = ConfiguradorPC
+        # Agente residente (puerto, token) que aplica las configuraciones, si se usa
+        self.residente = residente
         self.root.title("Servicios Informaticos - Configurador de PCs")
         self.root.geometry("920x720")
         self.root.resizable(False, False)
@@ -67,7 +71,17 @@ class InterfazConfiguradorPC:
         except:
             self.es_admin = False
         
+        # Cola de mensajes (y acciones) que los hilos de trabajo envían a la interfaz
+        self.cola_log = queue.SimpleQueue()
+        # Últimas líneas en memoria y el resto en el archivo de la sesión
+        self.historial_log = HistorialLog(LOG_MAX_LINEAS)
+        # Números de línea [log_inicio, log_fin) que muestra el widget; log_desde: último "Limpiar"
+        self.log_inicio = self.log_fin = self.log_desde = 0
+        
         self.crear_interfaz()
+        # Los centros con perfil en assets/ se leen después del primer pintado
+        self.root.after_idle(self.cargar_centros)
+        self.root.after(LOG_PERIODO_MS, self.drenar_log)
 
     
     def crear_bento_card(self, parent, title, subtitle="", bg_color=COLOR_CARD_BG, border_color=COLOR_CARD_BORDER, extra_widget=None):
@@ -104,6 +118,27 @@ class InterfazConfiguradorPC:
         
         return card_container, content_frame
         
+    def cargar_logo(self):
+        """Pone el logo en el header o, si no se puede, el logo de texto"""
+        try:
+            from PIL import Image, ImageTk
+            logo_path = BASE_PATH.parent / "docs" / "icons" / "Logo-ServiciosInformaticos.png"
+            if not logo_path.exists():
+                raise FileNotFoundError(logo_path)
+            logo_img = Image.open(logo_path)
+            # Redimensionar a 45px de alto manteniendo proporción
+            aspect_ratio = logo_img.width / logo_img.height
+            new_height = 45
+            new_width = int(new_height * aspect_ratio)
+            logo_img = logo_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            logo_photo = ImageTk.PhotoImage(logo_img)
+            self.logo_label.config(image=logo_photo)
+            self.logo_label.image = logo_photo  # Mantener referencia
+        except Exception:
+            # Fallback al logo de texto si PIL o la imagen no están disponibles
+            self.logo_label.config(text="SI", fg='white', font=('Segoe UI', 24, 'bold'),
+                                   width=3, relief='solid', bd=2)
+    
     def crear_interfaz(self):
         # Configurar ventana principal
         self.root.configure(bg=self.COLOR_LIGHT)
@@ -117,31 +152,10 @@ class InterfazConfiguradorPC:
         header_content = tk.Frame(header_bar, bg=COLOR_BOLD_BLUE)
         header_content.pack(side='left', padx=20, pady=10)
         
-        # Logo (cargando imagen real)
-        try:
-            from PIL import Image, ImageTk
-            logo_path = BASE_PATH.parent / "docs" / "icons" / "Logo-ServiciosInformaticos.png"
-            if logo_path.exists():
-                logo_img = Image.open(logo_path)
-                # Redimensionar a 45px de alto manteniendo proporción
-                aspect_ratio = logo_img.width / logo_img.height
-                new_height = 45
-                new_width = int(new_height * aspect_ratio)
-                logo_img = logo_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                logo_photo = ImageTk.PhotoImage(logo_img)
-                logo_label = tk.Label(header_content, image=logo_photo, bg=COLOR_BOLD_BLUE)
-                logo_label.image = logo_photo  # Mantener referencia
-                logo_label.pack(side='left', padx=(0, 15))
-            else:
-                # Fallback al logo de texto
-                logo = tk.Label(header_content, text="SI", bg=COLOR_BOLD_BLUE, fg='white',
-                               font=('Segoe UI', 24, 'bold'), width=3, relief='solid', bd=2)
-                logo.pack(side='left', padx=(0, 15))
-        except:
-            # Fallback al logo de texto si PIL no está disponible
-            logo = tk.Label(header_content, text="SI", bg=COLOR_BOLD_BLUE, fg='white',
-                           font=('Segoe UI', 24, 'bold'), width=3, relief='solid', bd=2)
-            logo.pack(side='left', padx=(0, 15))
+        # Logo: se carga después del primer pintado (Pillow y el PNG no retrasan la ventana)
+        self.logo_label = tk.Label(header_content, bg=COLOR_BOLD_BLUE)
+        self.logo_label.pack(side='left', padx=(0, 15))
+        self.root.after_idle(self.cargar_logo)
         
         # Títulos
         title_frame = tk.Frame(header_content, bg=COLOR_BOLD_BLUE)
@@ -198,10 +212,11 @@ class InterfazConfiguradorPC:
             font=('Segoe UI', 9)
         ).pack(anchor='w')
         self.centro_var = tk.StringVar(value="-- Seleccionar Centro --")
-        centro_combo = ttk.Combobox(centro_content, textvariable=self.centro_var, cursor="hand2", 
-                                   state='readonly', font=('Segoe UI', 9), style='White.TCombobox')
-        centro_combo['values'] = tuple(self.CENTROS_CARPETAS.keys())
-        centro_combo.pack(fill='x', pady=12)
+        self.centro_combo = ttk.Combobox(centro_content, textvariable=self.centro_var, cursor="hand2", 
+                                         state='readonly', font=('Segoe UI', 9), style='White.TCombobox')
+        self.centro_combo['values'] = tuple(self.CENTROS_CARPETAS.keys())
+        self.centro_combo.bind("<<ComboboxSelected>>", self.aplicar_perfil_centro)
+        self.centro_combo.pack(fill='x', pady=12)
 
         # CARD: Número de PC (bento)
         pc_card, pc_content = self.crear_bento_card(top_cards_container, "Número de PC")
@@ -283,7 +298,11 @@ class InterfazConfiguradorPC:
         btn_mas.pack(side='left', padx=(4, 0))
         
         # CARD: Registro de Actividad (sidebar fila 2)
-        log_card, log_content = self.crear_bento_card(sidebar, "Registro de Actividad", "")
+        def crear_boton_anteriores(parent):
+            return ttk.Button(parent, text="⬆ Anteriores", cursor="hand2", command=self.cargar_log_anterior)
+        
+        log_card, log_content = self.crear_bento_card(sidebar, "Registro de Actividad", "",
+                                                      extra_widget=crear_boton_anteriores)
         log_card.grid(row=1, column=0, sticky='nsew', pady=(0, 0))
         
         # Text widget para el log
@@ -328,6 +347,7 @@ class InterfazConfiguradorPC:
         self.mostrar_keys_var = tk.BooleanVar(value=True)
         self.todas_var = tk.BooleanVar(value=True)
         self.instalar_tareas_var = tk.BooleanVar(value=False)  # NUEVA VARIABLE
+        self.todos_usuarios_var = tk.BooleanVar(value=False)
         
         # Variables de gestión de usuarios
         self.renombrar_admin_var = tk.BooleanVar(value=True)
@@ -397,6 +417,11 @@ class InterfazConfiguradorPC:
                     variable=self.reiniciar_explorer_var, cursor="hand2")\
             .grid(row=8, column=0, sticky='w', pady=6, padx=12)
         
+        # Modo multiusuario: tareas de usuario en todas las cuentas reales del equipo
+        ttk.Checkbutton(opciones_grid, text="Aplicar a todos los usuarios del equipo", 
+                    variable=self.todos_usuarios_var, cursor="hand2")\
+            .grid(row=9, column=0, sticky='w', pady=6, padx=12)
+        
         # --- Botones dentro del panel de opciones ---
         botones_frame = tk.Frame(opciones_content, bg=COLOR_CARD_BG)
         botones_frame.pack(fill='x', pady=(8, 0))
@@ -574,12 +599,83 @@ class InterfazConfiguradorPC:
 
     
     def log_mensaje(self, mensaje):
-        """Agrega un mensaje al log"""
+        """Encola un mensaje para el log (se puede llamar desde cualquier hilo)"""
+        self.cola_log.put(mensaje)
+    
+    def en_ui(self, funcion):
+        """Ejecuta funcion en el hilo de Tk, después de los mensajes ya encolados"""
+        self.cola_log.put(funcion)
+    
+    def insertar_log(self, mensajes):
+        """Un solo insert por lote; el widget nunca pasa de LOG_MAX_LINEAS líneas"""
+        if not mensajes:
+            return
+        en_vivo = self.log_fin == self.historial_log.total
+        lineas = self.historial_log.agregar(mensajes)
         self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, mensaje + "\n")
+        if not en_vivo:
+            # Se estaban viendo líneas anteriores: volver a las recientes
+            self.mostrar_log_reciente()
+        else:
+            self.log_text.insert(tk.END, "\n".join(lineas) + "\n")
+            self.log_fin += len(lineas)
+            exceso = self.log_fin - self.log_inicio - LOG_MAX_LINEAS
+            if exceso > 0:
+                self.log_text.delete("1.0", f"{exceso + 1}.0")
+                self.log_inicio += exceso
         self.log_text.see(tk.END)
         self.log_text.config(state='disabled')
-        self.root.update()
+    
+    def mostrar_log_reciente(self):
+        """Reemplaza el contenido del widget por las últimas líneas en memoria"""
+        lineas = self.historial_log.ultimas(self.log_desde)
+        self.log_text.delete("1.0", tk.END)
+        if lineas:
+            self.log_text.insert(tk.END, "\n".join(lineas) + "\n")
+        self.log_fin = self.historial_log.total
+        self.log_inicio = self.log_fin - len(lineas)
+    
+    def cargar_log_anterior(self):
+        """Trae del archivo de la sesión las LOG_PAGINA líneas previas a las visibles"""
+        lineas = self.historial_log.anteriores(self.log_inicio, LOG_PAGINA)
+        if not lineas:
+            return
+        self.log_text.config(state='normal')
+        self.log_text.insert("1.0", "\n".join(lineas) + "\n")
+        self.log_inicio -= len(lineas)
+        # Se descartan las más recientes; se recuperan al llegar el siguiente mensaje
+        if self.log_fin - self.log_inicio > LOG_MAX_LINEAS:
+            self.log_text.delete(f"{LOG_MAX_LINEAS + 1}.0", tk.END)
+            self.log_fin = self.log_inicio + LOG_MAX_LINEAS
+        self.log_text.see("1.0")
+        self.log_text.config(state='disabled')
+    
+    def drenar_log(self):
+        """Vacía la cola en lotes cada LOG_PERIODO_MS sin bloquear a los hilos de trabajo"""
+        lineas = []
+        accion = None
+        for _ in range(LOG_MAX_POR_CICLO):
+            try:
+                elemento = self.cola_log.get_nowait()
+            except queue.Empty:
+                break
+            if callable(elemento):
+                accion = elemento
+                break
+            lineas.append(elemento)
+        
+        self.insertar_log(lineas)
+        self.root.after(LOG_PERIODO_MS, self.drenar_log)
+        # Las acciones (p. ej. el diálogo final) pueden abrir un bucle modal: van al final
+        if accion:
+            accion()
+    
+    def limpiar_log(self):
+        self.log_text.config(state='normal')
+        self.log_text.delete(1.0, tk.END)
+        self.log_text.config(state='disabled')
+        # Lo borrado sigue en el archivo de la sesión ("Anteriores")
+        self.log_inicio = self.log_fin = self.log_desde = self.historial_log.total
     
     def abrir_carpeta_fondos(self):
         """Abre la carpeta de assets del centro seleccionado o la crea si no existe"""
@@ -608,6 +704,14 @@ class InterfazConfiguradorPC:
             carpeta_tareas.mkdir()
             self.log_mensaje(f"✓ Carpeta '{carpeta_centro}/tareasprogramadas' creada")
         
+        # Lo que se agregue desde el explorador se verá en la próxima lectura
+        assets = AssetIndex(carpeta_assets)
+        assets.invalidar()
+        resumen = assets.resumen()
+        self.log_mensaje(f"📁 {carpeta_centro}: {resumen['fondos']} fondo(s), "
+                         f"bloqueo común: {'sí' if resumen['bloqueo'] else 'no'}, "
+                         f"{resumen['tareas']} tarea(s) programada(s)")
+        
         os.startfile(carpeta_assets)
     
     def abrir_github(self):
@@ -636,7 +740,7 @@ class InterfazConfiguradorPC:
         carpeta_centro_path = BASE_PATH.parent / "assets" / carpeta_centro
         
         # Verificar que existen las carpetas assets del centro
-        if not (carpeta_centro_path / "wallpapers").exists() or not (carpeta_centro_path / "lockscreen").exists():
+        if not AssetIndex(carpeta_centro_path).completo():
             messagebox.showerror("Error", f"No se encontraron las carpetas del centro '{centro_seleccionado}'.\n" +
                                "Use el botón 'Abrir Carpeta Assets' para crearlas.")
             return
@@ -662,9 +766,7 @@ class InterfazConfiguradorPC:
         self.progress.start()
         
         # Limpiar log
-        self.log_text.config(state='normal')
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state='disabled')
+        self.limpiar_log()
         
         # Crear opciones
         opciones = {
@@ -680,7 +782,8 @@ class InterfazConfiguradorPC:
         }
         
         # Ejecutar en hilo separado
-        thread = threading.Thread(target=self.ejecutar_configuracion, 
+        destino = self.ejecutar_configuracion_todos if self.todos_usuarios_var.get() else self.ejecutar_configuracion
+        thread = threading.Thread(target=destino, 
                                  args=(numero_pc, opciones, carpeta_centro))
         thread.daemon = True
         thread.start()
@@ -688,13 +791,43 @@ class InterfazConfiguradorPC:
     def ejecutar_configuracion(self, numero_pc, opciones, carpeta_centro):
         """Ejecuta la configuración"""
         try:
-            configurador = self.ConfiguradorPC(numero_pc, carpeta_centro=carpeta_centro, callback=self.log_mensaje)
-            exitosos, total = configurador.aplicar_configuracion_completa(opciones)
+            resultado = self.aplicar_en_residente(numero_pc, opciones, carpeta_centro) if self.residente else None
+            if resultado is None:
+                configurador = self.ConfiguradorPC(numero_pc, carpeta_centro=carpeta_centro,
+                                                   callback=self.log_mensaje)
+                resultado = configurador.aplicar_configuracion_completa(opciones)
+            exitosos, total = resultado
+            
+            self.en_ui(lambda: self.finalizar_configuracion(exitosos, total))
+        except Exception as e:
+            self.log_mensaje(f"\n❌ Error inesperado: {e}")
+            self.en_ui(self.habilitar_boton)
+    
+    def aplicar_en_residente(self, numero_pc, opciones, carpeta_centro):
+        """(exitosos, total) aplicados por el agente residente o None si dejó de responder"""
+        from core.agente import ErrorAgente, aplicar_en_residente
+        self.log_mensaje("📡 Configurando mediante el agente residente")
+        try:
+            return aplicar_en_residente(self.residente, numero_pc, opciones, carpeta_centro,
+                                        callback=self.log_mensaje)
+        except ErrorAgente as e:
+            self.log_mensaje(f"⚠️  Agente residente no disponible ({e}): se configura desde la aplicación")
+            self.residente = None
+            return None
+    
+    def ejecutar_configuracion_todos(self, numero_pc, opciones, carpeta_centro):
+        """Ejecuta la configuración para todos los usuarios reales del equipo"""
+        from core import ConfiguradorMultiusuario
+
+        try:
+            multiusuario = ConfiguradorMultiusuario(numero_pc, carpeta_centro=carpeta_centro,
+                                                    callback=self.log_mensaje)
+            exitosos, total = multiusuario.aplicar(opciones).totales()
             
-            self.root.after(100, lambda: self.finalizar_configuracion(exitosos, total))
+            self.en_ui(lambda: self.finalizar_configuracion(exitosos, total))
         except Exception as e:
             self.log_mensaje(f"\n❌ Error inesperado: {e}")
-            self.root.after(100, self.habilitar_boton)
+            self.en_ui(self.habilitar_boton)
     
     def finalizar_configuracion(self, exitosos, total):
         """Finaliza el proceso de configuración"""
@@ -817,9 +950,7 @@ class InterfazConfiguradorPC:
         }
 
         # Limpiar log
-        self.log_text.config(state='normal')
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state='disabled')
+        self.limpiar_log()
         
         # Ejecutar en hilo separado
         thread = threading.Thread(target=self.ejecutar_configuracion_usuarios, 
@@ -834,11 +965,13 @@ class InterfazConfiguradorPC:
             self.log_mensaje("GESTIÓN DE USUARIOS")
             self.log_mensaje("="*50)
 
+            from core import GestorUsuarios
+
             gestor = GestorUsuarios(callback=self.log_mensaje)
 
             if not gestor.es_admin:
                 self.log_mensaje("❌ Se requieren permisos de administrador")
-                self.root.after(100, self.habilitar_btn_usuarios)
+                self.en_ui(self.habilitar_btn_usuarios)
                 return
 
             self.log_mensaje("✓ Permisos de administrador verificados")
@@ -855,7 +988,7 @@ class InterfazConfiguradorPC:
                 ok, msg = gestor.cambiar_nombre_visible(usuario_actual, opciones['admin_nombre'])
                 self.log_mensaje(msg)
                 if not ok:
-                    self.root.after(100, self.habilitar_btn_usuarios)
+                    self.en_ui(self.habilitar_btn_usuarios)
                     return
 
             # --- TAREA 2: Cambiar Contraseña ---
@@ -864,7 +997,7 @@ class InterfazConfiguradorPC:
                 ok, msg = gestor.cambiar_password(usuario_actual, opciones['admin_pass'])
                 self.log_mensaje(msg)
                 if not ok:
-                    self.root.after(100, self.habilitar_btn_usuarios)
+                    self.en_ui(self.habilitar_btn_usuarios)
                     return
 
             # --- TAREA 3: Crear Usuario Estándar ---
@@ -874,7 +1007,7 @@ class InterfazConfiguradorPC:
                 self.log_mensaje(msg)
                 if not ok and "ya existe" not in msg.lower():
                     self.log_mensaje(f"❌ Error al crear usuario: {msg}")
-                    self.root.after(100, self.habilitar_btn_usuarios)
+                    self.en_ui(self.habilitar_btn_usuarios)
                     return
 
             # --- TAREA 4: Configurar UAC (Siempre se hace si se toca algo de esto, o opcional?) ---
@@ -888,13 +1021,13 @@ class InterfazConfiguradorPC:
             self.log_mensaje("✔ GESTIÓN DE USUARIOS FINALIZADA")
             self.log_mensaje("="*50)
 
-            self.root.after(100, self.habilitar_btn_usuarios)
+            self.en_ui(self.habilitar_btn_usuarios)
 
         except Exception as e:
             self.log_mensaje(f"\n❌ Error inesperado: {e}")
             import traceback
             self.log_mensaje(traceback.format_exc())
-            self.root.after(100, self.habilitar_btn_usuarios)
+            self.en_ui(self.habilitar_btn_usuarios)
 
     
     def habilitar_btn_usuarios(self):
@@ -903,6 +1036,54 @@ class InterfazConfiguradorPC:
         self.btn_usuarios.config(state='normal')
     
     
+    def cargar_centros(self):
+        """Centros predefinidos y los que traen perfil en assets/ (con su nombre)"""
+        from core.perfiles import centros
+
+        self.CENTROS_CARPETAS = centros(BASE_PATH.parent / "assets")
+        self.centro_combo['values'] = tuple(self.CENTROS_CARPETAS.keys())
+
+    def aplicar_perfil_centro(self, event=None):
+        """Marca las tareas y el nombre de administrador que declara el perfil del centro"""
+        from core.perfiles import TAREAS, ErrorPerfil, plan_centro
+
+        carpeta = self.CENTROS_CARPETAS.get(self.centro_var.get())
+        if not carpeta:
+            return
+        self.mostrar_tareas_centro(carpeta)
+        try:
+            perfil = plan_centro(BASE_PATH.parent / "assets" / carpeta)
+        except (ErrorPerfil, OSError) as e:
+            self.log_mensaje(f"⚠️  Perfil del centro no válido: {e}")
+            return
+        if perfil.tareas:
+            variables = {t: getattr(self, f"{t}_var") for t in TAREAS if hasattr(self, f"{t}_var")}
+            for tarea, variable in variables.items():
+                variable.set(tarea in perfil.tareas)
+            self.todas_var.set(all(v.get() for v in variables.values()))
+        if perfil.administrador:
+            self.admin_user_var.set(perfil.administrador)
+
+    def mostrar_tareas_centro(self, carpeta):
+        """Lista las tareas programadas del centro desde el catálogo (sin lanzar schtasks)"""
+        from core.catalogo_tareas import describir, obtener_catalogo_tareas
+
+        carpeta_tareas = BASE_PATH.parent / "assets" / carpeta / "tareasprogramadas"
+        try:
+            tareas = obtener_catalogo_tareas().tareas(sorted(carpeta_tareas.glob("*.xml")))
+        except OSError as e:
+            self.log_mensaje(f"⚠️  No se pudieron leer las tareas programadas: {e}")
+            return
+        if not tareas:
+            return
+        self.log_mensaje(f"📋 Tareas programadas de {carpeta}:")
+        for tarea in tareas:
+            self.log_mensaje(f"   {describir(tarea)}")
+            for error in tarea.errores:
+                self.log_mensaje(f"      ❌ {error}")
+            for advertencia in tarea.advertencias:
+                self.log_mensaje(f"      ⚠️ {advertencia}")
+    
     def toggle_todas_opciones(self):
         """Marca o desmarca todas las opciones de configuración"""
         estado = self.todas_var.get()
@@ -0,0 +1,48 @@
+"""Pruebas del agente residente: cachés calientes entre trabajos consecutivos"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+# Agregar src y benchmarks al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from core.agente import AgenteConfiguracion, agente_residente, aplicar_en_residente
+
+OPCIONES = {'tema_oscuro': True, 'fondo_pantalla': True, 'fondo_bloqueo': True,
+            'bloquear_personalizacion': True, 'zona_horaria': False}
+
+
+def test_trabajos_consecutivos_solo_cuestan_los_cambios(tmp_path, crear_entorno):
+    entorno = crear_entorno()
+    usuario = entorno.usuarios[0]
+
+    def crear(trabajo, callback):
+        return entorno.configurador(trabajo["pc"], usuario_objetivo=trabajo["usuario"], callback=callback)
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    archivo = tmp_path / "agente.json"
+    agente = AgenteConfiguracion(puerto=0, token="t", crear_configurador=crear, archivo=archivo,
+                                 calentar=lambda log: entorno.inventario.usuarios())
+    asyncio.run_coroutine_threadsafe(agente.iniciar(), loop).result()
+    try:
+        residente = agente_residente(archivo)
+        assert residente == (agente.puerto, "t")
+
+        log = []
+        assert aplicar_en_residente(residente, 3, OPCIONES, usuario_objetivo=usuario, callback=log.append) == (4, 4)
+        assert any("Configurando PC-3" in linea for linea in log)
+        antes = entorno.contadores()
+        assert aplicar_en_residente(residente, 3, OPCIONES, usuario_objetivo=usuario) == (4, 4)
+        despues = entorno.contadores()
+        # Inventario, sesiones de PowerShell y copia local de los assets siguen calientes
+        assert despues["powershell_inicios"] == antes["powershell_inicios"]
+        assert despues["usb_lecturas"] == antes["usb_lecturas"]
+        assert despues["registro_escrituras"] == antes["registro_escrituras"]
+        assert agente.trabajos == 2
+    finally:
+        asyncio.run_coroutine_threadsafe(agente.cerrar(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+    assert not archivo.exists() and agente_residente(archivo) is None
@@ -0,0 +1,64 @@
+"""Presupuesto de arranque: importaciones acotadas e inicialización diferida"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path
+SRC = Path(__file__).parent / "src"
+sys.path.insert(0, str(SRC))
+
+from core import ConfiguradorPC
+from core.registro import BackendMemoria
+from core.resolvedor_sid import BackendFalso, ResolvedorSID
+
+# Segundos para importar el núcleo y la CLI en un intérprete nuevo (holgado para equipos lentos)
+PRESUPUESTO_IMPORTACION = 1.0
+PESADOS = ("tkinter", "PIL", "multiprocessing", "concurrent.futures.process", "ui")
+# Lo único del núcleo que la ventana necesita antes del primer pintado
+NUCLEO_INTERFAZ = ["core", "core.archivos", "core.assets"]
+
+
+def test_nucleo_importa_dentro_del_presupuesto():
+    codigo = (
+        "import json, sys, time\n"
+        "inicio = time.perf_counter()\n"
+        "import core.configurador, core.multiusuario, core.usuarios, cli\n"
+        "duracion = time.perf_counter() - inicio\n"
+        f"print(json.dumps([duracion, [m for m in {PESADOS!r} if m in sys.modules]]))\n"
+    )
+    r = subprocess.run([sys.executable, "-c", codigo], cwd=SRC, capture_output=True, text=True)
+    duracion, cargados = json.loads(r.stdout)
+    assert cargados == []
+    assert duracion < PRESUPUESTO_IMPORTACION
+
+
+def test_interfaz_importa_solo_lo_del_primer_pintado():
+    pytest.importorskip("tkinter")
+    codigo = (
+        "import json, sys\n"
+        "import ui.main_window\n"
+        "print(json.dumps(sorted(m for m in sys.modules if m.split('.')[0] in ('core', 'PIL'))))\n"
+    )
+    r = subprocess.run([sys.executable, "-c", codigo], cwd=SRC, capture_output=True, text=True)
+    assert json.loads(r.stdout) == NUCLEO_INTERFAZ
+
+
+def test_sid_y_carpeta_de_fondos_solo_cuando_se_usan(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    backend = BackendFalso({"Alumno": "S-1-5-21-7-1001"})
+
+    configurador = ConfiguradorPC(3, usuario_objetivo="Alumno", resolvedor=ResolvedorSID([backend]),
+                                  backend_registro=BackendMemoria(), staging=False)
+    with configurador.hive_usuario():
+        pass
+    assert backend.consultas == 0
+    assert not (tmp_path / "Fondos").exists()
+
+    assert configurador.sid_objetivo == "S-1-5-21-7-1001"
+    assert configurador.sid_objetivo == "S-1-5-21-7-1001"
+    assert backend.consultas == 1
+    assert configurador.ruta_pictures.is_dir()
@@ -0,0 +1,41 @@
+"""Pruebas del índice de assets por centro"""
+import os
+import sys
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.assets import AssetIndex
+
+
+def crear_centro(tmp_path):
+    for carpeta in ("wallpapers", "lockscreen", "tareasprogramadas"):
+        (tmp_path / carpeta).mkdir()
+    (tmp_path / "wallpapers" / "PC-1.png").write_bytes(b"png")
+    (tmp_path / "wallpapers" / "PC-2.JPG").write_bytes(b"jpg")
+    (tmp_path / "wallpapers" / "PC-2.png").write_bytes(b"png")
+    (tmp_path / "lockscreen" / "PC-Bloqueo.png").write_bytes(b"png")
+    (tmp_path / "tareasprogramadas" / "Formulario.xml").write_text("<Task/>")
+    return AssetIndex(tmp_path)
+
+
+def test_un_escaneo_por_carpeta(tmp_path):
+    assets = crear_centro(tmp_path)
+    for _ in range(5):
+        assert assets.wallpaper(2).name == "PC-2.JPG"  # .jpg tiene preferencia
+        assert assets.wallpaper(3) is None
+        assert assets.fondo_bloqueo(2).name == "PC-Bloqueo.png"
+    assert assets.wallpapers.escaneos == 1
+    assert assets.lockscreen.escaneos == 1
+    assert assets.resumen() == {"fondos": 2, "bloqueo": True, "tareas": 1}
+
+
+def test_cambio_de_mtime_vuelve_a_leer(tmp_path):
+    assets = crear_centro(tmp_path)
+    assert assets.wallpaper(3) is None
+    (tmp_path / "wallpapers" / "PC-3.jpeg").write_bytes(b"jpg")
+    # Forzar un mtime distinto aunque el sistema de archivos tenga poca resolución
+    os.utime(tmp_path / "wallpapers", ns=(0, 1))
+    assert assets.wallpaper(3).name == "PC-3.jpeg"
+    assert assets.wallpapers.escaneos == 2
@@ -0,0 +1,19 @@
+"""El benchmark corre sin latencias y no hace más llamadas que la línea base"""
+import json
+import sys
+from pathlib import Path
+
+# Agregar src y benchmarks al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from benchmark_configuracion import LINEA_BASE, comparar, ejecutar
+
+
+def test_llamadas_no_superan_la_linea_base(sin_latencia):
+    resultados = ejecutar(sin_latencia, repeticiones=1)
+    base = json.loads(LINEA_BASE.read_text(encoding="utf-8"))
+
+    assert set(resultados["escenarios"]) == set(base["escenarios"])
+    assert comparar(resultados, base, tolerancia=0.2) == []
+    assert resultados["escenarios"]["usuario_actual_repetida"]["contadores"]["registro_escrituras"] == 0
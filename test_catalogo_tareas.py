@@ -0,0 +1,56 @@
+"""Pruebas del catálogo de tareas programadas y su validación previa"""
+import sys
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.catalogo_tareas import CatalogoTareas, describir
+from core.tareas_programadas import BackendTareasFalso, InstaladorTareas, ResumenTareas
+
+ASSETS = Path(__file__).parent / "assets"
+
+SIN_ACCIONES = """<?xml version="1.0" encoding="UTF-8"?>
+<Task version="1.2" xmlns="http://schemas.microsoft.com/windows/2004/02/mit/task">
+  <Triggers><BootTrigger /></Triggers>
+  <Actions Context="Author" />
+</Task>
+"""
+
+
+def test_catalogo_analiza_una_vez(tmp_path):
+    """El XML del repositorio se analiza una sola vez; otro catálogo lo lee del disco"""
+    catalogo = CatalogoTareas(tmp_path)
+    centros = catalogo.centros(ASSETS)
+    assert centros
+    tarea = next(t for tareas in centros.values() for t in tareas if t.nombre == "Formulario")
+    assert tarea.codificacion == "utf-16-le"
+    assert tarea.errores == ()
+    assert tarea.acciones and tarea.disparadores
+    assert describir(tarea).startswith("Formulario (")
+    total = catalogo.analisis
+
+    catalogo.centros(ASSETS)
+    assert catalogo.analisis == total
+    otro = CatalogoTareas(tmp_path)
+    assert otro.centros(ASSETS) == centros
+    assert otro.analisis == 0
+
+
+def test_xml_no_valido_no_llega_a_schtasks(tmp_path):
+    carpeta = tmp_path / "tareasprogramadas"
+    carpeta.mkdir()
+    # Declara UTF-16 pero está guardado en UTF-8: schtasks lo rechazaría
+    (carpeta / "Codificacion.xml").write_text(SIN_ACCIONES.replace("UTF-8", "UTF-16"), encoding="utf-8")
+    (carpeta / "Vacia.xml").write_text(SIN_ACCIONES, encoding="utf-8")
+    catalogo = CatalogoTareas(tmp_path / "catalogo")
+    errores = {t.nombre: t.errores for t in catalogo.tareas(sorted(carpeta.glob("*.xml")))}
+    assert any("UTF-16" in e for e in errores["Codificacion"])
+    assert errores["Vacia"] == ("la tarea no tiene acciones",)
+
+    backend = BackendTareasFalso()
+    log = []
+    instalador = InstaladorTareas(backend, tmp_path / "tareas.json", catalogo=catalogo)
+    assert instalador.sincronizar(sorted(carpeta.glob("*.xml")), log.append) == ResumenTareas(0, 0, 0, 2)
+    assert backend.invocaciones == 0
+    assert sum("no válida" in linea for linea in log) == 2
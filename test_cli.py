@@ -0,0 +1,37 @@
+"""Pruebas de la línea de comandos"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Agregar src al path
+SRC = Path(__file__).parent / "src"
+sys.path.insert(0, str(SRC))
+
+import cli
+
+
+def test_apply_no_importa_tkinter_y_emite_json():
+    codigo = (
+        "import sys, cli\n"
+        "r = cli.main(['--json', 'apply', '--centro', 'CID-Centro_Computo', '--pc', '3',"
+        " '--tema-oscuro', '--sin-zona-horaria'])\n"
+        "assert 'tkinter' not in sys.modules\n"
+        "sys.exit(r)\n"
+    )
+    r = subprocess.run([sys.executable, "-c", codigo], cwd=SRC, capture_output=True, text=True)
+    eventos = [json.loads(linea) for linea in r.stdout.splitlines()]
+    assert r.returncode in (cli.SALIDA_OK, cli.SALIDA_PARCIAL), r.stderr
+    assert eventos[0]["evento"] == "inicio"
+    assert eventos[0]["opciones"]["tema_oscuro"] and not eventos[0]["opciones"]["fondo_pantalla"]
+    assert eventos[-1]["evento"] == "resultado"
+    assert eventos[-1]["codigo"] == r.returncode
+
+
+def test_codigos_de_salida(capsys):
+    assert cli.main(["apply", "--centro", "no-existe", "--pc", "3", "--tema-oscuro"]) == cli.SALIDA_ASSETS
+    assert cli.main(["apply", "--centro", "CID-Centro_Computo", "--pc", "3"]) == cli.SALIDA_USO
+    assert cli.main(["apply", "--pc", "3"]) == cli.SALIDA_USO
+    assert cli.main(["--json", "centros"]) == cli.SALIDA_OK
+    resultado = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert "CID-Centro_Computo" in [c["carpeta"] for c in resultado["centros"]]
@@ -0,0 +1,193 @@
+"""Pruebas del escáner de programas de arranque y su informe de impacto"""
+import csv
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Agregar src y benchmarks al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from core import arranque
+from core.arranque import (BLOQUEADA, DESHABILITADO, NORMAL, PROTEGIDA, Ambito, EscanerArranque, Reglas,
+                           ResumenArranque, compilar_patrones)
+from core.configurador import ConfiguradorPC
+from core.impacto_arranque import resolver_ejecutable
+from core.perfiles import PERFIL_DEFECTO
+from core.registro import HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, HKEY_USERS, REG_BINARY, REG_SZ, BackendMemoria
+
+APROBADO_RUN = arranque.RUTA_APROBADO + "\\Run"
+
+
+def poner(backend, hive, ruta, valores, tipo=REG_SZ):
+    clave = backend.abrir(hive, ruta)
+    for nombre, valor in valores.items():
+        backend.escribir(clave, nombre, tipo, valor)
+
+
+def equipo(tmp_path):
+    backend = BackendMemoria()
+    poner(backend, HKEY_LOCAL_MACHINE, arranque.RUTA_RUN, {"SecurityHealth": "SecurityHealthSystray.exe",
+                                                          "Teams": "C:\\teams.exe"})
+    poner(backend, HKEY_LOCAL_MACHINE, arranque.RUTA_RUN_WOW, {"Adobe CCXProcess": "C:\\ccx.exe"})
+    poner(backend, HKEY_CURRENT_USER, arranque.RUTA_RUN, {"OneDrive": "C:\\OneDrive.exe", "Notas": "notas.exe"})
+    poner(backend, HKEY_CURRENT_USER, arranque.RUTA_RUN_ONCE, {"Updater": "x.exe"})
+    poner(backend, HKEY_CURRENT_USER, APROBADO_RUN, {"OneDrive": b"\x02" + b"\x00" * 7,
+                                                     "Spotify": b"\x02" + b"\x00" * 7}, REG_BINARY)
+    inicio = tmp_path / "Inicio"
+    inicio.mkdir()
+    (inicio / "Discord.lnk").write_bytes(b"")
+    (inicio / "desktop.ini").write_bytes(b"")
+    ambitos = [Ambito(HKEY_LOCAL_MACHINE, "", None), Ambito(HKEY_CURRENT_USER, "", inicio)]
+    return backend, ambitos
+
+
+def test_clasifica_todas_las_ubicaciones_en_una_pasada(tmp_path):
+    backend, ambitos = equipo(tmp_path)
+    reglas = Reglas(PERFIL_DEFECTO["arranque"]["bloquear"], PERFIL_DEFECTO["arranque"]["proteger"])
+    inventario = EscanerArranque(reglas, backend, ambitos).escanear()
+
+    estados = {e.nombre: e.estado for e in inventario}
+    assert estados == {"SecurityHealth": PROTEGIDA, "Teams": BLOQUEADA, "Adobe CCXProcess": BLOQUEADA,
+                       "OneDrive": BLOQUEADA, "Notas": NORMAL, "Updater": BLOQUEADA,
+                       "Discord.lnk": BLOQUEADA, "Spotify": BLOQUEADA}
+    assert inventario.cuenta() == {BLOQUEADA: 6, PROTEGIDA: 1, NORMAL: 1}
+    # Una lectura por clave y ámbito: 4 Run/RunOnce + 3 StartupApproved en HKLM, 2 + 3 en HKCU
+    assert backend.lecturas == 12
+    # "updater" y "ccxprocess" ya no se funden en un solo patrón
+    assert reglas.clasificar("updater.exe") == (BLOQUEADA, "updater")
+
+
+def test_coste_plano_con_cientos_de_reglas():
+    reglas = Reglas([f"programa{i:04d}" for i in range(2000)])
+    assert reglas.clasificar("C:\\Apps\\Programa1234\\run.exe") == (BLOQUEADA, "programa1234")
+    assert compilar_patrones(["edge", "msedge", "edgeupdate"]) == "(?:edge|msedge)"
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        reglas.clasificar("C:\\Program Files\\Otro programa\\inicio.exe --minimizado")
+    assert time.perf_counter() - inicio < 1.0
+
+
+def test_optimizar_arranque_con_el_escaner(tmp_path):
+    backend, ambitos = equipo(tmp_path)
+    configurador = ConfiguradorPC(3, backend_registro=backend, staging=False)
+    configurador.es_admin = True
+    configurador.ambitos_arranque = lambda: [("Equipo", ambitos[0], None), ("Admin", ambitos[1], None)]
+
+    assert configurador.optimizar_arranque()
+    assert configurador.resumen_arranque == [ResumenArranque("Equipo", 3, 1, None),
+                                             ResumenArranque("Admin", 5, 3, None)]
+    assert backend.valor(HKEY_LOCAL_MACHINE, arranque.RUTA_RUN, "Teams") is None
+    assert backend.valor(HKEY_LOCAL_MACHINE, arranque.RUTA_RUN, "SecurityHealth")
+    assert backend.valor(HKEY_CURRENT_USER, arranque.RUTA_RUN, "Notas") == "notas.exe"
+    assert backend.valor(HKEY_CURRENT_USER, APROBADO_RUN, "Spotify") == DESHABILITADO
+    # RunOnce y la carpeta Inicio solo se informan
+    assert backend.valor(HKEY_CURRENT_USER, arranque.RUTA_RUN_ONCE, "Updater") == "x.exe"
+    assert backend.valor(HKEY_CURRENT_USER, arranque.RUTA_APROBADO + "\\StartupFolder", "Discord.lnk") is None
+
+    # Segunda pasada: nada más que cambiar
+    escrituras = backend.escrituras
+    assert configurador.optimizar_arranque()
+    assert backend.escrituras == escrituras
+
+
+def test_optimizar_arranque_informa_cada_fallo(tmp_path, monkeypatch):
+    backend, ambitos = equipo(tmp_path)
+    poner(backend, HKEY_CURRENT_USER, arranque.RUTA_RUN, {"Teams": "C:\\teams.exe"})
+    eliminar = backend.eliminar
+
+    def eliminar_salvo_onedrive(clave, nombre):
+        if nombre == "OneDrive":
+            raise PermissionError("Acceso denegado")
+        eliminar(clave, nombre)
+
+    monkeypatch.setattr(backend, "eliminar", eliminar_salvo_onedrive)
+    backend.claves_con_error = {(HKEY_CURRENT_USER, APROBADO_RUN.lower())}
+    log = []
+    configurador = ConfiguradorPC(3, callback=log.append, backend_registro=backend, staging=False)
+    configurador.es_admin = True
+    configurador.ambitos_arranque = lambda: [("Admin", ambitos[1], None)]
+
+    configurador.optimizar_arranque()
+
+    assert "✗ Error eliminando OneDrive (Admin): Acceso denegado" in log
+    assert backend.valor(HKEY_CURRENT_USER, arranque.RUTA_RUN, "Teams") is None
+    # StartupApproved no se pudo abrir: nada se da por deshabilitado
+    assert any(linea.startswith("✗ Error optimizando HKCU\\") for linea in log)
+    assert not any("🚫" in linea for linea in log)
+
+
+def test_optimizar_arranque_en_todos_los_usuarios(crear_entorno):
+    entorno = crear_entorno(usuarios=("Alumno", "Curso", "Otro"))
+    configurador = entorno.configurador(staging=False)
+    sids = {u.nombre: u.sid for u in entorno.inventario.usuarios()}
+    for nombre in entorno.usuarios:
+        poner(entorno.registro, HKEY_USERS, f"{sids[nombre]}\\{arranque.RUTA_RUN}",
+              {"OneDrive": "OneDrive.exe /background", "Teams": "Update.exe --processStart Teams.exe",
+               "Notas": "notas.exe"})
+    inicio = Path(entorno.inventario.obtener("Alumno").perfil) / "AppData" / "Roaming" / arranque.CARPETA_INICIO
+    inicio.mkdir(parents=True)
+    (inicio / "Spotify.lnk").write_bytes(b"")
+
+    # HKCU y las carpetas Inicio de quien ejecuta quedan fuera de la prueba
+    ambitos = configurador.ambitos_arranque()
+    configurador.ambitos_arranque = lambda: [(u, a._replace(carpeta=None) if not sid else a, sid)
+                                             for u, a, sid in ambitos if sid or a.hive == HKEY_LOCAL_MACHINE]
+
+    assert configurador.optimizar_arranque(max_hives=2)
+    resumen = {r.usuario: (r.antes, r.despues) for r in configurador.resumen_arranque}
+    assert resumen == {"Equipo": (0, 0), "Alumno": (4, 2), "Curso": (3, 1), "Otro": (3, 1)}
+    assert entorno.registro.valor(HKEY_USERS, f"{sids['Alumno']}\\{arranque.RUTA_RUN}", "Notas") == "notas.exe"
+    # Cada hive se cargó una vez y se descargó al terminar
+    assert entorno.reg.cargas == 3 and entorno.reg.descargas == 3 and not entorno.reg.cargados
+
+
+def acceso_directo(ruta, destino):
+    """Un .lnk mínimo: cabecera y LinkInfo con LocalBasePath"""
+    cabecera = bytearray(0x4C)
+    struct.pack_into("<II", cabecera, 0, 0x4C, 0)
+    struct.pack_into("<I", cabecera, 0x14, 0x02)
+    ruta_local = destino.encode("latin-1") + b"\0"
+    info = struct.pack("<IIIII", 0x1C + len(ruta_local), 0x1C, 1, 0, 0x1C) + bytes(8) + ruta_local
+    ruta.write_bytes(bytes(cabecera) + info)
+
+
+def test_informe_de_impacto_sin_aplicar_nada(tmp_path):
+    backend, ambitos = equipo(tmp_path)
+    teams = tmp_path / "Teams" / "Update.exe"
+    teams.parent.mkdir()
+    teams.write_bytes(bytes(3 * 2**20))
+    poner(backend, HKEY_LOCAL_MACHINE, arranque.RUTA_RUN, {"Teams": f'"{teams}" --processStart Teams.exe'})
+    discord = tmp_path / "Discord.exe"
+    discord.write_bytes(bytes(2**20))
+    acceso_directo(tmp_path / "Inicio" / "Discord.lnk", str(discord))
+
+    assert resolver_ejecutable("%SystemRoot%\\system32\\rundll32.exe C:\\x\\y.dll,Inicio",
+                               {"SYSTEMROOT": "C:\\Windows"}) == "C:\\x\\y.dll"
+    assert resolver_ejecutable("C:\\Program Files\\App\\app.exe /minimizado") == "C:\\Program Files\\App\\app.exe"
+
+    configurador = ConfiguradorPC(3, backend_registro=backend, staging=False)
+    configurador.es_admin = True
+    configurador.ambitos_arranque = lambda: [("Equipo", ambitos[0], None), ("Admin", ambitos[1], None)]
+    escrituras = backend.escrituras
+    informe = configurador.analizar_arranque(tiempos={"discord.exe": 1500})
+    assert backend.escrituras == escrituras
+
+    # 3 MB + actualizador; actualizador sin imagen (RunOnce: no se toca); 1 MB + 1500 ms (carpeta Inicio)
+    primeras = [(e.nombre, e.costo, e.accion) for e in informe.entradas[:3]]
+    assert primeras == [("Teams", 28.0, "eliminar"), ("Updater", 25.0, ""), ("Discord.lnk", 16.0, "")]
+    assert informe.entradas[2].ejecutable == str(discord)
+    diff = informe.diff()
+    assert any(linea.startswith("- HKLM\\") and linea.endswith("--processStart Teams.exe") for linea in diff)
+    assert "~ HKCU\\" + APROBADO_RUN + "\\Spotify: 02 00 00 00 00 00 00 00 -> 03 00 00 00 00 00 00 00" in diff
+    assert not any("StartupFolder" in linea or "RunOnce" in linea for linea in diff)
+    assert not any("SecurityHealth" in linea or "Notas" in linea for linea in diff)
+
+    informe.guardar_csv(tmp_path / "informe.csv")
+    with open(tmp_path / "informe.csv", encoding="utf-8-sig") as archivo:
+        filas = list(csv.DictReader(archivo))
+    assert len(filas) == len(informe.entradas) and filas[0]["nombre"] == "Teams"
+    informe.guardar_json(tmp_path / "informe.json")
+    assert json.loads((tmp_path / "informe.json").read_text(encoding="utf-8"))["cambios"]
@@ -0,0 +1,170 @@
+"""Pruebas del coordinador de la flota con agentes locales simulados"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Agregar src y benchmarks al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from simulacion import Latencias
+
+from core.agente import AgenteConfiguracion
+from core.flota import CoordinadorFlota, Equipo, leer_lista_equipos
+
+LATENCIAS = Latencias(powershell_inicio=0.05, powershell_comando=0.01, reg_load=0.02,
+                      registro=0.01, usb_archivo=0.01, usb_mb=0)
+OPCIONES = {'tema_oscuro': True, 'fondo_pantalla': True, 'bloquear_personalizacion': True,
+            'zona_horaria': False}
+
+
+class Ocupacion:
+    """
+    Agentes aplicando un trabajo al mismo tiempo (máximo observado).
+    Con `juntos` cada trabajo espera a que empiecen los demás: si no
+    corren a la vez, la barrera vence y la prueba falla.
+    """
+
+    def __init__(self, juntos=0):
+        self.lock = threading.Lock()
+        self.actual = self.maximo = 0
+        self.barrera = threading.Barrier(juntos, timeout=10) if juntos else None
+
+    def medir(self, configurador):
+        aplicar = configurador.aplicar_configuracion_completa
+
+        def aplicar_medido(opciones):
+            with self.lock:
+                self.actual += 1
+                self.maximo = max(self.maximo, self.actual)
+            try:
+                if self.barrera:
+                    self.barrera.wait()
+                return aplicar(opciones)
+            finally:
+                with self.lock:
+                    self.actual -= 1
+        configurador.aplicar_configuracion_completa = aplicar_medido
+        return configurador
+
+
+def fabrica(entorno, recibidos, ocupacion):
+    """crear_configurador de un agente: un equipo simulado propio"""
+    def crear(trabajo, callback):
+        recibidos.append(trabajo)
+        return ocupacion.medir(entorno.configurador(trabajo["pc"], callback=callback))
+    return crear
+
+
+async def configurar_laboratorio(crear_entorno, carpeta, equipos, limite, token="secreto"):
+    """Levanta un agente por equipo y los configura todos; devuelve el informe y lo que vio cada equipo"""
+    entornos, recibidos, agentes = [], [], []
+    ocupacion = Ocupacion(juntos=equipos if limite >= equipos else 0)
+    for i in range(equipos):
+        entorno = crear_entorno(f"{carpeta}/equipo-{i}", LATENCIAS)
+        trabajos = []
+        # Todos leen los assets de la "USB" del primer equipo, dentro de la carpeta del laboratorio
+        agente = await AgenteConfiguracion(puerto=0, token=token, raices_assets=[entorno.carpeta.parent],
+                                           crear_configurador=fabrica(entorno, trabajos, ocupacion)).iniciar()
+        entornos.append(entorno)
+        recibidos.append(trabajos)
+        agentes.append(agente)
+    log, progresos = [], []
+    try:
+        coordinador = CoordinadorFlota(
+            [Equipo("127.0.0.1", a.puerto, i + 1) for i, a in enumerate(agentes)],
+            opciones=OPCIONES, assets=entornos[0].usb, token="secreto", limite=limite,
+            callback=log.append, al_progreso=progresos.append)
+        informe = await coordinador.ejecutar()
+    finally:
+        for agente in agentes:
+            await agente.cerrar()
+    return informe, entornos, recibidos, log, progresos, ocupacion
+
+
+def test_configura_cada_equipo_con_su_numero_y_en_paralelo(crear_entorno):
+    informe, entornos, recibidos, log, progresos, ocupacion = asyncio.run(
+        configurar_laboratorio(crear_entorno, "paralelo", 4, limite=4))
+    assert informe.totales() == (4, 4)
+    assert [t[0]["pc"] for t in recibidos] == [1, 2, 3, 4]
+    assert all(t[0]["assets"] == str(entornos[0].usb) for t in recibidos)
+    # Cada equipo (su propio registro) recibe el fondo de su número de PC
+    for i, entorno in enumerate(entornos):
+        fondos = [v[0] for valores in entorno.registro.datos.values() for n, v in valores.items()
+                  if n == "Wallpaper"]
+        assert fondos and all(f"PC-{i + 1}" in fondo for fondo in fondos)
+        assert any(f"[PC-{i + 1}] " in linea for linea in log)
+    assert progresos[-1]["correctos"] == 4 and max(p["en_curso"] for p in progresos) == 4
+    # Los cuatro agentes aplicaron su trabajo a la vez
+    assert ocupacion.maximo == 4
+
+    serie, *_, ocupacion = asyncio.run(configurar_laboratorio(crear_entorno, "serie", 4, limite=1))
+    assert serie.totales() == (4, 4)
+    assert ocupacion.maximo == 1
+
+
+def test_token_invalido_y_agente_ausente():
+    async def probar():
+        agente = await AgenteConfiguracion(puerto=0, token="otro", crear_configurador=None).iniciar()
+        try:
+            coordinador = CoordinadorFlota([Equipo("127.0.0.1", agente.puerto, 1), Equipo("127.0.0.1", 1, 2)],
+                                           opciones=OPCIONES, token="secreto", timeout_conexion=2)
+            return await coordinador.ejecutar()
+        finally:
+            await agente.cerrar()
+
+    informe = asyncio.run(probar())
+    assert informe.totales() == (0, 2)
+    assert informe.resultados[0].error == "Token inválido"
+    assert "sin conexión" in informe.resultados[1].error
+    with pytest.raises(ValueError):
+        AgenteConfiguracion(host="0.0.0.0", token=None)
+
+
+def test_agente_local_sin_token_no_acepta_mensajes_sin_token(monkeypatch):
+    monkeypatch.delenv("CLA_FLOTA_TOKEN", raising=False)
+    recibidos = []
+
+    async def probar(token):
+        agente = await AgenteConfiguracion(puerto=0, crear_configurador=lambda t, c: recibidos.append(t)).iniciar()
+        try:
+            coordinador = CoordinadorFlota([Equipo("127.0.0.1", agente.puerto, 1)], opciones=OPCIONES,
+                                           token=token)
+            return (await coordinador.ejecutar()).resultados[0].error
+        finally:
+            await agente.cerrar()
+
+    assert asyncio.run(probar(None)) == "Token inválido"
+    assert asyncio.run(probar("")) == "Token inválido"
+    assert recibidos == []
+
+
+def test_agente_rechaza_assets_fuera_de_sus_raices(tmp_path):
+    permitida = tmp_path / "assets"
+    (permitida / "centro").mkdir(parents=True)
+    recibidos = []
+
+    async def probar(assets, centro="CID-Centro_Computo"):
+        agente = await AgenteConfiguracion(puerto=0, token="secreto", raices_assets=[permitida],
+                                           crear_configurador=lambda t, c: recibidos.append(t)).iniciar()
+        try:
+            coordinador = CoordinadorFlota([Equipo("127.0.0.1", agente.puerto, 1)], centro, OPCIONES,
+                                           assets=assets, token="secreto")
+            return (await coordinador.ejecutar()).resultados[0].error
+        finally:
+            await agente.cerrar()
+
+    assert asyncio.run(probar(tmp_path / "otra")) == "Ruta de assets no permitida en este equipo"
+    assert asyncio.run(probar(f"{permitida}/centro/../../otra")) == "Ruta de assets no permitida en este equipo"
+    assert asyncio.run(probar(None, centro="../../otra")) == "Centro no válido"
+    assert recibidos == []
+
+def test_lista_de_equipos(tmp_path):
+    lista = tmp_path / "laboratorio.txt"
+    lista.write_text("# Laboratorio 1\nLAB-01\nLAB-02,1\n10.0.0.5:9000\n", encoding="utf-8")
+    assert leer_lista_equipos(lista) == [
+        Equipo("LAB-01", 8750, 2), Equipo("LAB-02", 8750, 1), Equipo("10.0.0.5", 9000, 3)
+    ]
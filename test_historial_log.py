@@ -0,0 +1,31 @@
+"""Pruebas del historial del log (buffer circular + archivo de la sesión)"""
+import sys
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from ui.historial_log import HistorialLog
+
+
+def test_memoria_acotada_y_anteriores_desde_archivo(tmp_path):
+    historial = HistorialLog(capacidad=100, archivo=tmp_path / "sesion.log")
+    historial.agregar([f"linea {i}" for i in range(1000)])
+
+    assert len(historial.recientes) == 100
+    assert historial.primera_reciente == 900
+    assert historial.ultimas(950) == [f"linea {i}" for i in range(950, 1000)]
+    assert historial.anteriores(900, 300) == [f"linea {i}" for i in range(600, 900)]
+    assert historial.anteriores(10, 300) == [f"linea {i}" for i in range(10)]
+    assert historial.anteriores(0, 300) == []
+    historial.cerrar()
+    assert len((tmp_path / "sesion.log").read_text(encoding="utf-8").splitlines()) == 1000
+
+
+def test_mensajes_multilinea_cuentan_cada_linea(tmp_path):
+    historial = HistorialLog(capacidad=10, archivo=tmp_path / "sesion.log")
+    assert historial.agregar(["\n=====", "ok"]) == ["", "=====", "ok"]
+    assert historial.total == 3
+    historial.agregar(["más"])
+    assert historial.anteriores(4, 2) == ["ok", "más"]
+    assert historial.anteriores(3, 3) == ["", "=====", "ok"]
@@ -0,0 +1,185 @@
+"""Pruebas del gestor de hives con el sustituto de reg.exe"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src y benchmarks al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from simulacion import Latencias
+
+from core import ConfiguradorMultiusuario, ConfiguradorPC
+from core.hives import BackendRegFalso, GestorHives
+from core.inventario import InventarioUsuarios
+from core.perfiles import compilar
+from core.registro import BackendMemoria
+
+SID = "S-1-5-21-7-1001"
+
+
+class EjecutorInventario:
+    """Responde la enumeración de usuarios con perfiles en tmp_path"""
+
+    def __init__(self, perfil, usuarios=(("Alumno", SID),)):
+        self.datos = [
+            {"nombre": nombre, "sid": sid, "habilitado": True, "perfil": str(perfil)}
+            for nombre, sid in usuarios
+        ]
+
+    def ejecutar(self, script, timeout=None, idempotente=False):
+        return subprocess.CompletedProcess(script, 0, json.dumps(self.datos), "")
+
+
+def test_referencias_cargan_y_descargan_una_vez():
+    reg = BackendRegFalso()
+    gestor = GestorHives(reg)
+    assert gestor.adquirir(SID, "NTUSER.DAT")
+    assert gestor.adquirir(SID, "NTUSER.DAT")
+    gestor.liberar(SID)
+    assert reg.descargas == 0
+    gestor.liberar(SID)
+    assert (reg.sondeos, reg.cargas, reg.descargas) == (1, 1, 1)
+
+
+def test_hive_de_sesion_iniciada_no_se_descarga():
+    reg = BackendRegFalso(cargados=[SID])
+    gestor = GestorHives(reg)
+    with gestor.montar(SID, lambda: pytest.fail("no debe buscar NTUSER.DAT")) as ok:
+        assert ok
+    assert reg.cargas == 0
+    assert reg.descargas == 0
+    assert SID in reg.cargados
+
+
+def test_montar_descarga_aunque_falle_la_tarea():
+    reg = BackendRegFalso()
+    gestor = GestorHives(reg)
+    with pytest.raises(RuntimeError):
+        with gestor.montar(SID, "NTUSER.DAT"):
+            raise RuntimeError("tarea rota")
+    assert reg.descargas == 1
+    assert gestor.referencias(SID) == 0
+
+
+def test_configuracion_de_otro_usuario_monta_el_hive_una_vez(tmp_path):
+    (tmp_path / "NTUSER.DAT").write_bytes(b"regf")
+    lockscreen = tmp_path / "lockscreen"
+    lockscreen.mkdir()
+    (lockscreen / "PC-3.png").write_bytes(b"png")
+
+    reg = BackendRegFalso()
+    gestor = GestorHives(reg)
+    ejecutor = EjecutorInventario(tmp_path)
+    configurador = ConfiguradorPC(3, usuario_objetivo="Alumno", ejecutor=ejecutor,
+                                  inventario=InventarioUsuarios(ejecutor),
+                                  backend_registro=BackendMemoria(), hives=gestor)
+    configurador.ruta_lockscreen = lockscreen
+    assert configurador.sid_objetivo == SID
+
+    exitosos, total = configurador.aplicar_configuracion_completa({
+        'tema_oscuro': True,
+        'fondo_bloqueo': True,
+        'bloquear_personalizacion': True,
+    })
+
+    assert (exitosos, total) == (3, 3)
+    # Un sondeo, una carga y una descarga para las tres tareas
+    assert (reg.sondeos, reg.cargas, reg.descargas) == (1, 1, 1)
+    assert gestor.referencias(SID) == 0
+
+
+def test_lote_pendiente_se_escribe_con_el_hive_montado(tmp_path, monkeypatch):
+    (tmp_path / "NTUSER.DAT").write_bytes(b"regf")
+    reg = BackendRegFalso()
+    ejecutor = EjecutorInventario(tmp_path)
+    configurador = ConfiguradorPC(3, usuario_objetivo="Alumno", ejecutor=ejecutor,
+                                  inventario=InventarioUsuarios(ejecutor),
+                                  backend_registro=BackendMemoria(), hives=GestorHives(reg))
+    montado = []
+    aplicar_lote = configurador.aplicar_lote
+    monkeypatch.setattr(configurador, "aplicar_lote",
+                        lambda lote: montado.append(SID in reg.cargados) or aplicar_lote(lote))
+
+    class PlanificadorRoto:
+        """Deja escrituras en el lote y falla antes de la tarea 'registro'"""
+
+        def ejecutar(self):
+            configurador.establecer_tema_oscuro()
+            raise RuntimeError("tarea rota")
+
+    monkeypatch.setattr(configurador, "planificar_tareas", lambda opciones: PlanificadorRoto())
+    with pytest.raises(RuntimeError):
+        configurador.aplicar_configuracion_completa({'tema_oscuro': True})
+
+    assert montado == [True]
+    assert reg.descargas == 1
+
+
+def test_multiusuario_equipo_una_vez_y_un_hive_por_usuario(tmp_path, monkeypatch):
+    (tmp_path / "NTUSER.DAT").write_bytes(b"regf")
+    assets = tmp_path / "assets"
+    (assets / "lockscreen").mkdir(parents=True)
+    (assets / "lockscreen" / "PC-3.png").write_bytes(b"png")
+    zonas = []
+    monkeypatch.setattr(ConfiguradorPC, "cambiar_zona_horaria", lambda self: zonas.append(1) or True)
+
+    reg = BackendRegFalso()
+    ejecutor = EjecutorInventario(tmp_path, [("Alumno", SID), ("Curso", "S-1-5-21-7-1002"),
+                                             ("Administrador", "S-1-5-21-7-500")])
+    lote = ConfiguradorMultiusuario(3, ejecutor=ejecutor, inventario=InventarioUsuarios(ejecutor),
+                                    backend_registro=BackendMemoria(), hives=GestorHives(reg))
+    monkeypatch.setattr(lote, "crear_configurador", _con_assets(lote.crear_configurador, assets))
+
+    informe = lote.aplicar({'tema_oscuro': True, 'fondo_bloqueo': True})
+
+    assert [u.usuario for u in informe.usuarios] == ["Alumno", "Curso"]
+    assert informe.totales() == (4, 4)
+    assert len(zonas) == 1
+    assert (reg.cargas, reg.descargas) == (2, 2)
+
+
+def test_multiusuario_valores_hklm_del_perfil_una_vez(tmp_path, monkeypatch):
+    (tmp_path / "NTUSER.DAT").write_bytes(b"regf")
+    plan = compilar({"registro": [
+        {"clave": "HKCU\\Software\\Prueba", "nombre": "Uno", "tipo": "REG_DWORD", "valor": 1},
+        {"clave": "HKLM\\Software\\Prueba", "nombre": "Equipo", "tipo": "REG_DWORD", "valor": 1},
+    ]})
+    monkeypatch.setattr(ConfiguradorPC, "perfil", property(lambda self: plan))
+    monkeypatch.setattr(ConfiguradorPC, "cambiar_zona_horaria", lambda self: True)
+    aplicados = []
+    original = ConfiguradorPC.aplicar_registro_perfil
+
+    def espia(self, usuario=True, equipo=True):
+        aplicados.extend(v.nombre for v in self.valores_perfil(usuario, equipo))
+        return original(self, usuario, equipo)
+    monkeypatch.setattr(ConfiguradorPC, "aplicar_registro_perfil", espia)
+
+    ejecutor = EjecutorInventario(tmp_path, [("Alumno", SID), ("Curso", "S-1-5-21-7-1002")])
+    lote = ConfiguradorMultiusuario(3, ejecutor=ejecutor, inventario=InventarioUsuarios(ejecutor),
+                                    backend_registro=BackendMemoria(), hives=GestorHives(BackendRegFalso()))
+    lote.aplicar({})
+    assert sorted(aplicados) == ["Equipo", "Uno", "Uno"]
+
+
+def test_arranque_y_tareas_de_registro_a_la_vez_no_dejan_hives_cargados(crear_entorno):
+    """optimizar_arranque y las tareas del usuario objetivo toman el mismo SID en paralelo"""
+    entorno = crear_entorno(latencias=Latencias(0, 0, 0.01, 0, 0, 0))
+    for _ in range(5):
+        configurador = entorno.configurador(usuario_objetivo="Alumno")
+        configurador.aplicar_configuracion_completa({
+            'optimizar_arranque': True, 'tema_oscuro': True, 'fondo_pantalla': True,
+            'bloquear_personalizacion': True, 'zona_horaria': False})
+        sids = [u.sid for u in entorno.inventario.usuarios()]
+        assert all(entorno.hives.referencias(sid) == 0 for sid in sids)
+        assert not entorno.reg.cargados and entorno.reg.cargas == entorno.reg.descargas
+
+def _con_assets(crear, assets):
+    def crear_con_assets(*args, **kwargs):
+        configurador = crear(*args, **kwargs)
+        configurador.ruta_lockscreen = assets / "lockscreen"
+        return configurador
+    return crear_con_assets
@@ -0,0 +1,68 @@
+"""Pruebas de la instrumentación de operaciones"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core import ConfiguradorPC, instrumentacion
+from core.instrumentacion import Instrumentacion, medido
+from core.registro import BackendMemoria
+
+
+@pytest.fixture
+def medicion(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    medicion = instrumentacion.activar(Instrumentacion())
+    yield medicion
+    instrumentacion.desactivar()
+
+
+class Operaciones:
+    @medido
+    def lanzar(self):
+        subprocess.run([sys.executable, "-c", "pass"])
+        instrumentacion.esperar(0.01)
+        self.interna()
+
+    @medido
+    def interna(self):
+        instrumentacion.registrar("reintentos")
+
+
+def test_atribuye_procesos_y_reintentos_a_la_operacion(medicion):
+    Operaciones().lanzar()
+    resumen = medicion.resumen()
+
+    lanzar = resumen["operaciones"]["Operaciones.lanzar"]
+    assert lanzar["llamadas"] == 1
+    assert lanzar["subprocesos"] == 1
+    assert resumen["operaciones"]["Operaciones.interna"]["reintentos"] == 1
+    assert lanzar["reintentos"] == 0
+    assert lanzar["esperas"] == 1
+
+
+def test_desactivada_no_registra_nada():
+    instrumentacion.desactivar()
+    medicion = Instrumentacion()
+    Operaciones().lanzar()
+    assert medicion.operaciones == {}
+
+
+def test_resumen_json_al_final_de_la_configuracion(medicion, tmp_path):
+    backend = BackendMemoria()
+    configurador = ConfiguradorPC(3, backend_registro=backend, staging=False)
+    configurador.cambiar_zona_horaria = lambda: True
+
+    configurador.aplicar_configuracion_completa({'tema_oscuro': True, 'bloquear_personalizacion': True})
+
+    resumen = configurador.instrumentacion
+    assert resumen["totales"]["registro_escrituras"] == backend.escrituras
+    assert "ConfiguradorPC.establecer_tema_oscuro" in resumen["operaciones"]
+    assert set(resumen["tareas"]) >= {"tema_oscuro", "registro"}
+    informe, = (tmp_path / "CLA-WinConfig" / "instrumentacion").glob("PC-3-*.json")
+    assert json.loads(informe.read_text(encoding="utf-8"))["pc"] == 3
@@ -0,0 +1,101 @@
+"""Pruebas de los perfiles de centro y su caché de planes compilados"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core import perfiles
+from core.configurador import ConfiguradorPC
+from core.perfiles import CachePlanes, ErrorPerfil
+from core.registro import HKEY_CURRENT_USER, HKEY_LOCAL_MACHINE, REG_BINARY, BackendMemoria
+
+ASSETS = Path(__file__).parent / "assets"
+
+PERFIL = {
+    "nombre": "Laboratorio de prueba",
+    "tareas": ["tema_oscuro"],
+    "registro": [
+        {"clave": "HKCU\\Software\\Prueba", "nombre": "Uno", "tipo": "REG_DWORD", "valor": 1},
+        {"clave": "HKLM\\Software\\Prueba", "nombre": "Datos", "tipo": "REG_BINARY", "valor": "0300"},
+    ],
+    "arranque": {"bloquear": ["OneDrive", "onedrive", "Teams"]},
+    "usuarios": {"estandar": ["Alumno"]},
+}
+
+
+def escribir(carpeta, datos):
+    carpeta.mkdir(parents=True, exist_ok=True)
+    (carpeta / "perfil.json").write_text(json.dumps(datos), encoding="utf-8")
+
+
+def test_compila_una_vez_y_reutiliza_el_plan_guardado(tmp_path, monkeypatch):
+    centro = tmp_path / "centro"
+    escribir(centro, PERFIL)
+
+    cache = CachePlanes(tmp_path / "planes")
+    plan = cache.plan(centro)
+    assert cache.plan(centro) is plan and cache.compilaciones == 1
+    assert plan.nombre == "Laboratorio de prueba" and plan.tareas == ("tema_oscuro",)
+    assert plan.bloquear == ("onedrive", "teams")
+    assert plan.proteger == perfiles.compilar({}).proteger
+    assert plan.registro[0].usuario and plan.registro[0].hive == HKEY_CURRENT_USER
+    assert plan.registro[1].hive == HKEY_LOCAL_MACHINE and plan.registro[1].tipo == REG_BINARY
+    assert plan.registro[1].valor == b"\x03\x00"
+
+    # Otro proceso: el plan se lee de disco sin volver a compilar
+    otra = CachePlanes(tmp_path / "planes")
+    assert otra.plan(centro) == plan and otra.compilaciones == 0
+
+    # Un cambio en el perfil genera un plan nuevo
+    escribir(centro, {**PERFIL, "tareas": ["fondo_pantalla"]})
+    os.utime(centro / "perfil.json", ns=(1, 1))
+    assert otra.plan(centro).tareas == ("fondo_pantalla",) and otra.compilaciones == 1
+
+    # Cambian los valores por defecto: los planes guardados ya no sirven
+    monkeypatch.setattr(perfiles, "HUELLA_DEFECTO", "otra")
+    nueva = CachePlanes(tmp_path / "planes")
+    assert nueva.plan(centro).tareas == ("fondo_pantalla",) and nueva.compilaciones == 1
+
+    # Sin perfil: las reglas predeterminadas
+    assert cache.plan(tmp_path) is cache.defecto()
+
+
+def test_perfil_no_valido(tmp_path):
+    escribir(tmp_path, {"tareas": ["volar"], "extra": 1,
+                        "registro": [{"clave": "HKCR\\x", "nombre": "a", "tipo": "REG_DWORD", "valor": "1"}]})
+    with pytest.raises(ErrorPerfil) as error:
+        CachePlanes(tmp_path / "planes").plan(tmp_path)
+    assert len(error.value.errores) == 4
+
+    # Tipos que no son texto: errores del perfil, no excepciones
+    escribir(tmp_path, {"registro": [{"clave": "HKCU\\x", "nombre": "a", "tipo": ["REG_DWORD"], "valor": 1},
+                                     {"clave": 1, "nombre": {}, "tipo": {"a": 1}, "valor": 1}]})
+    with pytest.raises(ErrorPerfil) as error:
+        CachePlanes(tmp_path / "planes").plan(tmp_path)
+    assert len(error.value.errores) == 4
+
+
+def test_perfiles_incluidos_son_validos(tmp_path):
+    cache = CachePlanes(tmp_path / "planes")
+    for archivo in ASSETS.glob("*/perfil.json"):
+        assert cache.plan(archivo.parent).nombre
+    assert "UD2-Laboratorio de Software" in perfiles.centros(ASSETS)
+
+
+def test_configurador_aplica_el_registro_del_perfil(tmp_path, monkeypatch):
+    monkeypatch.setattr(perfiles, "_cache", CachePlanes(tmp_path / "planes"))
+    escribir(tmp_path / "centro", PERFIL)
+    backend = BackendMemoria()
+    configurador = ConfiguradorPC(3, backend_registro=backend, staging=False)
+    configurador.carpeta_assets = tmp_path / "centro"
+    configurador.es_admin = True
+    configurador.cambiar_zona_horaria = lambda: True
+
+    assert configurador.aplicar_configuracion_completa({}) == (1, 1)
+    assert backend.valor(HKEY_CURRENT_USER, "Software\\Prueba", "Uno") == 1
+    assert backend.valor(HKEY_LOCAL_MACHINE, "Software\\Prueba", "Datos") == b"\x03\x00"
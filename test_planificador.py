@@ -0,0 +1,69 @@
+"""Pruebas del planificador de tareas con dependencias y recursos"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.planificador import PlanificadorTareas
+
+
+def dormir(segundos, registro=None, nombre=None, resultado=True):
+    def funcion():
+        if registro is not None:
+            registro.append(("inicio", nombre))
+        time.sleep(segundos)
+        if registro is not None:
+            registro.append(("fin", nombre))
+        return resultado
+    return funcion
+
+
+def test_tareas_independientes_corren_en_paralelo():
+    planificador = PlanificadorTareas(max_hilos=4)
+    for nombre in ("zona", "tareas", "arranque", "tema"):
+        planificador.agregar(nombre, dormir(0.3))
+
+    inicio = time.perf_counter()
+    planificador.ejecutar()
+
+    assert time.perf_counter() - inicio < 0.6
+    assert planificador.exitosos() == (4, 4)
+
+
+def test_dependencias_y_recursos_ordenan():
+    orden = []
+    planificador = PlanificadorTareas(max_hilos=4)
+    planificador.agregar("tema", dormir(0.1, orden, "tema"), recursos=["hive"])
+    planificador.agregar("fondo", dormir(0.1, orden, "fondo"), recursos=["hive"])
+    planificador.agregar("registro", dormir(0, orden, "registro"), depende=["tema", "fondo", "no_agregada"],
+                         cuenta=False)
+
+    planificador.ejecutar()
+
+    # Comparten el hive: una termina antes de que empiece la otra
+    assert [evento for evento, _ in orden[:4]] == ["inicio", "fin", "inicio", "fin"]
+    assert orden[-1] == ("fin", "registro")
+    assert planificador.exitosos() == (2, 2)
+
+
+def test_excepcion_cuenta_como_fallo():
+    mensajes = []
+    planificador = PlanificadorTareas(callback=mensajes.append)
+    planificador.agregar("rota", lambda: 1 / 0)
+    planificador.agregar("bien", lambda: True, depende=["rota"])
+
+    assert planificador.ejecutar() == {"rota": False, "bien": True}
+    assert planificador.exitosos() == (1, 2)
+    assert any("rota" in m for m in mensajes)
+
+
+def test_ciclo_se_detecta():
+    planificador = PlanificadorTareas()
+    planificador.agregar("a", lambda: True, depende=["b"])
+    planificador.agregar("b", lambda: True, depende=["a"])
+    with pytest.raises(ValueError):
+        planificador.ejecutar()
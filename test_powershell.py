@@ -0,0 +1,116 @@
+"""Pruebas del pool de sesiones PowerShell usando el shell simulado"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.powershell import ErrorSesion, PoolPowerShell, SesionPowerShell, comando_shell_simulado
+from core import GestorUsuarios
+
+
+def crear_guion(tmp_path, respuestas, **extra):
+    registro = tmp_path / "scripts.log"
+    guion = {"respuestas": respuestas, "registro": str(registro), **extra}
+    ruta = tmp_path / "guion.json"
+    ruta.write_text(json.dumps(guion), encoding="utf-8")
+    return ruta, registro
+
+
+def scripts_recibidos(registro):
+    if not registro.exists():
+        return []
+    return [json.loads(l) for l in registro.read_text(encoding="utf-8").splitlines()]
+
+
+def test_sesion_responde_y_descarta_ruido(tmp_path):
+    guion, _ = crear_guion(tmp_path, [{"contiene": "Get-LocalUser", "stdout": "S-1-5-21-1-1001"}], ruido=True)
+    sesion = SesionPowerShell(comando_shell_simulado(guion))
+    sesion.iniciar()
+    try:
+        r = sesion.ejecutar("(Get-LocalUser -Name 'x').SID.Value", timeout=10)
+        assert r.returncode == 0
+        assert r.stdout == "S-1-5-21-1-1001"
+        assert sesion.verificar()
+    finally:
+        sesion.cerrar()
+
+
+def test_pool_reutiliza_un_solo_proceso(tmp_path):
+    guion, registro = crear_guion(tmp_path, [{"contiene": "uno", "stdout": "1"}])
+    pool = PoolPowerShell(tamano=1, comando=comando_shell_simulado(guion))
+    try:
+        for _ in range(5):
+            assert pool.ejecutar("uno").stdout == "1"
+        assert pool._creadas == 1
+        assert pool.reinicios == 0
+        assert len(scripts_recibidos(registro)) == 5
+    finally:
+        pool.cerrar()
+
+
+def test_pool_reinicia_tras_caida(tmp_path):
+    guion, _ = crear_guion(tmp_path, [{"contiene": "hola", "stdout": "mundo"}])
+    pool = PoolPowerShell(tamano=1, comando=comando_shell_simulado(guion))
+    try:
+        assert pool.ejecutar("hola").stdout == "mundo"
+        # El shell muere sin responder: el pool reinicia y reintenta una vez
+        with pytest.raises(Exception):
+            pool.ejecutar("__caer__")
+        assert pool.reinicios >= 1
+        assert pool.ejecutar("hola").stdout == "mundo"
+        assert pool.verificar() == 1
+    finally:
+        pool.cerrar()
+
+
+def test_caida_no_repite_scripts_que_cambian_estado(tmp_path):
+    guion, registro = crear_guion(tmp_path, [])
+    pool = PoolPowerShell(tamano=1, comando=comando_shell_simulado(guion))
+    try:
+        with pytest.raises(ErrorSesion):
+            pool.ejecutar("Set-Algo; __caer__")
+        assert scripts_recibidos(registro) == ["Set-Algo; __caer__"]
+        # Una consulta idempotente sí se reintenta en una sesión nueva
+        with pytest.raises(ErrorSesion):
+            pool.ejecutar("Get-Algo; __caer__", idempotente=True)
+        assert scripts_recibidos(registro)[1:] == ["Get-Algo; __caer__"] * 2
+    finally:
+        pool.cerrar()
+
+
+def test_timeout_descarta_sesion(tmp_path):
+    guion = tmp_path / "guion.json"
+    guion.write_text("{}", encoding="utf-8")
+    # Un proceso que nunca responde
+    comando = [sys.executable, "-c", "import sys, time; sys.stdin.readline(); time.sleep(30)"]
+    pool = PoolPowerShell(tamano=1, comando=comando)
+    try:
+        with pytest.raises(subprocess.TimeoutExpired):
+            pool.ejecutar("lo que sea", timeout=0.5)
+        assert pool.reinicios == 1
+    finally:
+        pool.cerrar()
+
+
+def test_gestor_usuarios_usa_el_ejecutor(tmp_path):
+    inventario = json.dumps([
+        {"nombre": "Administrador", "sid": "S-1-5-21-7-500", "habilitado": False},
+        {"nombre": "Alumno", "sid": "S-1-5-21-7-1001", "habilitado": True},
+    ])
+    guion, registro = crear_guion(tmp_path, [{"contiene": "Get-LocalGroup", "stdout": inventario}])
+    pool = PoolPowerShell(tamano=1, comando=comando_shell_simulado(guion))
+    try:
+        gestor = GestorUsuarios(ejecutor=pool)
+        assert gestor.obtener_admin_integrado() == "Administrador"
+        assert gestor.usuario_existe("alumno")
+        assert not gestor.usuario_existe("Invitado")
+        assert pool._creadas == 1
+        # Una sola enumeración para todas las consultas
+        assert len(scripts_recibidos(registro)) == 1
+    finally:
+        pool.cerrar()
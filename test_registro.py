@@ -0,0 +1,124 @@
+"""Pruebas del lote de escrituras en el registro con el backend en memoria"""
+import getpass
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core import ConfiguradorPC
+from core.registro import (HKEY_CURRENT_USER, HKEY_USERS, REG_DWORD, REG_SZ,
+                           BackendMemoria, RegistryBatch)
+
+
+class EjecutorNulo:
+    def ejecutar(self, script, timeout=None, idempotente=False):
+        return subprocess.CompletedProcess(script, 1, "", "")
+
+
+def test_cada_clave_se_abre_una_vez():
+    backend = BackendMemoria()
+    lote = RegistryBatch(backend)
+    lote.establecer(HKEY_USERS, r"S-1\Control Panel\Desktop", "Wallpaper", REG_SZ, "a.png")
+    lote.establecer(HKEY_USERS, r"S-1\Control Panel\Desktop", "WallpaperStyle", REG_SZ, "10")
+    lote.establecer(HKEY_USERS, r"S-1\Policies\System", "Wallpaper", REG_SZ, "a.png")
+    lote.establecer(HKEY_USERS, r"S-1\Control Panel\Desktop", "Wallpaper", REG_SZ, "b.png")
+
+    assert backend.aperturas == 0
+    resultados = lote.flush()
+
+    assert backend.aperturas == 2
+    assert backend.escrituras == 3
+    assert [r.escritos for r in resultados] == [2, 1]
+    # Prevalece la última escritura del mismo valor
+    assert backend.valor(HKEY_USERS, r"S-1\Control Panel\Desktop", "Wallpaper") == "b.png"
+    assert lote.pendientes() == 0
+
+
+def test_errores_por_clave_y_tareas_fallidas():
+    backend = BackendMemoria(claves_con_error=[(HKEY_USERS, r"S-1\Policies\System")])
+    lote = RegistryBatch(backend)
+    lote.establecer(HKEY_USERS, r"S-1\Policies\System", "Wallpaper", REG_SZ, "a.png", tarea="bloquear")
+    lote.establecer(HKEY_USERS, r"S-1\Themes", "AppsUseLightTheme", REG_DWORD, 0, tarea="tema")
+
+    resultados = lote.flush()
+
+    assert [r.error is not None for r in resultados] == [True, False]
+    assert lote.tareas_fallidas() == {"bloquear"}
+
+
+def test_contexto_propaga_el_error():
+    backend = BackendMemoria(claves_con_error=[(HKEY_CURRENT_USER, "x")])
+    with pytest.raises(OSError):
+        with RegistryBatch(backend) as lote:
+            lote.establecer(HKEY_CURRENT_USER, "x", "v", REG_SZ, "1")
+
+
+def test_configuracion_completa_agrupa_escrituras(tmp_path):
+    wallpapers = tmp_path / "wallpapers"
+    lockscreen = tmp_path / "lockscreen"
+    wallpapers.mkdir()
+    lockscreen.mkdir()
+    (wallpapers / "PC-3.png").write_bytes(b"png")
+    (lockscreen / "PC-3.png").write_bytes(b"png")
+
+    backend = BackendMemoria()
+    configurador = ConfiguradorPC(3, usuario_objetivo=getpass.getuser(),
+                                  ejecutor=EjecutorNulo(), backend_registro=backend)
+    configurador.ruta_wallpapers = wallpapers
+    configurador.ruta_lockscreen = lockscreen
+    configurador.ruta_temas = tmp_path / "temas"
+
+    exitosos, total = configurador.aplicar_configuracion_completa({
+        'tema_oscuro': True,
+        'fondo_bloqueo': True,
+        'bloquear_personalizacion': True,
+    })
+
+    assert (exitosos, total) == (3, 3)
+    assert configurador.ruta_temas.is_dir()
+    # Personalize, PersonalizationSettings, Policies\System y Policies\Explorer
+    assert backend.aperturas == 4
+    assert backend.escrituras == 7
+
+
+def test_solo_se_escribe_la_diferencia():
+    backend = BackendMemoria()
+    backend.datos[(HKEY_USERS, r"s-1\control panel\desktop")] = {"WallpaperStyle": ("10", REG_SZ)}
+    lote = RegistryBatch(backend)
+    lote.establecer(HKEY_USERS, r"S-1\Control Panel\Desktop", "Wallpaper", REG_SZ, "a.png", tarea="fondo")
+    lote.establecer(HKEY_USERS, r"S-1\Control Panel\Desktop", "WallpaperStyle", REG_SZ, "10", tarea="fondo")
+    assert [d.nombre for d in lote.delta()] == ["Wallpaper"]
+
+    resultados = lote.flush()
+
+    assert (resultados[0].escritos, resultados[0].sin_cambios) == (1, 1)
+    assert lote.tareas_modificadas() == {"fondo"}
+    assert not lote.cumple()
+
+
+def test_segunda_ejecucion_ya_cumple(tmp_path, monkeypatch):
+    wallpapers = tmp_path / "wallpapers"
+    wallpapers.mkdir()
+    (wallpapers / "PC-3.png").write_bytes(b"png")
+
+    backend = BackendMemoria()
+    configurador = ConfiguradorPC(3, usuario_objetivo=getpass.getuser(),
+                                  ejecutor=EjecutorNulo(), backend_registro=backend)
+    configurador.ruta_wallpapers = wallpapers
+    refrescos = []
+    monkeypatch.setattr(configurador, "refrescar_fondo", refrescos.append)
+    monkeypatch.setattr(configurador, "reiniciar_explorer", lambda: refrescos.append("explorer"))
+    opciones = {'tema_oscuro': True, 'fondo_pantalla': True, 'reiniciar_explorer': True}
+
+    assert configurador.aplicar_configuracion_completa(opciones) == (2, 2)
+    assert len(refrescos) == 2
+    escrituras = backend.escrituras
+
+    # Ya configurado: sin escrituras, sin refresco del fondo ni reinicio del explorador
+    assert configurador.aplicar_configuracion_completa(opciones) == (2, 2)
+    assert backend.escrituras == escrituras
+    assert len(refrescos) == 2
@@ -0,0 +1,60 @@
+"""Pruebas del resolvedor de SIDs con backends falsos"""
+import sys
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.resolvedor_sid import (BackendAdvapi32, BackendFalso, BackendSID,
+                                 ResolvedorSID, medir_backends)
+
+
+class BackendRoto(BackendSID):
+    nombre = "roto"
+
+    def resolver(self, nombre_usuario):
+        raise OSError("acceso denegado")
+
+
+class BackendAutoritativo(BackendFalso):
+    nombre = "autoritativo"
+    autoritativo = True
+
+
+def test_primer_backend_que_responde_gana():
+    primero = BackendFalso({"Alumno": "S-1-5-21-1-1001"})
+    segundo = BackendFalso({"Alumno": "S-1-5-21-9-9999"})
+    resolvedor = ResolvedorSID([primero, segundo])
+    assert resolvedor.resolver("alumno") == ("S-1-5-21-1-1001", "falso")
+    assert segundo.consultas == 0
+
+
+def test_error_pasa_al_respaldo_y_se_informa():
+    mensajes = []
+    respaldo = BackendFalso({"Alumno": "S-1-5-21-1-1001"})
+    resolvedor = ResolvedorSID([BackendRoto(), respaldo], callback=mensajes.append)
+    assert resolvedor.resolver("Alumno")[0] == "S-1-5-21-1-1001"
+    assert any("roto" in m for m in mensajes)
+
+
+def test_no_existe_autoritativo_evita_el_respaldo_lento():
+    respaldo = BackendFalso({"Fantasma": "S-1-5-21-1-1002"})
+    resolvedor = ResolvedorSID([BackendAutoritativo({}), respaldo])
+    assert resolvedor.resolver("Fantasma") == (None, None)
+    assert respaldo.consultas == 0
+
+
+def test_advapi32_se_omite_fuera_de_windows():
+    backend = BackendAdvapi32()
+    if sys.platform != "win32":
+        assert not backend.disponible()
+        resolvedor = ResolvedorSID([backend, BackendFalso({"x": "S-1-5-21-1-1"})])
+        assert resolvedor.resolver("x") == ("S-1-5-21-1-1", "falso")
+
+
+def test_micro_benchmark_mide_backends_disponibles():
+    rapido = BackendFalso({"a": "S-1-5-21-1-1"})
+    resultados = medir_backends([rapido, BackendAdvapi32()], ["a", "b"], repeticiones=10)
+    assert "falso" in resultados
+    assert resultados["falso"] < 0.001
+    assert rapido.consultas == 20
@@ -0,0 +1,56 @@
+"""Pruebas de la copia local de assets"""
+import os
+import sys
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.staging import SincronizadorAssets, copiar_archivo
+
+
+def crear_centro(tmp_path):
+    centro = tmp_path / "usb" / "CID-Centro_Computo"
+    (centro / "wallpapers").mkdir(parents=True)
+    (centro / "lockscreen").mkdir()
+    (centro / "wallpapers" / "PC-1.png").write_bytes(b"a" * 5000)
+    (centro / "wallpapers" / "PC-2.png").write_bytes(b"b" * 5000)
+    (centro / "lockscreen" / "PC-Bloqueo.png").write_bytes(b"c" * 100)
+    return centro
+
+
+def test_copia_binaria_exacta(tmp_path):
+    origen = tmp_path / "origen.bin"
+    origen.write_bytes(os.urandom(300_000))
+    copiar_archivo(origen, tmp_path / "destino.bin")
+    assert (tmp_path / "destino.bin").read_bytes() == origen.read_bytes()
+
+
+def test_repetir_no_copia_nada(tmp_path):
+    centro = crear_centro(tmp_path)
+    sync = SincronizadorAssets(tmp_path / "local", solo_externos=False)
+    assert sync.necesita_staging(centro)
+
+    primero = sync.sincronizar(centro)
+    assert (primero.copiados, primero.omitidos) == (3, 0)
+    assert (primero.destino / "wallpapers" / "PC-1.png").read_bytes() == b"a" * 5000
+    assert not sync.necesita_staging(primero.destino)
+
+    segundo = sync.sincronizar(centro)
+    assert (segundo.copiados, segundo.omitidos, segundo.bytes) == (0, 3, 0)
+
+
+def test_solo_cambios_reales_y_eliminados(tmp_path):
+    centro = crear_centro(tmp_path)
+    sync = SincronizadorAssets(tmp_path / "local", solo_externos=False)
+    sync.sincronizar(centro)
+
+    # Mismo contenido con otra fecha: se compara el hash y no se copia
+    os.utime(centro / "wallpapers" / "PC-1.png", ns=(0, 10**9))
+    (centro / "wallpapers" / "PC-2.png").write_bytes(b"x" * 6000)
+    (centro / "lockscreen" / "PC-Bloqueo.png").unlink()
+
+    r = sync.sincronizar(centro)
+    assert (r.copiados, r.omitidos, r.eliminados) == (1, 1, 1)
+    assert (r.destino / "wallpapers" / "PC-2.png").read_bytes() == b"x" * 6000
+    assert not (r.destino / "lockscreen" / "PC-Bloqueo.png").exists()
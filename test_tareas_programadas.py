@@ -0,0 +1,73 @@
+"""Pruebas del instalador incremental de tareas programadas"""
+import sys
+import time
+from pathlib import Path
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.catalogo_tareas import CatalogoTareas
+from core.configurador import ConfiguradorPC
+from core.tareas_programadas import BackendTareasFalso, InstaladorTareas, ResumenTareas
+
+TAREA = """<?xml version="1.0" encoding="UTF-16"?>
+<Task version="1.2" xmlns="http://schemas.microsoft.com/windows/2004/02/mit/task">
+  <Triggers><LogonTrigger><Enabled>true</Enabled></LogonTrigger></Triggers>
+  <Actions Context="Author"><Exec><Command>{comando}</Command></Exec></Actions>
+</Task>
+"""
+
+
+def instalador(backend, carpeta, **kwargs):
+    return InstaladorTareas(backend, carpeta / "tareas.json", catalogo=CatalogoTareas(carpeta / "catalogo"),
+                            **kwargs)
+
+
+def crear_xml(carpeta, nombre, contenido=TAREA.format(comando="cmd")):
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / f"{nombre}.xml"
+    ruta.write_text(contenido, encoding="utf-16")
+    return ruta
+
+
+def test_solo_instala_lo_nuevo_o_modificado(tmp_path):
+    carpeta = tmp_path / "tareasprogramadas"
+    xmls = [crear_xml(carpeta, f"Tarea{i}") for i in range(8)]
+    backend = BackendTareasFalso(latencia=0.05)
+    inicio = time.perf_counter()
+    assert instalador(backend, tmp_path, limite=4).sincronizar(xmls) == ResumenTareas(8, 0, 0, 0)
+    assert time.perf_counter() - inicio < 8 * 0.05 * 0.75
+    assert len(backend.tareas) == 8
+
+    # Nada cambió: ningún schtasks (también desde otro proceso, con el registro en disco)
+    invocaciones = backend.invocaciones
+    otro = instalador(backend, tmp_path)
+    assert otro.sincronizar(xmls) == ResumenTareas(0, 8, 0, 0)
+    assert backend.invocaciones == invocaciones
+
+    # Una modificada, una quitada de la carpeta; las tareas ajenas no se tocan
+    crear_xml(carpeta, "Tarea0", TAREA.format(comando="notepad"))
+    xmls[7].unlink()
+    backend.tareas["AjenaDeWindows"] = b""
+    assert otro.sincronizar(xmls[:7]) == ResumenTareas(1, 6, 1, 0)
+    assert backend.invocaciones == invocaciones + 2
+    assert "Tarea7" not in backend.tareas and "AjenaDeWindows" in backend.tareas
+
+
+def test_los_errores_se_reintentan(tmp_path):
+    xmls = [crear_xml(tmp_path, "Buena"), crear_xml(tmp_path, "Mala")]
+    backend = BackendTareasFalso(fallar={"Mala"})
+    tareas = instalador(backend, tmp_path)
+    assert tareas.sincronizar(xmls) == ResumenTareas(1, 0, 0, 1)
+    backend.fallar.clear()
+    assert tareas.sincronizar(xmls) == ResumenTareas(1, 1, 0, 0)
+
+
+def test_configurador_usa_el_instalador(tmp_path):
+    crear_xml(tmp_path / "centro" / "tareasprogramadas", "Formulario")
+    backend = BackendTareasFalso()
+    configurador = ConfiguradorPC(3, staging=False, instalador_tareas=instalador(backend, tmp_path))
+    configurador.carpeta_assets = tmp_path / "centro"
+    assert configurador.instalar_tareas_programadas() == (True, "✓ Tareas programadas: 1 instaladas, 0 sin cambios")
+    assert configurador.instalar_tareas_programadas()[1].endswith("0 instaladas, 1 sin cambios")
+    assert backend.invocaciones == 1
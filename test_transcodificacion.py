@@ -0,0 +1,59 @@
+"""Pruebas de la caché de fondos pre-transcodificados"""
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar src al path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from core.transcodificacion import ParametrosFondo, PreprocesadorFondos
+
+
+def copiar(origen, destino, parametros):
+    """Conversión falsa: copia el archivo tal cual"""
+    shutil.copyfile(origen, destino)
+
+
+def crear_fondos(tmp_path, n):
+    carpeta = tmp_path / "wallpapers"
+    carpeta.mkdir()
+    for i in range(1, n + 1):
+        (carpeta / f"PC-{i}.png").write_bytes(f"imagen {i}".encode() * 100)
+    return sorted(carpeta.iterdir())
+
+
+def test_cache_por_contenido_y_parametros(tmp_path):
+    fondos = crear_fondos(tmp_path, 3)
+    preprocesador = PreprocesadorFondos(tmp_path / "cache", max_procesos=2, convertir=copiar)
+
+    resultados = preprocesador.preparar(fondos)
+    assert all(r and r.exists() for r in resultados.values())
+    assert preprocesador.conversiones == 3
+
+    # Segunda vez: todo sale de la caché
+    repetido = PreprocesadorFondos(tmp_path / "cache", convertir=copiar)
+    assert repetido.preparar(fondos) == resultados
+    assert repetido.conversiones == 0
+
+    # Otros parámetros generan otra entrada
+    otra = PreprocesadorFondos(tmp_path / "cache", ParametrosFondo(1280, 720, 80), convertir=copiar)
+    assert otra.optimizar(fondos[0]) != resultados[str(fondos[0])]
+
+
+def test_sin_conversor_usa_el_original(tmp_path):
+    fondos = crear_fondos(tmp_path, 1)
+    preprocesador = PreprocesadorFondos(tmp_path / "cache")
+    preprocesador.convertir = None
+    assert preprocesador.optimizar(fondos[0]) is None
+
+
+def test_pillow_genera_jpeg(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    origen = tmp_path / "PC-1.png"
+    Image.new("RGB", (3000, 2000), "navy").save(origen)
+    destino = PreprocesadorFondos(tmp_path / "cache", ParametrosFondo(1920, 1080, 85)).optimizar(origen)
+    with Image.open(destino) as imagen:
+        assert imagen.format == "JPEG"
+        assert imagen.size == (1920, 1080)